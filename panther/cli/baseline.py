@@ -4,40 +4,48 @@
 # Panther Baseline is a tool that runs Panther against a Git commit, and compares
 # the current commit findings to the parent commit findings.
 
-# To do this it checks out the parent commit, runs Panther (with any provided
-# filters or profiles), checks out the current commit, runs Panther, and then
-# reports on any new findings.
+# To do this it reads the files that differ between the parent commit and the
+# current commit straight from the git object store, runs Panther (with any
+# provided filters or profiles) in-process on both versions, and then reports
+# on any new findings. The working tree is never checked out.
+
+# With --range it walks a range of commits instead, rescanning only the files
+# each commit changed, and reports the commit that introduced each finding.
 # #############################################################################
 
 import argparse
-import contextlib
+import collections
+import io
+import linecache
 import logging
 import os
-import shutil
-import subprocess
+import stat
 import sys
-import tempfile
 
 import git
 
+from panther.cli import main as p_main
+from panther.core import config as p_config
+from panther.core import constants
+from panther.core import extension_loader
+from panther.core import manager as p_manager
+from panther.core import result_cache
+from panther.core import utils
+
 panther_args = sys.argv[1:]
-baseline_tmp_file = '_panther_baseline_run.json'
 commit_sha = None
 default_output_format = 'terminal'
 LOG = logging.getLogger(__name__)
 repo = None
 report_basename = 'panther_baseline_result'
+scan_args = None
 valid_baseline_formats = ['txt', 'html', 'json']
 
 
 def main():
-    # our cleanup function needs this and can't be passed arguments
     global commit_sha
     global repo
-    global panther_args
 
-    saved_commit_sha = None
-    parent_commit_sha = None
     output_format = None
     repo = None
     report_fname = None
@@ -49,15 +57,61 @@ def main():
     if not repo:
         sys.exit(2)
 
+    try:
+        if scan_args.commit_range:
+            p_mgr = _scan_range(scan_args.commit_range)
+        else:
+            p_mgr = _scan_commit(diff_only)
+    except (utils.ConfigError, utils.ProfileNotFound, ValueError) as e:
+        LOG.error(e)
+        sys.exit(2)
+
+    # #################### Output and exit ####################################
+    sev_level = constants.RANKING[scan_args.severity - 1]
+    conf_level = constants.RANKING[scan_args.confidence - 1]
+
+    if output_format == default_output_format:
+        output = _ReportBuffer()
+        p_mgr.output_results(scan_args.context_lines, sev_level, conf_level,
+                             output, 'txt')
+        print(output.getvalue())
+    else:
+        with open(report_fname, 'w') as report_file:
+            p_mgr.output_results(scan_args.context_lines, sev_level,
+                                 conf_level, report_file, output_format)
+        LOG.info("Successfully wrote %s", report_fname)
+
+    # exit with 1 if there are new findings, the same as a Panther run would
+    if p_mgr.results_count(sev_filter=sev_level, conf_filter=conf_level) > 0:
+        sys.exit(1)
+    sys.exit(0)
+
+
+class _ReportBuffer(io.StringIO):
+    '''Collects a terminal report, which formatters close when done'''
+
+    name = '<stdout>'
+
+    def close(self):
+        pass
+
+
+# #################### Scan a single commit ##################################
+def _scan_commit(diff_only):
+    '''Scan the files changed by the tested commit
+
+    :param diff_only: Whether to skip the comparison to the parent commit
+    :return: The PantherManager holding the results
+    '''
+    global commit_sha
+
     # #################### Find current and parent commits ####################
     try:
-        saved_commit_sha = repo.commit().hexsha
         commit = repo.commit(commit_sha)
         commit_sha = commit.hexsha
         LOG.info('Got current commit: [%s]', commit.name_rev)
 
         parent_commit = commit.parents[0]
-        parent_commit_sha = parent_commit.hexsha
         LOG.info('Got parent commit: [%s]', parent_commit.name_rev)
 
     except git.BadName:
@@ -70,65 +124,277 @@ def main():
         LOG.error("Parent commit not available")
         sys.exit(2)
 
-    # ################### Run Panther against both commits ###################
-    output_type = (['-f', 'txt'] if output_format == default_output_format
-                   else ['-o', report_fname])
+    # #################### Collect the changed blobs ##########################
+    current_blobs, parent_blobs, _ = _get_changed_blobs(parent_commit, commit)
+    if diff_only and not current_blobs:
+        LOG.info("No changes since last commit. Exiting...")
+        sys.exit(2)
 
+    # ################### Run Panther against both commits ###################
     if diff_only:
-        repo.head.reset(commit=commit_sha, working_tree=True)
-        changed_files = list(commit.stats.files.keys())
-        if not changed_files:
-            LOG.info("No changes since last commit. Exiting...")
-            sys.exit(2)
-
-        LOG.info("Running analysis on the following files: \n%s", '\n'.join(changed_files))
-        panther_args = _remove_recursive_from_args()
-
-        panther_command = ['panther'] + changed_files + panther_args + output_type
-        output, return_code = _run_command(panther_command)
-    else:
-        with baseline_setup() as t:
+        LOG.info('Running analysis on the changed files of %s', commit_sha)
+        return _scan_blobs(current_blobs)
 
-            panther_tmpfile = "{}/{}".format(t, baseline_tmp_file)
+    LOG.info('Getting Panther baseline results')
+    baseline_mgr = _scan_blobs(parent_blobs, cache_lines=False)
 
-            steps = [{'message': 'Getting Panther baseline results',
-                      'commit_sha': parent_commit_sha,
-                      'args': panther_args + ['-f', 'json', '-o', panther_tmpfile]},
+    LOG.info('Comparing Panther results to baseline')
+    p_mgr = _scan_blobs(current_blobs)
+    p_mgr.baseline = baseline_mgr.results
+    return p_mgr
 
-                     {'message': 'Comparing Panther results to baseline',
-                      'commit_sha': commit_sha,
-                      'args': panther_args + ['-b', panther_tmpfile] + output_type}]
 
-            return_code = None
-
-            for step in steps:
-                repo.head.reset(commit=step['commit_sha'], working_tree=True)
-                LOG.info(step['message'])
-
-                panther_command = ['panther'] + step['args']
-                output, return_code = _run_command(panther_command)
-    repo.head.reset(commit=saved_commit_sha, working_tree=True)
-
-    # #################### Output and exit ####################################
-    # print output or display message about written report
-    if output_format == default_output_format:
-        print(output)
-    else:
-        LOG.info("Successfully wrote %s", report_fname)
+# #################### Scan a range of commits ###############################
+def _scan_range(commit_range):
+    '''Scan a range of commits one after the other
 
-    # exit with the code the last Panther run returned
-    sys.exit(return_code)
+    Each commit only has the files it changed scanned. The findings of every
+    other file are carried forward from the commit that last changed it, so
+    the work done is proportional to the changes in the range rather than to
+    the number of commits times the size of the tree. A file is compared to
+    its version before the range when the range first touches it.
 
+    :param commit_range: The git revision range, as in A..B
+    :return: The PantherManager holding the findings introduced in the
+             range, each with the commit that introduced it
+    '''
+    try:
+        commits = list(repo.iter_commits(commit_range, first_parent=True,
+                                         reverse=True))
+    except git.GitCommandError:
+        LOG.error("Unable to get commit range %s", commit_range)
+        sys.exit(2)
 
-# #################### Clean up before exit ###################################
-@contextlib.contextmanager
-def baseline_setup():
-    d = tempfile.mkdtemp()
-    yield d
-    shutil.rmtree(d, True)
+    if not commits:
+        LOG.info("No commits in range %s. Exiting...", commit_range)
+        sys.exit(2)
 
-    if repo:
-        repo.head.reset(commit=commit_sha, working_tree=True)
+    LOG.info('Scanning %d commits in range %s', len(commits), commit_range)
+
+    # path -> _FileState of the path at the last commit processed
+    states = {}
+
+    for commit in commits:
+        parent_commit = commit.parents[0] if commit.parents else None
+        current_blobs, parent_blobs, moved = _get_changed_blobs(
+            parent_commit, commit)
+        LOG.debug('Commit %s changed %d files', commit.hexsha,
+                  len(current_blobs))
+
+        for old_path, new_path in moved.items():
+            state = states.pop(old_path, None)
+            if state is not None and new_path is not None:
+                state.rename(new_path)
+                states[new_path] = state
+
+        # files the range has not touched before are compared to their
+        # version in the parent commit
+        first_seen = dict((path, blob) for path, blob in parent_blobs.items()
+                          if path not in states)
+        if first_seen:
+            baseline_mgr = _scan_blobs(first_seen, cache_lines=False)
+            for path, state in _FileState.from_manager(baseline_mgr).items():
+                states[path] = state
+
+        p_mgr = _scan_blobs(current_blobs)
+        for path, state in _FileState.from_manager(p_mgr, commit).items():
+            state.inherit(states.get(path))
+            states[path] = state
+
+        skipped = dict(p_mgr.get_skipped())
+        for path in set(current_blobs) - set(p_mgr.files_list):
+            previous = states.pop(path, None)
+            if path in skipped:
+                # keep the findings of the last version that could be
+                # scanned, so they keep their origin when the file is fixed
+                issues = previous.issues if previous else []
+                states[path] = _FileState(path, issues=issues,
+                                          skipped=skipped[path])
+
+    return _FileState.to_manager(p_mgr, states)
+
+
+class _FileState(object):
+    '''Findings of a file at some commit of a range
+
+    Each issue is paired with the commit that introduced it, or None when it
+    predates the range.
+    '''
+
+    def __init__(self, path, issues=None, score=None, file_metrics=None,
+                 skipped=None):
+        self.path = path
+        self.issues = issues or []
+        self.score = score
+        self.file_metrics = file_metrics
+        self.skipped = skipped
+
+    @classmethod
+    def from_manager(cls, p_mgr, commit=None):
+        '''Split the results of a scan into per file states
+
+        :param p_mgr: The PantherManager that ran the scan
+        :param commit: The commit to attribute the issues to
+        :return: Dict mapping paths to their states
+        '''
+        states = {}
+        for path, score in zip(p_mgr.files_list, p_mgr.scores):
+            # a copy, as the metrics of the scan are read from its columns
+            file_metrics = p_mgr.metrics.data.get(path)
+            states[path] = cls(path, score=score,
+                               file_metrics=(dict(file_metrics)
+                                             if file_metrics is not None
+                                             else None))
+        for result in p_mgr.results:
+            states[result.fname].issues.append((result, commit))
+        return states
+
+    @staticmethod
+    def _key(result):
+        return (result.text, result.severity, result.confidence, result.test,
+                result.test_id)
+
+    def inherit(self, previous):
+        '''Keep the origin of the issues that were already there before
+
+        :param previous: The state of the file before the commit, or None
+        '''
+        if previous is None:
+            return
+
+        origins = collections.defaultdict(list)
+        for result, origin in previous.issues:
+            origins[self._key(result)].append(origin)
+
+        issues = []
+        for result, origin in self.issues:
+            known = origins.get(self._key(result))
+            issues.append((result, known.pop(0) if known else origin))
+        self.issues = issues
+
+    def rename(self, path):
+        self.path = path
+        for result, _ in self.issues:
+            result.fname = path
+
+    @staticmethod
+    def to_manager(p_mgr, states):
+        '''Collect the findings introduced in the range into a manager
+
+        :param p_mgr: The PantherManager of the last scan, to reuse the
+                      settings of
+        :param states: Dict mapping paths to their states
+        :return: The PantherManager holding the findings
+        '''
+        report_mgr = p_manager.PantherManager(p_mgr.p_conf, p_mgr.agg_type,
+                                              ignore_nosec=p_mgr.ignore_nosec)
+        for path in sorted(states):
+            state = states[path]
+            if state.skipped:
+                report_mgr.skipped.append((path, state.skipped))
+                continue
+            report_mgr.files_list.append(path)
+            report_mgr.scores.append(state.score)
+            report_mgr.metrics.restore(path, state.file_metrics or {})
+            for result, origin in state.issues:
+                if origin is not None:
+                    result.introduced_by = origin.hexsha
+                    report_mgr.results.append(result)
+        report_mgr.metrics.aggregate()
+        return report_mgr
+
+
+# #################### Read changed files from the object store ###############
+def _get_changed_blobs(parent_commit, commit):
+    '''Get the blobs of the files that differ between two commits
+
+    Deleted files are dropped, since they cannot hold new findings. The
+    parent version of a renamed file is keyed by its new path, so findings
+    that merely moved along with the file still match the baseline.
+
+    :param parent_commit: The commit to compare against, None for a root
+                          commit
+    :param commit: The commit being tested
+    :return: Tuple of dicts mapping paths to the current and parent blobs,
+             and the paths that were renamed or deleted to their new path
+             or None
+    '''
+    current_blobs = {}
+    parent_blobs = {}
+    moved = {}
+
+    if parent_commit is None:
+        for item in commit.tree.traverse():
+            if item.type == 'blob' and _is_regular_file(item):
+                current_blobs[item.path] = item
+        return current_blobs, parent_blobs, moved
+
+    for diff in parent_commit.diff(commit):
+        if diff.deleted_file:
+            moved[diff.a_path] = None
+        elif diff.a_path != diff.b_path:
+            moved[diff.a_path] = diff.b_path
+
+        if diff.b_blob is None or not _is_regular_file(diff.b_blob):
+            continue
+        current_blobs[diff.b_path] = diff.b_blob
+
+        if diff.a_blob is not None and _is_regular_file(diff.a_blob):
+            parent_blobs[diff.b_path] = diff.a_blob
+
+    return current_blobs, parent_blobs, moved
+
+
+def _is_regular_file(blob):
+    # skips symlinks and submodules, which have no content to scan
+    return stat.S_ISREG(blob.mode)
+
+
+# #################### Run Panther in-process ##################################
+def _scan_blobs(blobs, cache_lines=True):
+    '''Run Panther on blob contents
+
+    :param blobs: Dict mapping relative paths to the blobs to scan
+    :param cache_lines: Whether to serve report code snippets from the blobs
+    :return: The PantherManager holding the results
+    '''
+    p_conf = p_config.PantherConfig(config_file=scan_args.config_file)
+
+    profile = p_main._get_profile(p_conf, scan_args.profile,
+                                  scan_args.config_file)
+    profile['include'].update(
+        scan_args.tests.split(',') if scan_args.tests else [])
+    profile['exclude'].update(
+        scan_args.skips.split(',') if scan_args.skips else [])
+    extension_loader.MANAGER.validate_profile(profile)
+
+    cache_dir = None if scan_args.no_cache else scan_args.cache_dir
+    p_mgr = p_manager.PantherManager(p_conf, 'file', profile=profile,
+                                     ignore_nosec=scan_args.ignore_nosec,
+                                     cache_dir=cache_dir)
+    p_mgr.select_files(sorted(blobs), scan_args.targets,
+                       scan_args.recursive, scan_args.excluded_paths)
+
+    contents = dict((path, blobs[path].data_stream.read())
+                    for path in p_mgr.files_list)
+    if cache_lines:
+        # code snippets in the report come from the scanned commit, not
+        # from whatever is checked out
+        for path, data in contents.items():
+            _cache_lines(path, data)
+
+    p_mgr.run_tests(reader=lambda fname: io.TextIOWrapper(
+        io.BytesIO(contents[fname]), encoding='utf-8'))
+    return p_mgr
+
+
+def _cache_lines(fname, data):
+    lines = data.decode('utf-8', 'replace').splitlines(True)
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    # a modification time of None keeps linecache.checkcache from dropping
+    # the entry in favour of the file on disk
+    linecache.cache[fname] = (len(data), None, lines, fname)
 
 
 # #################### Setup logging ##########################################
@@ -145,15 +411,15 @@ def init_logger():
 
 # #################### Perform initialization and validate assumptions ########
 def initialize():
+    global scan_args
+
     valid = True
 
     # #################### Parse Args #########################################
     parser = argparse.ArgumentParser(
         description='Panther Baseline - Generates Panther results compared to '
                     'a baseline',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog='Additional Panther arguments such as severity filtering (-ll) '
-               'can be added and will be passed to Panther.'
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
     parser.add_argument(
@@ -178,7 +444,76 @@ def initialize():
         help='run analysis on changed files only'
     )
 
+    parser.add_argument(
+        '--range', dest='commit_range', action='store', default=None,
+        metavar='A..B',
+        help='report the findings introduced by each commit of a range'
+    )
+
+    parser.add_argument(
+        '-r', '--recursive', dest='recursive',
+        action='store_true', help='find and process files in subdirectories'
+    )
+    parser.add_argument(
+        '-n', '--number', dest='context_lines',
+        action='store', default=3, type=int,
+        help='maximum number of code lines to output for each issue'
+    )
+    parser.add_argument(
+        '-c', '--configfile', dest='config_file',
+        action='store', default=None, type=str,
+        help='optional config file to use for selecting plugins and '
+             'overriding defaults'
+    )
+    parser.add_argument(
+        '-p', '--profile', dest='profile',
+        action='store', default=None, type=str,
+        help='profile to use (defaults to executing all tests)'
+    )
+    parser.add_argument(
+        '-t', '--tests', dest='tests',
+        action='store', default=None, type=str,
+        help='comma-separated list of test IDs to run'
+    )
+    parser.add_argument(
+        '-s', '--skip', dest='skips',
+        action='store', default=None, type=str,
+        help='comma-separated list of test IDs to skip'
+    )
+    parser.add_argument(
+        '-l', '--level', dest='severity', action='count',
+        default=1, help='report only issues of a given severity level or '
+                        'higher (-l for LOW, -ll for MEDIUM, -lll for HIGH)'
+    )
+    parser.add_argument(
+        '-i', '--confidence', dest='confidence', action='count',
+        default=1, help='report only issues of a given confidence level or '
+                        'higher (-i for LOW, -ii for MEDIUM, '
+                        '-iii for HIGH)'
+    )
+    parser.add_argument(
+        '--ignore-nosec', dest='ignore_nosec', action='store_true',
+        help='do not skip lines with // nosec comments'
+    )
+    parser.add_argument(
+        '-x', '--exclude', dest='excluded_paths', action='store',
+        default='', help='comma-separated list of paths to exclude from scan '
+                         '(note that these are in addition to the excluded '
+                         'paths provided in the config file)'
+    )
+    parser.add_argument(
+        '--cache-dir', dest='cache_dir', action='store',
+        default=result_cache.default_cache_dir(),
+        help='directory to cache per file results in (defaults to '
+             '$XDG_CACHE_HOME/panther)'
+    )
+    parser.add_argument(
+        '--no-cache', dest='no_cache', action='store_true',
+        help='do not read or write cached results'
+    )
+
     args, unknown = parser.parse_known_args()
+    scan_args = args
     # #################### Setup Output #######################################
     # set the output format, or use a default if not provided
     output_format = (args.output_format if args.output_format
@@ -193,10 +528,6 @@ def initialize():
     # #################### Handle Commit #######################################
     commit_sha = args.commit_sha
 
-    if commit_sha:
-        c_idx = panther_args.index(commit_sha)
-        panther_args[c_idx - 1:c_idx + 1] = []
-
     # #################### Check Requirements #################################
     try:
         repo = git.Repo(os.getcwd())
@@ -209,34 +540,31 @@ def initialize():
         LOG.error("Git command not found")
         valid = False
 
-    else:
-        if repo.is_dirty():
-            LOG.error("Current working directory is dirty and must be "
-                      "resolved")
-            valid = False
+    # the working tree is never scanned nor checked out, so it may be dirty
 
     # if output format is specified, we need to be able to write the report
     if output_format != default_output_format and os.path.exists(report_fname):
         LOG.error("File %s already exists, aborting", report_fname)
         valid = False
 
-    # Panther needs to be able to create this temp file
-    if os.path.exists(baseline_tmp_file):
-        LOG.error("Temporary file %s needs to be removed prior to running",
-                  baseline_tmp_file)
-        valid = False
-
     # #################### Scan Mode #######################################
     diff_only = args.diff_only
 
-    if diff_only:
-        panther_args.remove('--diff-only')
+    if args.commit_range and (commit_sha or diff_only):
+        LOG.error("--range can't be combined with --commit or --diff-only")
+        valid = False
 
     # we must validate -o is not provided, as it will mess up Panther baseline
     if '-o' in panther_args:
         LOG.error("Panther baseline must not be called with the -o option")
         valid = False
 
+    # panther runs in-process, so options it would take that are not
+    # options of panther-baseline can not be passed on to it
+    if unknown:
+        LOG.error("Unsupported arguments: %s", ' '.join(unknown))
+        valid = False
+
     return (
         output_format,
         repo,
@@ -246,35 +574,5 @@ def initialize():
     ) if valid else (None, None, None, None, None)
 
 
-# #################### Run the panther cli commands ########
-def _run_command(cmd):
-    try:
-        output = subprocess.check_output(cmd)
-    except subprocess.CalledProcessError as e:
-        output = e.output
-        if isinstance(output, bytes):
-            output = output.decode('utf-8')
-        return_code = e.returncode
-    else:
-        return_code = 0
-        output = output.decode('utf-8')  # subprocess returns bytes
-
-    if return_code not in [0, 1]:
-        LOG.error("Error running command: %s\nOutput: %s\n",
-                  panther_args, output)
-    return output, return_code
-
-
-# #################### Removes the recursive flag for the --diff-only mode ########
-def _remove_recursive_from_args():
-    if '-r' in panther_args:
-        index = panther_args.index('-r')
-    if '--recursive' in panther_args:
-        index = panther_args.index('--recursive')
-    if index is not None:
-        panther_args[index:index + 2] = []
-    return panther_args
-
-
 if __name__ == '__main__':
     main()
@@ -7,12 +7,17 @@ import os
 import sys
 import textwrap
 
+import git
 
 import panther
 from panther.core import config as p_config
 from panther.core import constants
 from panther.core import manager as p_manager
+from panther.core import minified
 from panther.core import nsp_manager as n_manager
+from panther.core import profiling
+from panther.core import result_cache
+from panther.core import sharding
 from panther.core import utils
 
 
@@ -113,6 +118,30 @@ def _get_profile(config, profile_name, config_path):
     return profile
 
 
+def _get_changed_files(ref):
+    '''Return the real paths of the files that changed since a revision
+
+    This covers committed, staged and unstaged changes as well as untracked
+    files of the git repository containing the working directory.
+    '''
+    try:
+        repo = git.Repo(os.getcwd(), search_parent_directories=True)
+    except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
+        LOG.error("--changed-since must be used within a git repository")
+        sys.exit(2)
+
+    try:
+        commit = repo.commit(ref)
+    except (git.BadName, ValueError):
+        LOG.error("Unable to get revision %s", ref)
+        sys.exit(2)
+
+    paths = set(diff.b_path for diff in commit.diff(None))
+    paths.update(repo.untracked_files)
+    return set(os.path.realpath(os.path.join(repo.working_tree_dir, path))
+               for path in paths)
+
+
 def _log_info(args, profile):
     inc = ",".join([t for t in profile['include']]) or "None"
     exc = ",".join([t for t in profile['exclude']]) or "None"
@@ -233,6 +262,65 @@ def main():
         '--ini', dest='ini_path', action='store', default=None,
         help='path to a .panther file that supplies command line arguments'
     )
+    parser.add_argument(
+        '--changed-since', dest='changed_since', action='store',
+        default=None, metavar='REF',
+        help='only scan files that changed since the given git revision'
+    )
+    parser.add_argument(
+        '--cache-dir', dest='cache_dir', action='store', default=None,
+        help='directory to cache per file results in (defaults to '
+             '$XDG_CACHE_HOME/panther with --changed-since)'
+    )
+    parser.add_argument(
+        '--no-cache', dest='no_cache', action='store_true',
+        help='do not read or write cached results'
+    )
+    parser.add_argument(
+        '--timings', dest='timings', action='store_true',
+        help='record the time spent in each phase of the scan and in each '
+             'test, and add it to the report metrics'
+    )
+    parser.add_argument(
+        '--top-slow', dest='top_slow', action='store', default=0, type=int,
+        metavar='N',
+        help='list the N files that took the longest to parse and analyse, '
+             'with a histogram of the cost of all files'
+    )
+    parser.add_argument(
+        '--profile-out', dest='profile_out', action='store', default=None,
+        metavar='DIR',
+        help='profile the scan with cProfile, writing the stats of each '
+             'process and a summary by subsystem to DIR'
+    )
+    parser.add_argument(
+        '--fail-fast', dest='fail_fast', action='store_true',
+        help='stop scanning at the first file with an issue that would fail '
+             'the run, that is at or above the -l and -i levels and not in '
+             'the baseline'
+    )
+    parser.add_argument(
+        '--time-budget', dest='time_budget', action='store', default=None,
+        type=float, metavar='SECONDS',
+        help='stop scanning after SECONDS, scanning recently modified files '
+             'first, then files with findings in the baseline, then smaller '
+             'files, and list the files that were not scanned'
+    )
+    parser.add_argument(
+        '--shard', dest='shard', action='store', default=None,
+        metavar='I/N',
+        help='only scan the I-th of N shards of the files, split by size so '
+             'the shards take about as long; combine the JSON reports of '
+             'the shards with panther-merge'
+    )
+    parser.add_argument(
+        '--minified', dest='minified', action='store', default=None,
+        choices=minified.MODES,
+        help='how to analyse minified and generated files, such as bundles: '
+             'scan them like other files, skip them, or only search them for '
+             'keywords (default: the minified option of the config file, or '
+             'scan)'
+    )
     parser.add_argument(
         '--version', action='version',
         version='%(prog)s {version}'.format(version=panther.__version__)
@@ -241,6 +329,17 @@ def main():
         '--nsp', dest='nsp', action='store_true',
         help='scan the package.json to find vulnerable dependencies'
     )
+    parser.add_argument(
+        '--advisory-db', dest='advisory_db', action='store', default=None,
+        help='match the packages of package-lock.json or yarn.lock against '
+             'this local advisory database instead of using nsp'
+    )
+    parser.add_argument(
+        '--audit-timeout', dest='audit_timeout', action='store',
+        default=constants.AUDIT_TIMEOUT, type=float,
+        help='seconds to wait for the dependency audit (default: '
+             '%(default)s)'
+    )
     parser.set_defaults(debug=False)
     parser.set_defaults(verbose=False)
     parser.set_defaults(ignore_nosec=False)
@@ -284,6 +383,16 @@ def main():
     # Check if `--msg-template` is not present without custom formatter
     if args.output_format != 'custom' and args.msg_template is not None:
         parser.error("--msg-template can only be used with --format=custom")
+    if args.top_slow < 0:
+        parser.error("--top-slow must not be negative")
+    if args.time_budget is not None and args.time_budget < 0:
+        parser.error("--time-budget must not be negative")
+    shard = None
+    if args.shard:
+        try:
+            shard = sharding.parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
 
     try:
         p_conf = p_config.PantherConfig(config_file=args.config_file)
@@ -331,9 +440,24 @@ def main():
         LOG.error(e)
         sys.exit(2)
 
+    cache_dir = args.cache_dir
+    if args.changed_since and not cache_dir:
+        cache_dir = result_cache.default_cache_dir()
+    if args.no_cache:
+        cache_dir = None
+
+    sev_level = constants.RANKING[args.severity - 1]
+    conf_level = constants.RANKING[args.confidence - 1]
     p_mgr = p_manager.PantherManager(p_conf, args.agg_type, args.debug,
                                      profile=profile, verbose=args.verbose,
-                                     ignore_nosec=args.ignore_nosec)
+                                     ignore_nosec=args.ignore_nosec,
+                                     cache_dir=cache_dir,
+                                     timings=args.timings,
+                                     top_slow=args.top_slow,
+                                     fail_fast=((sev_level, conf_level)
+                                                if args.fail_fast else None),
+                                     time_budget=args.time_budget,
+                                     minified=args.minified)
 
     if args.baseline is not None:
         try:
@@ -356,26 +480,67 @@ def main():
         LOG.info("running on Python %d.%d.%d", sys.version_info.major,
                  sys.version_info.minor, sys.version_info.micro)
 
+    advisory_db = None
+    if args.advisory_db:
+        try:
+            advisory_db = n_manager.AdvisoryDatabase.load(args.advisory_db)
+        except (IOError, ValueError) as e:
+            LOG.error("Unable to load advisory database %s: %s",
+                      args.advisory_db, e)
+            sys.exit(2)
+
+    # start the dependency audit now, so it runs while the files are scanned
+    audit = None
+    if advisory_db:
+        audit = n_manager.DependencyAudit(
+            n_manager.OfflineNspManager(advisory_db=advisory_db),
+            timeout=args.audit_timeout)
+    elif args.nsp:
+        audit = n_manager.DependencyAudit(n_manager.NspManager(),
+                                          timeout=args.audit_timeout)
+    if audit:
+        audit.start()
+
     # initiate file discovery step within Panther Manager
     p_mgr.discover_files(args.targets, args.recursive, args.excluded_paths)
 
+    if args.changed_since:
+        changed_files = _get_changed_files(args.changed_since)
+        p_mgr.files_list = [f for f in p_mgr.files_list
+                            if os.path.realpath(f) in changed_files]
+        LOG.info("%d files changed since %s", len(p_mgr.files_list),
+                 args.changed_since)
+
+    if shard:
+        p_mgr.files_list = sharding.shard_files(p_mgr.files_list, *shard)
+        LOG.info("%d files in shard %d/%d", len(p_mgr.files_list), *shard)
+
     if not p_mgr.p_ts.tests:
         LOG.error('No tests would be run, please check the profile.')
         sys.exit(2)
 
+    profiler = None
+    if args.profile_out:
+        profiler = profiling.ScanProfiler(args.profile_out)
+        try:
+            profiler.start()
+        except OSError as e:
+            LOG.error("Unable to profile to %s: %s", args.profile_out, e)
+            sys.exit(2)
+
     # initiate execution of tests within Panther Manager
     p_mgr.run_tests()
+    if p_mgr.result_cache:
+        LOG.debug("result cache: %d hits, %d misses",
+                  p_mgr.result_cache.hits, p_mgr.result_cache.misses)
     LOG.debug(p_mgr.p_ma)
     LOG.debug(p_mgr.metrics)
 
-    # initiate execution of tests within Nsp Manager
-    if args.nsp:
-        nsp_mgr = n_manager.NspManager(results=p_mgr.results)
-        nsp_mgr.update_issues()
+    # collect the issues of the dependency audit
+    if audit:
+        audit.merge(p_mgr)
 
     # trigger output of results by Panther Manager
-    sev_level = constants.RANKING[args.severity - 1]
-    conf_level = constants.RANKING[args.confidence - 1]
     p_mgr.output_results(args.context_lines,
                          sev_level,
                          conf_level,
@@ -383,6 +548,9 @@ def main():
                          args.output_format,
                          args.msg_template)
 
+    if profiler:
+        LOG.info("profile summary written to %s", profiler.stop())
+
     # return an exit code of 1 if there are results, 0 otherwise
     if p_mgr.results_count(sev_filter=sev_level, conf_filter=conf_level) > 0:
         sys.exit(1)
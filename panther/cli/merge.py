@@ -0,0 +1,140 @@
+# -*- coding:utf-8 -*-
+
+# #############################################################################
+# Panther Merge combines the JSON reports of the shards of a scan, run with
+# panther --shard I/N on several machines, into a single report in any
+# format, as if the files had all been scanned by one panther run.
+# #############################################################################
+
+import argparse
+import json
+import logging
+import sys
+
+from panther.core import config as p_config
+from panther.core import constants
+from panther.core import extension_loader
+from panther.core import issue
+from panther.core import manager as p_manager
+from panther.core import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+def init_logger():
+    LOG.handlers = []
+    log_level = logging.INFO
+    log_format_string = "[%(levelname)5s]: %(message)s"
+    logging.captureWarnings(True)
+    LOG.setLevel(log_level)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(log_format_string))
+    LOG.addHandler(handler)
+
+
+def parse_args():
+    formatters = extension_loader.MANAGER.formatter_names
+    parser = argparse.ArgumentParser(
+        description='Panther Merge - combines the JSON reports of the shards '
+                    'of a scan into one report')
+    parser.add_argument(
+        'reports', metavar='reports', type=str, nargs='+',
+        help='JSON reports to combine'
+    )
+    parser.add_argument(
+        '-a', '--aggregate', dest='agg_type',
+        action='store', default='file', type=str,
+        choices=['file', 'vuln'],
+        help='aggregate output by vulnerability (default) or by filename'
+    )
+    parser.add_argument(
+        '-n', '--number', dest='context_lines',
+        action='store', default=3, type=int,
+        help='maximum number of code lines to output for each issue'
+    )
+    parser.add_argument(
+        '-l', '--level', dest='severity', action='count',
+        default=1, help='report only issues of a given severity level or '
+                        'higher (-l for LOW, -ll for MEDIUM, -lll for HIGH)'
+    )
+    parser.add_argument(
+        '-i', '--confidence', dest='confidence', action='count',
+        default=1, help='report only issues of a given confidence level or '
+                        'higher (-i for LOW, -ii for MEDIUM, -iii for HIGH)'
+    )
+    parser.add_argument(
+        '-f', '--format', dest='output_format', action='store',
+        default='json', help='specify output format (default: json)',
+        choices=sorted(formatters)
+    )
+    parser.add_argument(
+        '-o', '--output', dest='output_file', action='store', nargs='?',
+        type=argparse.FileType('w'), default=sys.stdout,
+        help='write report to filename'
+    )
+    return parser.parse_args()
+
+
+def merge_reports(p_mgr, reports):
+    '''Add the results, errors and metrics of JSON reports to a manager
+
+    :param p_mgr: The PantherManager to merge the reports into
+    :param reports: The contents of the reports, as parsed from JSON
+    '''
+    for report in reports:
+        p_mgr.results.extend(issue.issue_from_dict(result)
+                             for result in report.get('results', []))
+        p_mgr.skipped.extend((error['filename'], error['reason'])
+                             for error in report.get('errors', []))
+        p_mgr.metrics.merge(report.get('metrics', {}))
+
+    # the files scanned are those with metrics that were not skipped
+    skipped = set(fname for fname, _ in p_mgr.skipped)
+    p_mgr.files_list = sorted(fname for fname in p_mgr.metrics.data
+                              if fname not in metrics.REPORT_BLOCKS and
+                              fname not in skipped)
+    p_mgr.scores = [_score(p_mgr.metrics.data[fname])
+                    for fname in p_mgr.files_list]
+    p_mgr.metrics.aggregate()
+
+
+def _score(file_metrics):
+    # the issue counts of a file scaled back to the score of the file
+    score = {}
+    for (criteria, _) in constants.CRITERIA:
+        score[criteria] = [0] * len(constants.RANKING)
+    for (criteria, i, value, label) in metrics.ISSUE_COLUMNS:
+        score[criteria][i] = int(file_metrics.get(label, 0) * value)
+    return score
+
+
+def main():
+    init_logger()
+    args = parse_args()
+
+    reports = []
+    for path in args.reports:
+        try:
+            with open(path) as report_file:
+                reports.append(json.load(report_file))
+        except (IOError, ValueError) as e:
+            LOG.error("Unable to read report %s: %s", path, e)
+            sys.exit(2)
+
+    p_mgr = p_manager.PantherManager(p_config.PantherConfig(), args.agg_type)
+    merge_reports(p_mgr, reports)
+
+    sev_level = constants.RANKING[args.severity - 1]
+    conf_level = constants.RANKING[args.confidence - 1]
+    p_mgr.output_results(args.context_lines, sev_level, conf_level,
+                         args.output_file, args.output_format)
+
+    # return an exit code of 1 if there are results, 0 otherwise
+    if p_mgr.results_count(sev_filter=sev_level, conf_filter=conf_level) > 0:
+        sys.exit(1)
+    else:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,16 @@ NSP_TEST_ID = 'NSP'
 # default progress increment
 progress_increment = 50
 
+# seconds to wait for the dependency audit once the source scan is done
+AUDIT_TIMEOUT = 300
+
+# files modified within this many seconds are scanned first when the scan
+# has a time budget
+RECENT_CHANGE_SECONDS = 24 * 60 * 60
+
+# maximum number of AST nodes the tracer keeps in its program cache
+TRACER_CACHE_MAX_NODES = 500000
+
 RANKING = ['UNDEFINED', 'LOW', 'MEDIUM', 'HIGH']
 RANKING_VALUES = {'UNDEFINED': 1, 'LOW': 3, 'MEDIUM': 5, 'HIGH': 10}
 CRITERIA = [('SEVERITY', 'UNDEFINED'), ('CONFIDENCE', 'UNDEFINED')]
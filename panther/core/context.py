@@ -1,5 +1,34 @@
 # -*- coding:utf-8 -*-
 
+import functools
+
+from panther.core import folding
+from panther.core import scope as p_scope
+from panther.core import symbol_index as p_symbol_index
+from panther.core import utils
+from panther.core.visitor import CallExpression
+from panther.core.visitor import NewExpression
+from panther.core.visitor import ObjectExpression
+
+
+def memoized_property(func):
+    '''Property computed once per node.
+
+    The value is kept in the memo of the raw context, which the node visitor
+    shares between all the tests it runs on the same node.
+    '''
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self):
+        memo = self._context.get('memo')
+        if memo is None:
+            memo = self._context['memo'] = {}
+        if name not in memo:
+            memo[name] = func(self)
+        return memo[name]
+    return property(wrapper)
+
 
 class Context(object):
     def __init__(self, context_object=None):
@@ -33,3 +62,89 @@ class Context(object):
             return self._context['node']
         else:
             return None
+
+    def _file_analysis(self, name, build):
+        '''Get an analysis of the file, made the first time it is asked for
+
+        The node visitor shares one dict of analyses between all the nodes
+        of a file, holding the root of the file, so no analysis is made for
+        a file no test asks it of.
+        '''
+        if name in self._context:
+            return self._context[name]
+        analyses = self._context.get('analyses')
+        if analyses is None:
+            return None
+        if name not in analyses:
+            analyses[name] = build(analyses['root'])
+        return analyses[name]
+
+    @property
+    def symbol_index(self):
+        '''Get the index of the names referenced in the file's subtrees
+
+        :return: The SymbolIndex of the file being scanned, or None
+        '''
+        return self._file_analysis('symbol_index', p_symbol_index.SymbolIndex)
+
+    @property
+    def scope(self):
+        '''Get the scope analysis of the file being scanned
+
+        It is computed the first time it is queried, and then resolves
+        identifiers to their bindings, like constant strings, in O(1).
+
+        :return: The ScopeAnalysis of the file being scanned, or None
+        '''
+        return self._file_analysis('scope', p_scope.ScopeAnalysis)
+
+    @property
+    def folder(self):
+        '''Get the string folder of the file being scanned
+
+        It folds string expressions into the strings they evaluate to, and
+        keeps the value of every expression it folds for the whole file.
+
+        :return: The StringFolder of the file being scanned, or None
+        '''
+        return self._file_analysis(
+            'folder', lambda root: folding.StringFolder(self.scope))
+
+    @memoized_property
+    def call_name_space(self):
+        '''Get the name space of the callee of a call or new expression node
+
+        :return: A tuple such as ('*db', '*collection', '*find'), or None if
+                 the node is not a call or new expression
+        '''
+        node = self.node
+        if isinstance(node, (CallExpression, NewExpression)):
+            return utils.get_name_space(node)
+        return None
+
+    @memoized_property
+    def object_arg_keys(self):
+        '''Get the keys of the single object literal argument of a call
+
+        :return: A frozenset of the key names, such as '*$where', or
+                 '?Identifier' for a computed key; empty unless the node is a
+                 call or new expression with one object literal argument
+        '''
+        node = self.node
+        if (isinstance(node, (CallExpression, NewExpression)) and
+                len(node.arguments) == 1 and
+                isinstance(node.arguments[0], ObjectExpression)):
+            return frozenset(utils.get_object_keys(node.arguments[0]))
+        return frozenset()
+
+    def callee_matches(self, trie):
+        '''Match the callee of a call or new expression node against patterns
+
+        :param trie: The NameSpaceTrie of the patterns
+        :return: A frozenset of the values of the matched patterns, empty if
+                 the node is not a call or new expression
+        '''
+        node = self.node
+        if isinstance(node, (CallExpression, NewExpression)):
+            return trie.match_node(node)
+        return frozenset()
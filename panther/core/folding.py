@@ -0,0 +1,137 @@
+# -*- coding:utf-8 -*-
+
+'''Constant folding of the string expressions of a file.'''
+
+from panther.core.visitor import ArrayExpression
+from panther.core.visitor import BinaryExpression
+from panther.core.visitor import CallExpression
+from panther.core.visitor import Identifier
+from panther.core.visitor import Literal
+from panther.core.visitor import MemberExpression
+from panther.core.visitor import TemplateElement
+from panther.core.visitor import TemplateLiteral
+
+
+class _Tainted(object):
+    '''The value of an expression that can not be folded to a string.'''
+
+    def __repr__(self):
+        return 'TAINTED'
+
+
+TAINTED = _Tainted()
+
+
+class StringFolder(object):
+    '''Folds the string expressions of a file into the strings they
+    evaluate to.
+
+    Folded expressions are string literals, template literals whose
+    expressions fold, (+) chains of folded operands, the concat method of a
+    folded string, the join method of an array literal of folded elements
+    and names bound to a folded expression that are never assigned again.
+    Any other expression folds to TAINTED, as its value is not known.
+
+    The value of every node is kept in a table for the file, so each
+    expression is folded once however many nodes contain it and however
+    many plugins ask for it.
+
+    :param scope: The ScopeAnalysis of the file, used to resolve names
+    '''
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._memo = {}
+
+    def fold(self, node):
+        '''Get the string an expression evaluates to
+
+        :param node: A node of the analysed tree
+        :return: The string, or TAINTED
+        '''
+        key = id(node)
+        value = self._memo.get(key)
+        if value is None:
+            # names bound to themselves, like var a = b, b = a, fold to
+            # TAINTED rather than recursing forever
+            self._memo[key] = TAINTED
+            value = self._memo[key] = self._fold(node)
+        return value
+
+    def _fold(self, node):
+        if isinstance(node, Literal):
+            if node.raw[:1] in ('"', "'"):
+                return node.value
+        elif isinstance(node, TemplateElement):
+            return node.value['cooked']
+        elif isinstance(node, TemplateLiteral):
+            return self._join(node.quasis, node.expressions)
+        elif isinstance(node, BinaryExpression):
+            if node.operator == '+':
+                return self._fold_plus(node)
+        elif isinstance(node, Identifier):
+            return self._fold_name(node)
+        elif isinstance(node, CallExpression):
+            return self._fold_call(node)
+        return TAINTED
+
+    def _join(self, quasis, expressions):
+        parts = [self.fold(quasis[0])]
+        for expression, quasi in zip(expressions, quasis[1:]):
+            parts.append(self.fold(expression))
+            parts.append(self.fold(quasi))
+        if any(part is TAINTED for part in parts):
+            return TAINTED
+        return ''.join(parts)
+
+    def _fold_plus(self, node):
+        # numbers are not folded, so every operand of a folded chain is a
+        # string and the chain can be flattened whatever its grouping
+        parts = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if (isinstance(current, BinaryExpression) and
+                    current.operator == '+'):
+                stack.append(current.right)
+                stack.append(current.left)
+                continue
+            part = self.fold(current)
+            if part is TAINTED:
+                return TAINTED
+            parts.append(part)
+        return ''.join(parts)
+
+    def _fold_name(self, node):
+        binding = self.scope.binding(node)
+        if binding is None or not binding.is_constant:
+            return TAINTED
+        return self.fold(binding.init)
+
+    def _fold_call(self, node):
+        callee = node.callee
+        if not isinstance(callee, MemberExpression) or callee.computed:
+            return TAINTED
+        method = callee.property.name
+        arguments = [self.fold(argument) for argument in node.arguments]
+        if any(argument is TAINTED for argument in arguments):
+            return TAINTED
+
+        if method == 'concat':
+            value = self.fold(callee.object)
+            if value is TAINTED:
+                return TAINTED
+            return value + ''.join(arguments)
+
+        if method == 'join' and isinstance(callee.object, ArrayExpression):
+            elements = []
+            for element in callee.object.elements:
+                # holes join as empty strings
+                value = '' if element is None else self.fold(element)
+                if value is TAINTED:
+                    return TAINTED
+                elements.append(value)
+            separator = arguments[0] if arguments else ','
+            return separator.join(elements)
+
+        return TAINTED
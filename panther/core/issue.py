@@ -24,6 +24,8 @@ class Issue(object):
         self.test_id = test_id
         self.lineno = lineno
         self.linerange = []
+        self.call_path = None
+        self.introduced_by = None
 
     def __str__(self):
         return ("Issue: '%s' from %s:%s: Severity: %s Confidence: "
@@ -93,6 +95,17 @@ class Issue(object):
                 lines.append(tmplt % (line, text))
             return ''.join(lines)
 
+    def get_call_path(self):
+        '''Gets the call path that led the tracer to this issue.
+
+        The call path is kept as the traced function objects and only
+        converted to dicts here, so it is formatted for reported issues only.
+
+        :return: list of dicts, one per function from entry point to sink
+        '''
+        return [f if isinstance(f, dict) else f.as_dict()
+                for f in self.call_path or []]
+
     def as_dict(self, with_code=True):
         '''Convert the issue to a dict of values for outputting.'''
         out = {
@@ -109,11 +122,15 @@ class Issue(object):
             out['code'] = self.get_code()
         if self.test_id == constants.NSP_TEST_ID:
             out['code'] = self.code
+        if self.call_path:
+            out['call_path'] = self.get_call_path()
+        if self.introduced_by:
+            out['introduced_by'] = self.introduced_by
 
         return out
 
     def from_dict(self, data, with_code=True):
-        self.code = data["code"]
+        self.code = data.get("code")
         self.fname = data["filename"]
         self.severity = data["issue_severity"]
         self.confidence = data["issue_confidence"]
@@ -122,6 +139,8 @@ class Issue(object):
         self.test_id = data["test_id"]
         self.lineno = data["line_number"]
         self.linerange = data["line_range"]
+        self.call_path = data.get("call_path")
+        self.introduced_by = data.get("introduced_by")
 
 
 def issue_from_dict(data):
@@ -0,0 +1,73 @@
+# -*- coding:utf-8 -*-
+
+'''A single pass over the lines of a file, counting its lines of code.'''
+
+import collections
+import re
+
+# Markers of the lines that are not to be scanned, in a comment
+NOSEC_MARKERS = ('//nosec', '// nosec')
+
+# Line terminators, as esprima counts them
+_NEWLINE = r'\r\n|[\n\r\u2028\u2029]'
+NEWLINE_RE = re.compile(_NEWLINE)
+
+# The start of a line up to its first comment: code and string literals,
+# closed or running to the end of the line
+_CODE_RE = re.compile(r'''
+    (?: [^'"`/]+
+      | '(?:[^'\\]|\\.)*'?
+      | "(?:[^"\\]|\\.)*"?
+      | `(?:[^`\\]|\\.)*`?
+      | /(?![/*])
+    )*
+''', re.VERBOSE)
+
+LineScan = collections.namedtuple('LineScan', ['loc', 'nosec_lines'])
+
+
+def split_lines(data):
+    '''Split a source into lines, at the line terminators esprima knows
+
+    :param data: The source text
+    :return: A list of the lines, without their terminators
+    '''
+    if '\r' in data or '\u2028' in data or '\u2029' in data:
+        return NEWLINE_RE.split(data)
+    return data.split('\n')
+
+
+def _has_nosec(line, in_comment):
+    if not in_comment:
+        # markers in string literals are not comments
+        line = line[_CODE_RE.match(line).end():]
+    return any(marker in line for marker in NOSEC_MARKERS)
+
+
+def scan(data):
+    '''Count the lines of code of a source and find its nosec lines
+
+    The source is read once, line by line. Lines of code are lines that
+    are not empty and not only comments. Only the lines holding 'nosec' are
+    looked at closer, so that a marker in a string literal is not taken
+    for a comment.
+
+    :param data: The source text
+    :return: A LineScan of the number of lines holding code and the set of
+             the numbers of the lines with a nosec comment, from 1
+    '''
+    loc = 0
+    nosec_lines = set()
+    multi_comment = False
+    for lineno, line in enumerate(split_lines(data), 1):
+        if 'nosec' in line and _has_nosec(line, multi_comment):
+            nosec_lines.add(lineno)
+
+        code = line.strip()
+        if multi_comment or code.startswith('/*'):
+            end = code.find('*/', 0 if multi_comment else 2)
+            multi_comment = end < 0
+            code = '' if multi_comment else code[end + 2:].lstrip()
+        if code and not code.startswith('//'):
+            loc += 1
+    return LineScan(loc, nosec_lines)
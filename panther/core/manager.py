@@ -1,19 +1,24 @@
 # -*- coding:utf-8 -*-
 
 import collections
+import copy
 import fnmatch
 import json
 import logging
 import os
 import sys
+import time
 import traceback
 
 from panther.core import constants as p_constants
 from panther.core import extension_loader
 from panther.core import issue
+from panther.core import line_scan
 from panther.core import meta_ast as p_meta_ast
 from panther.core import metrics
+from panther.core import minified as p_minified
 from panther.core import node_visitor as p_node_visitor
+from panther.core import result_cache as p_result_cache
 from panther.core import test_set as p_test_set
 
 
@@ -25,7 +30,9 @@ class PantherManager(object):
     scope = []
 
     def __init__(self, config, agg_type, debug=False, verbose=False,
-                 profile=None, ignore_nosec=False):
+                 profile=None, ignore_nosec=False, cache_dir=None,
+                 timings=False, top_slow=0, fail_fast=None,
+                 time_budget=None, minified=None):
         '''Get logger, config, AST handler, and result store ready
 
         :param config: config options object
@@ -35,6 +42,18 @@ class PantherManager(object):
         :param verbose: Whether to show verbose output
         :param profile_name: Optional name of profile to use (from cmd line)
         :param ignore_nosec: Whether to ignore //nosec or not
+        :param cache_dir: Optional directory to cache per file results in
+        :param timings: Whether to record the time spent per phase and test
+        :param top_slow: How many of the slowest files to report
+        :param fail_fast: Optional (severity, confidence) thresholds; the
+                          scan stops at the first file with an issue at or
+                          above them that is not in the baseline
+        :param time_budget: Optional number of seconds after which no more
+                            files are scanned; files are then scanned by
+                            priority rather than by name
+        :param minified: How to analyse minified and generated files, scan,
+                         skip or keywords; defaults to the minified option of
+                         the config, or scan
         :return:
         '''
         self.debug = debug
@@ -50,8 +69,18 @@ class PantherManager(object):
         self.results = []
         self.baseline = []
         self.agg_type = agg_type
-        self.metrics = metrics.Metrics()
+        self.fail_fast = fail_fast
+        self.time_budget = time_budget
+        self.minified = self._get_minified_mode(minified)
+        self.metrics = metrics.Metrics(timings=timings, top_slow=top_slow)
         self.p_ts = p_test_set.PantherTestSet(config, profile)
+        # where the results of the contents scanned so far are, by blob SHA,
+        # so files with the same contents are only scanned once
+        self.contents = {}
+        self.result_cache = None
+        if cache_dir:
+            self.result_cache = p_result_cache.ResultCache(
+                cache_dir, self.p_ts, ignore_nosec)
 
         # set the increment of after how many files to show progress
         self.progress = p_constants.progress_increment
@@ -166,14 +195,8 @@ class PantherManager(object):
         files_list = set()
         excluded_files = set()
 
-        excluded_path_strings = self.p_conf.get_option('exclude_dirs') or []
-        excluded_path_strings.append(p_constants.NODE_MODULES)
-        included_globs = self.p_conf.get_option('include') or ['*.py']
-
-        # if there are command line provided exclusions add them to the list
-        if excluded_paths:
-            for path in excluded_paths.split(','):
-                excluded_path_strings.append(path)
+        included_globs, excluded_path_strings = self._get_file_filters(
+            excluded_paths)
 
         # build list of files we will analyze
         for fname in targets:
@@ -205,21 +228,109 @@ class PantherManager(object):
         self.files_list = sorted(files_list)
         self.excluded_files = sorted(excluded_files)
 
-    def run_tests(self):
+    def select_files(self, paths, targets, recursive=False,
+                     excluded_paths=''):
+        '''Add tests from a known list of relative paths to the test set
+
+        This applies the same target, include and exclude rules as
+        discover_files, but to paths that need not exist on disk, such as
+        the paths touched by a git commit.
+
+        :param paths: Relative paths to pick from
+        :param targets: The command line list of files and directories
+        :param recursive: True/False - whether to add all files from dirs
+        :param excluded_paths: Comma separated list of paths to exclude
+        :return:
+        '''
+        files_list = set()
+        excluded_files = set()
+
+        included_globs, excluded_path_strings = self._get_file_filters(
+            excluded_paths)
+        targets = [os.path.normpath(t) for t in targets]
+
+        for target in targets:
+            for path in paths:
+                if path == target:
+                    # explicitly named files are scanned regardless of
+                    # whether they match the included file types
+                    enforce_glob = False
+                elif target == os.curdir or path.startswith(target + os.sep):
+                    if not recursive:
+                        LOG.warning("Skipping directory (%s), use -r flag to "
+                                    "scan contents", target)
+                        break
+                    enforce_glob = True
+                else:
+                    continue
+
+                if _is_file_included(path, included_globs,
+                                     excluded_path_strings,
+                                     enforce_glob=enforce_glob):
+                    files_list.add(path)
+                else:
+                    excluded_files.add(path)
+
+        self.files_list = sorted(files_list)
+        self.excluded_files = sorted(excluded_files - files_list)
+
+    def _get_minified_mode(self, minified):
+        mode = minified or self.p_conf.get_option('minified')
+        if mode is None:
+            return p_minified.DEFAULT_MODE
+        if mode not in p_minified.MODES:
+            LOG.warning("Unknown minified mode %s, scanning minified files "
+                        "(use one of: %s)", mode,
+                        ', '.join(p_minified.MODES))
+            return p_minified.DEFAULT_MODE
+        return mode
+
+    def _get_file_filters(self, excluded_paths):
+        excluded_path_strings = list(
+            self.p_conf.get_option('exclude_dirs') or [])
+        excluded_path_strings.append(p_constants.NODE_MODULES)
+        included_globs = self.p_conf.get_option('include') or ['*.py']
+
+        # if there are command line provided exclusions add them to the list
+        if excluded_paths:
+            for path in excluded_paths.split(','):
+                excluded_path_strings.append(path)
+
+        return included_globs, excluded_path_strings
+
+    def run_tests(self, reader=None):
         '''Runs through all files in the scope
 
+        :param reader: Optional callable returning a file object for a file
+                       name, used to scan contents that are not on disk
         :return: -
         '''
+        if reader is None:
+            reader = open
+
         # display progress, if number of files warrants it
         if len(self.files_list) > self.progress:
             sys.stderr.write("%s [" % len(self.files_list))
 
+        deadline = None
+        if self.time_budget is not None:
+            # scan the files most likely to matter first, as the budget may
+            # run out before all of them are scanned
+            self.files_list = _prioritize_files(
+                self.files_list, set(i.fname for i in self.baseline))
+            deadline = time.monotonic() + self.time_budget
+
         # if we have problems with a file, we'll remove it from the files_list
         # and add it to the skipped list instead
         new_files_list = list(self.files_list)
 
         for count, fname in enumerate(self.files_list):
+            if deadline is not None and time.monotonic() >= deadline:
+                self._stop_scan('time budget', count, new_files_list)
+                break
+
             LOG.debug("working on file : %s", fname)
+            first_result = len(self.results)
 
             if len(self.files_list) > self.progress:
                 # is it time to update the progress indicator?
@@ -231,12 +342,17 @@ class PantherManager(object):
                     sys.stdin = os.fdopen(sys.stdin.fileno(), 'r')
                     self._parse_file('<stdin>', sys.stdin, new_files_list)
                 else:
-                    with open(fname, 'r') as fdata:
+                    with reader(fname) as fdata:
                         self._parse_file(fname, fdata, new_files_list)
             except IOError as e:
                 self.skipped.append((fname, e.strerror))
                 new_files_list.remove(fname)
 
+            if (self.fail_fast and count + 1 < len(self.files_list) and
+                    self._is_failing(first_result)):
+                self._stop_scan('fail fast', count + 1, new_files_list)
+                break
+
         if len(self.files_list) > self.progress:
             sys.stderr.write("]\n")
             sys.stderr.flush()
@@ -247,37 +363,184 @@ class PantherManager(object):
         # do final aggregation of metrics
         self.metrics.aggregate()
 
+    def _stop_scan(self, reason, scanned, new_files_list):
+        '''Drop the files left to scan and note why the scan stopped
+
+        :param reason: Why the scan stopped, fail fast or time budget
+        :param scanned: How many files of the files_list were scanned
+        :param new_files_list: The files_list being built by run_tests
+        '''
+        unscanned = self.files_list[scanned:]
+        LOG.info("scan stopped (%s), %d files not scanned", reason,
+                 len(unscanned))
+        del new_files_list[len(new_files_list) - len(unscanned):]
+        last = self.files_list[scanned - 1] if scanned else None
+        self.metrics.note_stopped(reason, last, scanned, unscanned)
+
+    def _is_failing(self, first_result):
+        '''Whether an issue found since a point fails the fail fast gate
+
+        :param first_result: Index in the results of the first new issue
+        :return: True if a new issue is at or above the fail fast thresholds
+                 and is not in the baseline
+        '''
+        sev_filter, conf_filter = self.fail_fast
+        return any(i.filter(sev_filter, conf_filter) and i not in self.baseline
+                   for i in self.results[first_result:])
+
     def _parse_file(self, fname, fdata, new_files_list):
+        content_key = None
+        minified_reason = None
         try:
             # parse the current file
             data = fdata.read()
-            lines = data.splitlines()
+            content_key = p_result_cache.blob_sha(data)
+            if self._replay_duplicate(fname, content_key, new_files_list):
+                return
+            first_result = len(self.results)
+            minified_reason = p_minified.detect(fname, data)
+            if minified_reason is not None:
+                LOG.debug("%s is minified or generated (%s)", fname,
+                          minified_reason)
+                self.metrics.note_minified(fname, minified_reason,
+                                           self.minified)
+                if self.minified == 'skip':
+                    self.skipped.append((fname, "minified or generated file "
+                                         "(%s)" % minified_reason))
+                    new_files_list.remove(fname)
+                    return
+            keywords_only = (minified_reason is not None and
+                             self.minified == 'keywords')
+            # keyword results are not cached, as the cache does not tell them
+            # apart from the results of a full scan
+            if (self.result_cache and not keywords_only and
+                    self._replay_cached(fname, content_key)):
+                self._note_contents(content_key, fname, first_result,
+                                    minified_reason=minified_reason)
+                return
             self.metrics.begin(fname)
-            self.metrics.count_locs(lines)
-            if self.ignore_nosec:
-                nosec_lines = set()
-            else:
-                nosec_lines = set(
-                    lineno + 1 for
-                    (lineno, line) in enumerate(lines)
-                    if '//nosec' in line or '// nosec' in line)
+            self.metrics.note_cost(bytes=_byte_size(data))
+            with self.metrics.time('locs'):
+                # a single pass over the lines finds both the lines of code
+                # and the nosec comments, leaving out markers in strings
+                source = line_scan.scan(data)
+                self.metrics.count_source(source)
+                if self.ignore_nosec:
+                    nosec_lines = set()
+                else:
+                    nosec_lines = source.nosec_lines
+            if keywords_only:
+                issues, score = p_minified.scan_keywords(
+                    fname, data, self.p_ts, nosec_lines)
+                self.results.extend(issues)
+                self.scores.append(score)
+                self.metrics.count_issues([score, ])
+                self._note_contents(content_key, fname, first_result,
+                                    minified_reason=minified_reason)
+                return
             score = self._execute_ast_visitor(fname, data, nosec_lines)
             self.scores.append(score)
             self.metrics.count_issues([score, ])
+            if self.result_cache:
+                self.result_cache.put(content_key,
+                                      self.results[first_result:],
+                                      score, dict(self.metrics.current))
+            self._note_contents(content_key, fname, first_result,
+                                minified_reason=minified_reason)
         except KeyboardInterrupt as e:
             sys.exit(2)
         except SyntaxError as e:
-            self.skipped.append((fname,
-                                 "syntax error while parsing AST from file"))
+            reason = "syntax error while parsing AST from file"
+            self.skipped.append((fname, reason))
             new_files_list.remove(fname)
+            self._note_contents(content_key, fname, skip_reason=reason,
+                                minified_reason=minified_reason)
         except Exception as e:
             LOG.error("Exception occurred when executing tests against "
                       "%s. Run \"panther --debug %s\" to see the full "
                       "traceback.", fname, fname)
-            self.skipped.append((fname, 'exception while scanning file'))
+            reason = 'exception while scanning file'
+            self.skipped.append((fname, reason))
             new_files_list.remove(fname)
             LOG.debug("  Exception string: %s", e)
             LOG.debug("  Exception traceback: %s", traceback.format_exc())
+            self._note_contents(content_key, fname, skip_reason=reason,
+                                minified_reason=minified_reason)
+
+    def _note_contents(self, content_key, fname, first_result=None,
+                       skip_reason=None, minified_reason=None):
+        '''Keep the results of a file for the files with the same contents
+
+        :param content_key: The blob SHA of the file contents
+        :param fname: The name of the file
+        :param first_result: Index in the results of the first issue of the
+                             file, if it was scanned
+        :param skip_reason: Why the file was skipped, if it was; files that
+                            failed before their metrics were started are
+                            not kept
+        :param minified_reason: Why the file is taken for minified or
+                                generated, if it is
+        '''
+        if content_key is None or self.metrics.current_name != fname:
+            return
+        # only indexes are kept: the issues and score stay in the results
+        # and scores, and the metrics in the columns of the metrics
+        if skip_reason is None:
+            results = (first_result, len(self.results))
+            score = len(self.scores) - 1
+        else:
+            results, score = None, None
+        self.contents[content_key] = (fname, self.metrics.row(fname),
+                                      results, score, skip_reason,
+                                      minified_reason)
+
+    def _replay_duplicate(self, fname, content_key, new_files_list):
+        '''Record the results of a file with the contents of one scanned
+        before, if there is one
+
+        :param fname: The name of the file being parsed
+        :param content_key: The blob SHA of the file contents
+        :param new_files_list: The files_list being built by run_tests
+        :return: True if the results came from the other file
+        '''
+        scanned = self.contents.get(content_key)
+        if scanned is None:
+            return False
+
+        original, row, results, score, skip_reason, minified_reason = scanned
+        LOG.debug("%s has the same contents as %s", fname, original)
+        self.metrics.note_duplicate()
+        if minified_reason is not None:
+            self.metrics.note_minified(fname, minified_reason, self.minified)
+        self.metrics.restore_row(fname, row)
+        if skip_reason is not None:
+            self.skipped.append((fname, skip_reason))
+            new_files_list.remove(fname)
+            return True
+        self.scores.append(self.scores[score])
+        for original_issue in self.results[results[0]:results[1]]:
+            duplicate = copy.copy(original_issue)
+            duplicate.fname = fname
+            self.results.append(duplicate)
+        return True
+
+    def _replay_cached(self, fname, cache_key):
+        '''Record the cached results of a file, if there are any
+
+        :param fname: The name of the file being parsed
+        :param cache_key: The blob SHA of the file contents
+        :return: True if the results came from the cache
+        '''
+        cached = self.result_cache.get(cache_key, fname)
+        if cached is None:
+            return False
+
+        issues, score, file_metrics = cached
+        LOG.debug("using cached results for %s", fname)
+        self.metrics.restore(fname, file_metrics)
+        self.scores.append(score)
+        self.results.extend(issues)
+        return True
 
     def _execute_ast_visitor(self, fname, data, nosec_lines):
         '''Execute AST parse on each file
@@ -297,6 +560,41 @@ class PantherManager(object):
         return score
 
 
+def _prioritize_files(files_list, previous_findings):
+    '''Order files by how much their results are likely to matter
+
+    Files modified within RECENT_CHANGE_SECONDS come first, newest first,
+    then files with findings in the baseline, then the other files. Smaller
+    files come first within the last two groups, so that more files are
+    scanned when the time runs out.
+
+    :param files_list: The file names to order
+    :param previous_findings: The names of the files with previous findings
+    :return: The file names, in the order to scan them
+    '''
+    recent_since = time.time() - p_constants.RECENT_CHANGE_SECONDS
+
+    def priority(fname):
+        try:
+            stat = os.stat(fname)
+        except OSError:
+            # scanned last; reading it will fail and skip it
+            return (3, 0, 0, fname)
+        if stat.st_mtime >= recent_since:
+            return (0, -stat.st_mtime, stat.st_size, fname)
+        if fname in previous_findings:
+            return (1, 0, stat.st_size, fname)
+        return (2, 0, stat.st_size, fname)
+
+    return sorted(files_list, key=priority)
+
+
+def _byte_size(data):
+    if isinstance(data, bytes):
+        return len(data)
+    return len(data.encode('utf-8', 'surrogateescape'))
+
+
 def _get_files_from_dir(files_dir, included_globs=None,
                         excluded_path_strings=None):
     if not included_globs:
@@ -1,8 +1,108 @@
 # -*- coding:utf-8 -*-
 
+import array
 import collections
+import collections.abc
+import math
+import time
 
 from panther.core import constants
+from panther.core import line_scan
+
+# Percentiles of the per file times reported for each phase and test
+PERCENTILES = (50, 90, 99)
+
+# Blocks of the data that are not the metrics of a file
+REPORT_BLOCKS = ('_totals', '_timings', '_slowest', '_stopped',
+                 '_deduplicated', '_minified')
+
+
+# Issue count columns of the metrics, as (criteria, rank index, rank value,
+# label) tuples, with labels such as SEVERITY.HIGH
+ISSUE_COLUMNS = [
+    (criteria, i, constants.RANKING_VALUES[rank],
+     '{0}.{1}'.format(criteria, rank))
+    for (criteria, default) in constants.CRITERIA
+    for i, rank in enumerate(constants.RANKING)
+]
+ISSUE_LABELS = [label for (_, _, _, label) in ISSUE_COLUMNS]
+
+
+class _Row(collections.abc.MutableMapping):
+    """The metrics of one file, read from and written to the columns."""
+
+    def __init__(self, metrics, index):
+        self._metrics = metrics
+        self._index = index
+
+    def _column(self, key):
+        column = self._metrics._columns.get(key)
+        if column is None:
+            raise KeyError(key)
+        return column
+
+    def __getitem__(self, key):
+        if (key in self._metrics._issue_columns and
+                not self._metrics._counted[self._index]):
+            raise KeyError(key)
+        return self._column(key)[self._index]
+
+    def __setitem__(self, key, value):
+        column = self._column(key)
+        if key in self._metrics._issue_columns:
+            self._metrics._counted[self._index] = 1
+        column[self._index] = value
+
+    def __delitem__(self, key):
+        raise TypeError('file metrics can not be deleted')
+
+    def __iter__(self):
+        yield 'loc'
+        yield 'nosec'
+        if self._metrics._counted[self._index]:
+            for label in ISSUE_LABELS:
+                yield label
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+
+class _Data(collections.abc.MutableMapping):
+    """The metrics as blocks by file name, read from and written to them.
+
+    The block of a file is a _Row of the columns, built when it is looked
+    up, so reading '_totals' or another report block builds nothing.
+    """
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+
+    def __getitem__(self, key):
+        block = self._metrics._blocks.get(key)
+        if block is not None:
+            return block
+        return _Row(self._metrics, self._metrics._rows[key])
+
+    def __setitem__(self, key, value):
+        if key in REPORT_BLOCKS:
+            self._metrics._blocks[key] = value
+        else:
+            self._metrics._store(key, value)
+
+    def __delitem__(self, key):
+        raise TypeError('metrics can not be deleted')
+
+    def __contains__(self, key):
+        return key in self._metrics._blocks or key in self._metrics._rows
+
+    def __iter__(self):
+        for fname in list(self._metrics._rows):
+            yield fname
+        for key in list(self._metrics._blocks):
+            yield key
+
+    def __len__(self):
+        return len(self._metrics._rows) + len(self._metrics._blocks)
 
 
 class Metrics(object):
@@ -13,17 +113,72 @@ class Metrics(object):
     is, an active metric block will be set when requested and all subsequent
     operations will effect that metric block until it is replaced by a setting
     a new one.
+
+    The metrics of the files are stored in columns, one array per metric
+    indexed by the row of the file, so that a file costs a few numbers and
+    totals are sums of arrays. The data the reports read, with a block of
+    metrics per file name, reads the blocks of the files from the columns
+    as they are looked up.
     """
 
-    def __init__(self):
-        self.data = dict()
-        self.data['_totals'] = {'loc': 0, 'nosec': 0}
+    def __init__(self, timings=False, top_slow=0):
+        self._rows = {}
+        self._columns = {'loc': array.array('q'), 'nosec': array.array('q')}
+        for label in ISSUE_LABELS:
+            self._columns[label] = array.array('d')
+        self._issue_columns = frozenset(ISSUE_LABELS)
+        # whether the issues of each file were counted; files that fail to
+        # parse have no issue counts
+        self._counted = bytearray()
+        self._blocks = {'_totals': {'loc': 0, 'nosec': 0}}
+        self._data = _Data(self)
+        self.current = None
         self.nosec_lines = set()
+        # times are only recorded on request, so that the tester and the
+        # node visitor only check for None when timings are disabled
+        self.timings = Timings() if timings else None
+        # parse and analysis costs of the files scanned, by file name; they
+        # are kept apart from the metrics of the files, which are replayed
+        # from the result cache for files that are not scanned again
+        self.costs = collections.OrderedDict()
+        self.top_slow = top_slow
+        self.current_name = None
+        # files that were not scanned as another file had the same contents
+        self.duplicates = 0
 
         # initialize 0 totals for criteria and rank; this will be reset later
-        for rank in constants.RANKING:
-            for criteria in constants.CRITERIA:
-                self.data['_totals']['{0}.{1}'.format(criteria[0], rank)] = 0
+        for label in ISSUE_LABELS:
+            self._blocks['_totals'][label] = 0
+
+    @property
+    def data(self):
+        """The metrics as a mapping of blocks, by file name.
+
+        Besides the block of each file, it holds the '_totals' block, the
+        '_timings' and '_slowest' reports once they are aggregated, the
+        '_deduplicated' block if files had the same contents as others, the
+        '_minified' block if minified or generated files were found, and
+        the '_stopped' block if the scan stopped early. The blocks of the
+        files read from and write to the columns, and blocks set in it are
+        set in the metrics.
+        """
+        return self._data
+
+    def as_dict(self):
+        """Get the metrics as plain dictionaries, as the reports write them.
+
+        :return: a dictionary of the blocks found in data, by file name
+        """
+        keys = ['loc', 'nosec'] + ISSUE_LABELS
+        rows = list(zip(*[self._columns[key].tolist() for key in keys]))
+        result = {}
+        for fname, index in self._rows.items():
+            if self._counted[index]:
+                result[fname] = dict(zip(keys, rows[index]))
+            else:
+                result[fname] = dict(zip(keys[:2], rows[index]))
+        result.update(self._blocks)
+        return result
 
     def begin(self, fname):
         """Begin a new metric block.
@@ -32,8 +187,134 @@ class Metrics(object):
 
         :param fname: the metrics unique name, normally the file name.
         """
-        self.data[fname] = {'loc': 0, 'nosec': 0}
-        self.current = self.data[fname]
+        self.current = self._clear_row(fname)
+        self.current_name = fname
+        self.nosec_lines = set()
+        if self.timings is not None:
+            self.timings.begin(fname)
+
+    def restore(self, fname, file_metrics):
+        """Begin a metric block holding metrics gathered earlier.
+
+        :param fname: the metrics unique name, normally the file name.
+        :param file_metrics: the block of the file, as found in data
+        """
+        self.begin(fname)
+        self.current.update(file_metrics)
+
+    def row(self, fname):
+        """Get the row of a file in the columns.
+
+        :param fname: the file name
+        :return: the row, or None if the file has no metrics
+        """
+        return self._rows.get(fname)
+
+    def restore_row(self, fname, row):
+        """Begin a metric block holding the metrics of another file.
+
+        :param fname: the metrics unique name, normally the file name.
+        :param row: the row of the other file in the columns
+        """
+        self.restore(fname, _Row(self, row))
+
+    def _clear_row(self, fname):
+        """Get the row of a file, added or set back to zeros."""
+        index = self._rows.get(fname)
+        if index is None:
+            index = self._rows[fname] = len(self._counted)
+            for column in self._columns.values():
+                column.append(0)
+            self._counted.append(0)
+        else:
+            for column in self._columns.values():
+                column[index] = 0
+            self._counted[index] = 0
+        return _Row(self, index)
+
+    def _store(self, fname, file_metrics):
+        """Set the block of a file, leaving the active block as it is."""
+        self._clear_row(fname).update(file_metrics)
+
+    def merge(self, data):
+        """Add the metrics of another scan, as found in its data.
+
+        The blocks of its files are restored and its '_slowest',
+        '_stopped', '_deduplicated' and '_minified' blocks are combined with
+        these; '_totals' is computed again by aggregate, and files that were
+        scanned count as scanned in '_stopped', whichever scan they were
+        part of. Its '_timings' are left out, as the percentiles of the
+        times of two scans do not give those of both.
+
+        :param data: the metrics of the scan, as found in data
+        """
+        for fname, file_metrics in data.items():
+            if fname not in REPORT_BLOCKS:
+                self.restore(fname, file_metrics)
+        for key, combine in (('_slowest', _merge_slowest),
+                             ('_stopped', _merge_stopped),
+                             ('_deduplicated', _merge_deduplicated),
+                             ('_minified', _merge_minified)):
+            if key in data:
+                block = self._blocks.get(key)
+                self._blocks[key] = (dict(data[key]) if block is None
+                                     else combine(block, data[key]))
+        if '_stopped' in self._blocks:
+            # the files of the scans that did not stop count as scanned too
+            self._blocks['_stopped']['scanned'] = len(self._rows)
+
+    def note_cost(self, **costs):
+        """Add to the costs of the active file.
+
+        :param costs: amounts to add, of parse and analysis (seconds), nodes
+                      (the AST node count) and bytes
+        """
+        if self.current_name is None:
+            return
+        current = self.costs.get(self.current_name)
+        if current is None:
+            current = self.costs[self.current_name] = {
+                'parse': 0.0, 'analysis': 0.0, 'nodes': 0, 'bytes': 0}
+        for key, value in costs.items():
+            current[key] += value
+
+    def note_stopped(self, reason, fname, scanned, unscanned):
+        """Note that the scan stopped before scanning all the files.
+
+        :param reason: why the scan stopped, fail fast or time budget
+        :param fname: the name of the last file scanned, or None
+        :param scanned: how many files were scanned, including fname
+        :param unscanned: the names of the files that were not scanned
+        """
+        self._blocks['_stopped'] = {'reason': reason, 'filename': fname,
+                                    'scanned': scanned,
+                                    'unscanned': len(unscanned),
+                                    'unscanned_files': list(unscanned)}
+
+    def note_minified(self, fname, reason, mode):
+        """Note a minified or generated file and how it was analysed.
+
+        :param fname: the file name
+        :param reason: why the file is taken for minified or generated
+        :param mode: scan, skip or keywords
+        """
+        block = self._blocks.setdefault('_minified', {'files': []})
+        block['files'].append({'filename': fname, 'reason': reason,
+                               'mode': mode})
+
+    def note_duplicate(self):
+        """Note a file not scanned as another file had the same contents."""
+        self.duplicates += 1
+
+    def time(self, phase):
+        """Time a phase of the scan of the active file.
+
+        :param phase: the name of the phase, like parse or objectify
+        :return: a context manager recording the time spent in its block
+        """
+        if self.timings is None:
+            return _NULL_TIMER
+        return self.timings.time('phases', phase)
 
     def note_nosec(self, lineno):
         """Note a "nosec" commnet.
@@ -53,43 +334,219 @@ class Metrics(object):
 
         :param lines: lines in the file to process
         """
-        n_loc = 0
-        multi_comment = False
-        for line in lines:
-            tmp = line.strip()
-            multi_comment = tmp.startswith('/*') or multi_comment
-            if bool(tmp) and not tmp.startswith('//') and not multi_comment:
-                n_loc += 1
-            multi_comment = multi_comment and not ('*/' in tmp)
-        self.current['loc'] += n_loc
+        self.count_source(line_scan.scan('\n'.join(lines)))
+
+    def count_source(self, source):
+        """Count the lines of code of a file scanned by line_scan.
+
+        :param source: the LineScan of the file
+        """
+        self.current['loc'] += source.loc
 
     def count_issues(self, scores):
-        self.current.update(self._get_issue_counts(scores))
+        """Count the issues of the active file, by severity and confidence.
+
+        :param scores: list of scores to aggregate / count
+        """
+        index = self.current._index
+        for (criteria, i, value, label) in ISSUE_COLUMNS:
+            self._columns[label][index] = sum(
+                score[criteria][i] / value for score in scores)
+        self._counted[index] = 1
 
     def aggregate(self):
         """Do final aggregation of metrics."""
-        c = collections.Counter()
-        for fname in self.data:
-            c.update(self.data[fname])
-        self.data['_totals'] = dict(c)
+        totals = {}
+        counted = any(self._counted)
+        for key, column in self._columns.items():
+            if key in self._issue_columns and not counted:
+                totals[key] = 0
+            else:
+                totals[key] = sum(column)
+        self._blocks['_totals'] = totals
+        if self.timings is not None:
+            self._blocks['_timings'] = self.timings.aggregate()
+        if self.top_slow:
+            self._blocks['_slowest'] = self._get_slowest()
+        if self.duplicates:
+            self._blocks['_deduplicated'] = {'files': self.duplicates}
 
-    @staticmethod
-    def _get_issue_counts(scores):
-        """Get issue counts aggregated by confidence/severity rankings.
+    def _get_slowest(self):
+        """Get the slowest files and a histogram of the cost of all files.
 
-        :param scores: list of scores to aggregate / count
-        :return: aggregated total (count) of issues identified
-        """
-        issue_counts = {}
-        for score in scores:
-            for (criteria, default) in constants.CRITERIA:
-                for i, rank in enumerate(constants.RANKING):
-                    label = '{0}.{1}'.format(criteria, rank)
-                    if label not in issue_counts:
-                        issue_counts[label] = 0
-                        count = (
-                            score[criteria][i] /
-                            constants.RANKING_VALUES[rank]
-                        )
-                        issue_counts[label] += count
-        return issue_counts
+        The cost of a file is the time spent parsing and analysing it. The
+        histogram counts the files in buckets of cost doubling from one
+        millisecond, each bucket holding the files costing up to its bound.
+
+        :return: a dictionary such as {'files': [{'filename': 'a.js',
+                 'cost': 0.5, 'parse': 0.4, 'analysis': 0.1, 'nodes': 1200,
+                 'bytes': 5000}, ...], 'histogram': [[0.001, 4], ...]}
+        """
+        files = []
+        for fname, cost in self.costs.items():
+            entry = dict(cost)
+            entry['filename'] = fname
+            entry['cost'] = cost['parse'] + cost['analysis']
+            files.append(entry)
+        files.sort(key=lambda entry: entry['cost'], reverse=True)
+
+        counts = collections.Counter()
+        for entry in files:
+            exponent = 0
+            if entry['cost'] > 0.001:
+                exponent = int(math.ceil(math.log(entry['cost'] / 0.001, 2)))
+            counts[exponent] += 1
+        histogram = [[0.001 * 2 ** exponent, counts[exponent]]
+                     for exponent in range(max(counts) + 1 if counts else 0)]
+        return {'files': files[:self.top_slow], 'histogram': histogram}
+
+
+def _merge_slowest(first, second):
+    """Combine the '_slowest' blocks of two scans."""
+    top = max(len(first['files']), len(second['files']))
+    files = sorted(first['files'] + second['files'],
+                   key=lambda entry: entry['cost'], reverse=True)
+    counts = collections.Counter()
+    for bound, count in first['histogram'] + second['histogram']:
+        counts[bound] += count
+    return {'files': files[:top],
+            'histogram': [[bound, counts[bound]] for bound in sorted(counts)]}
+
+
+def _merge_stopped(first, second):
+    """Combine the '_stopped' blocks of two scans."""
+    reasons = set(first['reason'].split(', ') + second['reason'].split(', '))
+    return {'reason': ', '.join(sorted(reasons)), 'filename': None,
+            'scanned': first['scanned'] + second['scanned'],
+            'unscanned': first['unscanned'] + second['unscanned'],
+            'unscanned_files': (first['unscanned_files'] +
+                                second['unscanned_files'])}
+
+
+def _merge_deduplicated(first, second):
+    """Combine the '_deduplicated' blocks of two scans."""
+    return {'files': first['files'] + second['files']}
+
+
+def _merge_minified(first, second):
+    """Combine the '_minified' blocks of two scans."""
+    return {'files': first['files'] + second['files']}
+
+
+class _Timer(object):
+    """Adds the wall and CPU time spent in a block to a timing."""
+
+    def __init__(self, timings, kind, name):
+        self.timings = timings
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.kind, self.name,
+                         time.perf_counter() - self.wall,
+                         time.process_time() - self.cpu)
+        return False
+
+
+class _NullTimer(object):
+    """Stands for a timer when timings are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def percentile(values, percent):
+    """Get a percentile of values, by the nearest rank method.
+
+    :param values: the sorted values
+    :param percent: the percentile, from 0 to 100
+    :return: the value, or 0 if there are none
+    """
+    if not values:
+        return 0
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(rank, 1) - 1]
+
+
+class Timings(object):
+    """Wall and CPU times of the phases and tests of a scan.
+
+    Times are added up per file, for each phase of the scan like parsing
+    or objectify, and for each test function, with the number of calls. The
+    per file times are then aggregated with percentiles, so a phase or a
+    test that is slow on a few files stands out from one that is slow on
+    every file.
+    """
+
+    def __init__(self):
+        self.files = collections.OrderedDict()
+        self.current = None
+
+    def begin(self, fname):
+        """Start recording the times of a file.
+
+        :param fname: the file name
+        """
+        self.current = self.files[fname] = {}
+
+    def add(self, kind, name, wall, cpu, calls=1):
+        """Add times to the active file.
+
+        :param kind: phases or tests
+        :param name: the name of the phase or of the test function
+        :param wall: the wall time, in seconds
+        :param cpu: the CPU time, in seconds
+        :param calls: the number of calls the times cover
+        """
+        key = (kind, name)
+        entry = self.current.get(key)
+        if entry is None:
+            entry = self.current[key] = [0.0, 0.0, 0]
+        entry[0] += wall
+        entry[1] += cpu
+        entry[2] += calls
+
+    def time(self, kind, name):
+        """Time a block, adding its times to the active file.
+
+        :param kind: phases or tests
+        :param name: the name of the phase or of the test function
+        :return: a context manager
+        """
+        return _Timer(self, kind, name)
+
+    def aggregate(self):
+        """Aggregate the times of all files.
+
+        :return: a dictionary such as {'phases': {'parse': {'calls': 3,
+                 'files': 3, 'wall': {'total': ..., 'p50': ..., 'p90': ...,
+                 'p99': ..., 'max': ...}, 'cpu': {...}}}, 'tests': {...}}
+        """
+        samples = {}
+        for file_times in self.files.values():
+            for key, entry in file_times.items():
+                samples.setdefault(key, []).append(entry)
+
+        result = {'phases': {}, 'tests': {}}
+        for (kind, name), entries in samples.items():
+            summary = {'calls': sum(entry[2] for entry in entries),
+                       'files': len(entries)}
+            for index, clock in enumerate(('wall', 'cpu')):
+                values = sorted(entry[index] for entry in entries)
+                stats = {'total': sum(values), 'max': values[-1]}
+                for percent in PERCENTILES:
+                    stats['p%d' % percent] = percentile(values, percent)
+                summary[clock] = stats
+            result[kind][name] = summary
+        return result
@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+
+'''Detection of minified and generated files, and their keyword analysis.'''
+
+import bisect
+import re
+
+from panther.core import constants
+from panther.core import issue
+from panther.core import line_scan
+
+# How a minified or generated file is analysed: parsed like any other file,
+# skipped, or searched for the keywords of some tests without being parsed
+MODES = ('scan', 'skip', 'keywords')
+DEFAULT_MODE = 'scan'
+
+# Only the start of a file is looked at
+SAMPLE_SIZE = 4096
+
+MINIFIED_SUFFIXES = ('.min.js', '-min.js')
+
+# Lines this long are not written by hand
+MAX_LINE_LENGTH = 1000
+
+# Hand written code is more whitespace than this, once indentation and the
+# spaces around operators are counted
+MIN_WHITESPACE_RATIO = 0.08
+MIN_WHITESPACE_SAMPLE = 1024
+
+BANNERS = [
+    ('webpack bundle', re.compile(
+        r'__webpack_require__|webpackBootstrap|webpackJsonp|webpackChunk')),
+    ('UMD bundle', re.compile(
+        r'typeof\s+exports\s*===?\s*["\']object["\']\s*&&\s*'
+        r'typeof\s+module\s*!==?\s*["\']undefined["\']|'
+        r'typeof\s+define\s*===?\s*["\']function["\']\s*&&\s*define\.amd')),
+]
+
+_WHITESPACE_RE = re.compile(r'\s')
+
+# Keywords of the calls some tests report, as (check type, test name, test
+# id, pattern, description) tuples; a test's keywords are only searched for
+# when the test is selected
+KEYWORDS = [
+    ('CallExpression', 'eval_used', 'P601',
+     re.compile(r'(?<![\w$.])(?:global\.)?eval\s*\('), 'eval(...)'),
+    ('NewExpression', 'new_function_used', 'P601',
+     re.compile(r'(?<![\w$.])new\s+(?:global\.)?Function\s*\('),
+     'Function(...)'),
+]
+
+
+def detect(fname, data):
+    '''Tell whether a file is minified or generated, from the start of it
+
+    :param fname: The file name
+    :param data: The file contents
+    :return: The reason the file is taken for minified or generated, such
+             as 'webpack bundle' or 'long lines', or None
+    '''
+    if fname.endswith(MINIFIED_SUFFIXES):
+        return 'minified file name'
+
+    sample = data[:SAMPLE_SIZE]
+    for reason, banner in BANNERS:
+        if banner.search(sample):
+            return reason
+
+    lines = line_scan.NEWLINE_RE.split(sample)
+    if any(len(line) > MAX_LINE_LENGTH for line in lines):
+        return 'long lines'
+
+    if len(sample) >= MIN_WHITESPACE_SAMPLE:
+        whitespace = len(_WHITESPACE_RE.findall(sample))
+        if whitespace < MIN_WHITESPACE_RATIO * len(sample):
+            return 'little whitespace'
+    return None
+
+
+def scan_keywords(fname, data, test_set, nosec_lines):
+    '''Search a file for the keywords of the selected tests
+
+    This is much cheaper than parsing the file, and less precise, so the
+    issues found are of low confidence.
+
+    :param fname: The file name
+    :param data: The file contents
+    :param test_set: The PantherTestSet of the scan
+    :param nosec_lines: Lines on which no issues are reported
+    :return: A tuple of the issues and the score of the file
+    '''
+    score = {
+        'SEVERITY': [0] * len(constants.RANKING),
+        'CONFIDENCE': [0] * len(constants.RANKING)
+    }
+    issues = []
+    line_starts = None
+    for checktype, name, test_id, pattern, description in KEYWORDS:
+        if name not in [test.__name__
+                        for test in test_set.get_tests(checktype)]:
+            continue
+        for match in pattern.finditer(data):
+            if line_starts is None:
+                line_starts = [0] + [m.end() for m in
+                                     line_scan.NEWLINE_RE.finditer(data)]
+            lineno = bisect.bisect_right(line_starts, match.start())
+            if lineno in nosec_lines:
+                continue
+
+            result = issue.Issue(
+                severity=constants.HIGH, confidence=constants.LOW,
+                text=("Potential server side code injection detected: "
+                      "'Use of %s' (keyword in a minified file)" %
+                      description),
+                lineno=lineno, test_id=test_id)
+            result.fname = fname
+            result.test = name
+            result.linerange = [lineno]
+            issues.append(result)
+
+            for criteria, rank in (('SEVERITY', result.severity),
+                                   ('CONFIDENCE', result.confidence)):
+                score[criteria][constants.RANKING.index(rank)] += (
+                    constants.RANKING_VALUES[rank])
+    return issues, score
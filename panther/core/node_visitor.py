@@ -2,6 +2,7 @@
 
 import logging
 import operator
+import time
 
 from panther.core import constants
 from panther.core.pyesprima import esprima
@@ -27,7 +28,7 @@ class PantherNodeVisitor(object):
         self.metaast = metaast
         self.testset = testset
         self.tester = p_tester.PantherTester(
-            self.testset, self.debug, nosec_lines)
+            self.testset, self.debug, nosec_lines, metrics.timings)
         # in some cases we can't determine a qualified name
         try:
             self.namespace = p_utils.get_module_qualname_from_path(fname)
@@ -37,6 +38,9 @@ class PantherNodeVisitor(object):
             self.namespace = ""
         LOG.debug('Module qualified name: %s', self.namespace)
         self.metrics = metrics
+        # analyses of the file, such as its scopes, made on first use by
+        # the Context of any of its nodes
+        self.analyses = None
 
     def pre_visit(self, node):
         self.context = {}
@@ -53,8 +57,15 @@ class PantherNodeVisitor(object):
                 return False
 
         self.context['node'] = node
-        self.context['linerange'] = p_utils.linerange_fix(node)
+        if self.metrics.timings is None:
+            self.context['linerange'] = p_utils.linerange_fix(node)
+        else:
+            with self.metrics.time('linerange'):
+                self.context['linerange'] = p_utils.linerange_fix(node)
         self.context['filename'] = self.fname
+        self.context['analyses'] = self.analyses
+        # derived properties of the node, shared by all the tests run on it
+        self.context['memo'] = {}
 
         self.seen += 1
         LOG.debug("entering: %s %s [%s]", hex(id(node)), type(node),
@@ -79,10 +90,21 @@ class PantherNodeVisitor(object):
 
     def generic_visit(self, node):
         """Drive the visitor."""
-        for n in visitor.objectify(node).traverse():
-            if self.pre_visit(n):
-                self.visit(n)
-                self.post_visit(n)
+        start = time.perf_counter()
+        with self.metrics.time('objectify'):
+            root = visitor.objectify(node)
+        parsed = time.perf_counter()
+        self.analyses = {'root': root}
+        nodes = 0
+        with self.metrics.time('visit'):
+            for n in root.traverse():
+                nodes += 1
+                if self.pre_visit(n):
+                    self.visit(n)
+                    self.post_visit(n)
+        self.metrics.note_cost(parse=parsed - start,
+                               analysis=time.perf_counter() - parsed,
+                               nodes=nodes)
 
     def update_scores(self, scores):
         '''Score updater
@@ -105,7 +127,12 @@ class PantherNodeVisitor(object):
         :param lines: lines code to process
         :return score: the aggregated score for the current file
         '''
-        data = p_utils.clean_code(data)
-        f_ast = esprima.parse(data, {'loc': True})
-        self.generic_visit(f_ast.to_dict())
+        start = time.perf_counter()
+        with self.metrics.time('parse'):
+            data = p_utils.clean_code(data)
+            f_ast = esprima.parse(data, {'loc': True})
+        with self.metrics.time('to_dict'):
+            tree = f_ast.to_dict()
+        self.metrics.note_cost(parse=time.perf_counter() - start)
+        self.generic_visit(tree)
         return self.scores
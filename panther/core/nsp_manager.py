@@ -1,18 +1,25 @@
 # -*- coding:utf-8 -*-
 
+import collections
 import json
 import logging
 import os
+import re
+import threading
+import time
+import traceback
 from subprocess import DEVNULL, CalledProcessError, call, check_output  # noqa
 
 import panther
 from panther.core import constants
 from panther.core import issue
+from panther.core import semver
 
 LOG = logging.getLogger(__name__)
 
 ADVISORIES = 'advisories.json'
 SUCCESS_CODE = 0
+LOCK_FILES = ['package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock']
 
 """
 The nsp CLI tool exits with the following codes to signify state:
@@ -25,12 +32,17 @@ The nsp CLI tool exits with the following codes to signify state:
 """
 
 
+class AuditError(Exception):
+    '''Raised when the dependency audit can not be completed'''
+
+
 class NspManager(object):
     def __init__(self, results=None):
         '''Initialize the class with the tests manager results'''
         self.nsp_report = {}
         self.results = results
         self.cves = {}
+        self.manifest = 'package.json'
 
     @property
     def has_nsp(self):
@@ -44,19 +56,27 @@ class NspManager(object):
         return return_code == SUCCESS_CODE
 
     def run_check(self):
-        '''Run the scan and return the output in json format'''
-        if self.has_nsp:
+        '''Run the scan and return the output in json format
+
+        :return: True if vulnerable dependencies were found
+        :raises AuditError: if nsp is missing or could not run the check
+        '''
+        if not self.has_nsp:
+            raise AuditError("nsp is not installed")
+        try:
+            check_output(
+                'nsp check %s --reporter json' % os.getcwd(),
+                shell=True, stderr=DEVNULL
+            )
+        except CalledProcessError as e:
+            if e.returncode != 1:
+                raise AuditError("nsp check exited with code %s" %
+                                 e.returncode)
             try:
-                check_output(
-                    'nsp check %s --reporter json' % os.getcwd(),
-                    shell=True, stderr=DEVNULL
-                )
-            except CalledProcessError as e:
-                if e.returncode == 1:
-                    self.nsp_report = json.loads(e.output)
-                    return True
-            except Exception as e:
-                pass
+                self.nsp_report = json.loads(e.output)
+            except ValueError as e:
+                raise AuditError("unable to read nsp report: %s" % e)
+            return True
         return False
 
     def _format_issue_desc(self, vuln):
@@ -104,7 +124,7 @@ class NspManager(object):
             for vuln in self.nsp_report:
                 i = issue.Issue(None)
                 i.from_dict({
-                    'filename': 'package.json',
+                    'filename': self.manifest,
                     'test_id': constants.NSP_TEST_ID,
                     'line_number': '',
                     'line_range': [0, 1],
@@ -115,3 +135,235 @@ class NspManager(object):
                     'issue_severity': NspManager._get_severity_level(vuln)
                 })
                 self.results.append(i)
+
+
+class AdvisoryDatabase(object):
+    '''Local database of npm security advisories.
+
+    The database is a JSON file holding a list of advisories, or an object
+    whose values are advisories, in the format of the npm advisories API.
+    Advisories are indexed by package name with their vulnerable version
+    ranges parsed up front, so looking up a package costs a dict lookup and
+    a few comparisons whatever the size of the database.
+    '''
+
+    # used when an advisory has a severity but no CVSS score
+    SEVERITY_SCORES = {'low': 2.0, 'moderate': 5.0, 'high': 8.0,
+                       'critical': 9.5}
+
+    def __init__(self, advisories):
+        self.advisories = collections.defaultdict(list)
+        if isinstance(advisories, dict):
+            advisories = advisories.get('advisories', advisories).values()
+        for advisory in advisories:
+            try:
+                vulnerable = semver.Range(advisory['vulnerable_versions'])
+            except (KeyError, ValueError) as e:
+                LOG.warning("Skipping advisory %s: %s",
+                            advisory.get('id'), e)
+                continue
+            self.advisories[advisory['module_name']].append(
+                (vulnerable, advisory))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fd:
+            return cls(json.load(fd))
+
+    def match(self, name, version):
+        '''Return the advisories affecting a version of a package
+
+        :param name: The package name
+        :param version: The resolved version string
+        :return: List of advisories
+        '''
+        candidates = self.advisories.get(name)
+        if not candidates:
+            return []
+        try:
+            version = semver.Version.parse(version)
+        except ValueError:
+            # git, file and tarball dependencies have no version to match
+            return []
+        return [advisory for vulnerable, advisory in candidates
+                if vulnerable.match(version)]
+
+
+def iter_package_lock(fd):
+    '''Yield the packages resolved in a package-lock.json
+
+    Both the nested "dependencies" of lockfile version 1 and the flat
+    "packages" of versions 2 and 3 are understood.
+
+    :param fd: The open lock file
+    :return: Generator of (name, version, path) tuples, where path lists the
+             packages from the project down to the package
+    '''
+    lock = json.load(fd)
+    root = lock.get('name') or 'package.json'
+
+    packages = lock.get('packages')
+    if packages:
+        for location, package in packages.items():
+            if not location or 'version' not in package:
+                continue
+            path = [p for p in location.split('node_modules/') if p]
+            names = [p.rstrip('/') for p in path]
+            name = package.get('name') or names[-1]
+            yield name, package['version'], [root] + names
+        return
+
+    stack = [([root], lock.get('dependencies') or {})]
+    while stack:
+        path, dependencies = stack.pop()
+        for name, package in dependencies.items():
+            if 'version' in package:
+                yield name, package['version'], path + [name]
+            if package.get('dependencies'):
+                stack.append((path + [name], package['dependencies']))
+
+
+_YARN_VERSION = re.compile(r'^\s+version:?\s+"?([^"\s]+)"?\s*$')
+
+
+def iter_yarn_lock(fd):
+    '''Yield the packages resolved in a yarn.lock, reading line by line
+
+    Both the classic format and the YAML format of yarn 2 and later are
+    understood.
+
+    :param fd: The open lock file
+    :return: Generator of (name, version, path) tuples
+    '''
+    name = None
+    for line in fd:
+        if not line.strip() or line.startswith('#'):
+            continue
+        if not line[0].isspace():
+            # "a@^1.0.0", "a@^1.1.0": starts the entry of package a
+            selector = line.rstrip().rstrip(':').split(',')[0].strip('" ')
+            name = selector[:selector.rindex('@')] if (
+                '@' in selector[1:]) else None
+            continue
+        match = _YARN_VERSION.match(line)
+        if name and match:
+            yield name, match.group(1), ['package.json', name]
+            name = None
+
+
+class OfflineNspManager(NspManager):
+    '''Match the locked dependencies against a local advisory database
+
+    This replaces the nsp service: the packages resolved in the lock file
+    of the project are checked against the advisories of an
+    AdvisoryDatabase, and reported as the same NSP issues.
+    '''
+
+    def __init__(self, results=None, advisory_db=None, directory=None):
+        super(OfflineNspManager, self).__init__(results)
+        self.advisory_db = advisory_db
+        self.directory = directory or os.getcwd()
+        self.lock_file = None
+        for lock_file in LOCK_FILES:
+            if os.path.isfile(os.path.join(self.directory, lock_file)):
+                self.lock_file = lock_file
+                break
+        if self.lock_file:
+            self.manifest = self.lock_file
+
+    def _iter_packages(self):
+        iter_lock = (iter_yarn_lock if self.lock_file == 'yarn.lock'
+                     else iter_package_lock)
+        with open(os.path.join(self.directory, self.lock_file)) as fd:
+            for package in iter_lock(fd):
+                yield package
+
+    def run_check(self):
+        '''Match the packages of the lock file, True if any is vulnerable'''
+        if not self.lock_file:
+            raise AuditError("no lock file found in %s" % self.directory)
+
+        self.nsp_report = []
+        seen = set()
+        for name, version, path in self._iter_packages():
+            for advisory in self.advisory_db.match(name, version):
+                key = (advisory.get('id'), name, version)
+                if key in seen:
+                    continue
+                seen.add(key)
+                self.nsp_report.append(self._get_vuln(advisory, name,
+                                                      version, path))
+                self.cves[advisory.get('id')] = advisory.get('cves') or []
+        return bool(self.nsp_report)
+
+    def _fetch_cves(self):
+        '''CVEs come with the advisories of the database'''
+
+    @staticmethod
+    def _get_vuln(advisory, name, version, path):
+        cvss_score = advisory.get('cvss_score')
+        if cvss_score is None:
+            cvss_score = AdvisoryDatabase.SEVERITY_SCORES.get(
+                advisory.get('severity'), 5.0)
+        return {
+            'id': advisory.get('id'),
+            'title': advisory.get('title', ''),
+            'module': name,
+            'version': version,
+            'vulnerable_versions': advisory['vulnerable_versions'],
+            'patched_versions': advisory.get('patched_versions', ''),
+            'recommendation': advisory.get('recommendation', ''),
+            'cvss_score': cvss_score,
+            'path': path,
+        }
+
+
+class DependencyAudit(threading.Thread):
+    '''Run the dependency audit of an NspManager in the background
+
+    The audit runs in a daemon thread so it overlaps with the source scan.
+    Once the scan is done, merge() waits for what is left of the timeout and
+    adds the issues found to the scan results. An audit that fails or runs
+    out of time is reported as a skipped item instead.
+    '''
+
+    def __init__(self, nsp_mgr, timeout=None):
+        super(DependencyAudit, self).__init__(name='dependency-audit')
+        self.daemon = True
+        self.nsp_mgr = nsp_mgr
+        self.nsp_mgr.results = []
+        self.timeout = timeout
+        self.error = None
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.time()
+        super(DependencyAudit, self).start()
+
+    def run(self):
+        try:
+            self.nsp_mgr.update_issues()
+        except Exception as e:
+            LOG.debug("Dependency audit traceback: %s",
+                      traceback.format_exc())
+            self.error = e
+
+    def merge(self, p_mgr):
+        '''Wait for the audit and add its outcome to a PantherManager
+
+        :param p_mgr: The PantherManager holding the scan results
+        '''
+        remaining = None
+        if self.timeout is not None:
+            remaining = max(0, self._started_at + self.timeout - time.time())
+        self.join(remaining)
+
+        if self.is_alive():
+            p_mgr.skipped.append((self.nsp_mgr.manifest,
+                                  "dependency audit timed out after %s "
+                                  "seconds" % self.timeout))
+        elif self.error is not None:
+            p_mgr.skipped.append((self.nsp_mgr.manifest,
+                                  "dependency audit failed: %s" % self.error))
+        else:
+            p_mgr.results.extend(self.nsp_mgr.results)
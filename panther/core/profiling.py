@@ -0,0 +1,147 @@
+# -*- coding:utf-8 -*-
+
+'''Profiling of a scan with cProfile.'''
+
+import cProfile
+import glob
+import os
+import pstats
+
+import panther
+
+PANTHER_DIR = os.path.dirname(os.path.abspath(panther.__file__))
+
+# Subsystems of panther, by the path of their modules relative to the package.
+# The first matching prefix wins; plugins are reported one by one.
+# The esprima parser runs on Js2Py, whose frames count as the parser's.
+SUBSYSTEMS = [
+    ('core/pyesprima', 'parser'),
+    ('core/node_visitor.py', 'visitor'),
+    ('core/visitor.py', 'visitor'),
+    ('core/symbol_index.py', 'visitor'),
+    ('core/scope.py', 'visitor'),
+    ('core/folding.py', 'visitor'),
+    ('core/meta_ast.py', 'visitor'),
+    ('core/tester.py', 'tester'),
+    ('core/context.py', 'tester'),
+    ('core/rules.py', 'tester'),
+    ('formatters/', 'formatter'),
+    ('core/manager.py', 'manager'),
+    ('core/metrics.py', 'manager'),
+    ('core/result_cache.py', 'manager'),
+    ('cli/', 'cli'),
+]
+
+JS2PY_DIR = os.sep + 'js2py' + os.sep
+
+STATS_PATTERN = 'panther-*.pstats'
+SUMMARY_NAME = 'summary.txt'
+
+
+def subsystem(filename):
+    '''Get the subsystem a function belongs to, from the file defining it
+
+    :param filename: The file name of a profiled function, '~' for builtins
+    :return: The subsystem, such as parser, tester or plugin:js_eval
+    '''
+    if filename == '~':
+        return 'builtins'
+    path = os.path.abspath(filename)
+    if not path.startswith(PANTHER_DIR + os.sep):
+        if JS2PY_DIR in path:
+            return 'parser'
+        return 'other'
+    path = path[len(PANTHER_DIR) + 1:].replace(os.sep, '/')
+    if path.startswith('plugins/'):
+        return 'plugin:' + os.path.splitext(path[len('plugins/'):])[0]
+    for prefix, name in SUBSYSTEMS:
+        if path.startswith(prefix):
+            return name
+    return 'panther'
+
+
+def summarize(stats):
+    '''Group the functions of a profile by subsystem
+
+    Functions are grouped by their own time, which does not include the
+    time of the functions they call, so the times of the subsystems add up
+    to the time of the whole profile. Builtin functions, like list.append,
+    are charged to the subsystems of their callers.
+
+    :param stats: A pstats.Stats
+    :return: A list of (subsystem, own time, calls), slowest first
+    '''
+    totals = {}
+
+    def add(name, own_time, calls):
+        total = totals.setdefault(name, [0.0, 0])
+        total[0] += own_time
+        total[1] += calls
+
+    for (filename, _, _), entry in stats.stats.items():
+        if filename == '~' and entry[4]:
+            for caller, caller_entry in entry[4].items():
+                add(subsystem(caller[0]), caller_entry[2], caller_entry[1])
+        else:
+            add(subsystem(filename), entry[2], entry[1])
+    return sorted(((name, total[0], total[1])
+                   for name, total in totals.items()),
+                  key=lambda item: item[1], reverse=True)
+
+
+def format_summary(stats):
+    '''Format the summary of a profile as text
+
+    :param stats: A pstats.Stats
+    :return: The summary, a line per subsystem
+    '''
+    summary = summarize(stats)
+    overall = sum(own_time for _, own_time, _ in summary) or 1.0
+    lines = ['%-40s %12s %7s %12s' % ('subsystem', 'own time (s)', '%',
+                                      'calls')]
+    for name, own_time, calls in summary:
+        lines.append('%-40s %12.3f %6.1f%% %12i' % (
+            name, own_time, 100.0 * own_time / overall, calls))
+    return '\n'.join(lines) + '\n'
+
+
+class ScanProfiler(object):
+    '''Profiles a scan, writing the stats of each process to a directory.
+
+    Each process writes its own panther-<pid>.pstats file, and the stats of
+    all the files in the directory are then merged into a summary grouped
+    by subsystem, so the stats of worker processes are summarised with
+    those of the main one. Stats left in the directory by a previous scan
+    are removed when profiling starts.
+
+    :param out_dir: The directory to write the stats to, created if needed
+    '''
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        if not os.path.isdir(self.out_dir):
+            os.makedirs(self.out_dir)
+        for path in glob.glob(os.path.join(self.out_dir, STATS_PATTERN)):
+            os.remove(path)
+        self.profile.enable()
+
+    def stop(self):
+        '''Stop profiling and write the stats and the summary
+
+        :return: The path of the summary
+        '''
+        self.profile.disable()
+        self.profile.dump_stats(os.path.join(
+            self.out_dir, 'panther-%d.pstats' % os.getpid()))
+        return self.write_summary()
+
+    def write_summary(self):
+        paths = sorted(glob.glob(os.path.join(self.out_dir, STATS_PATTERN)))
+        stats = pstats.Stats(*paths)
+        summary_path = os.path.join(self.out_dir, SUMMARY_NAME)
+        with open(summary_path, 'w') as fd:
+            fd.write(format_summary(stats))
+        return summary_path
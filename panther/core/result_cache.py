@@ -0,0 +1,128 @@
+# -*- coding:utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import panther
+from panther.core import issue
+
+
+LOG = logging.getLogger(__name__)
+
+
+def blob_sha(data):
+    '''Return the git blob SHA of some file contents.
+
+    The SHA is that of the contents as panther reads them: text is encoded
+    as UTF-8, and files are read with universal newlines, so it is only the
+    object name git gives the file when the file is UTF-8 with LF line
+    endings. Contents that differ only in their line endings share a key,
+    which is fine as they are scanned alike.
+
+    :param data: The file contents, as text or bytes
+    :return: The hex digest
+    '''
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    sha = hashlib.sha1(b'blob ' + str(len(data)).encode('ascii') + b'\0')
+    sha.update(data)
+    return sha.hexdigest()
+
+
+def default_cache_dir():
+    '''Return the per user directory results are cached in by default.'''
+    base = (os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'panther')
+
+
+class ResultCache(object):
+    '''On disk store of per file scan results.
+
+    Results are keyed by the git blob SHA of the scanned contents, and kept
+    apart by a fingerprint of everything else that decides them: the panther
+    version, the selected tests, their plugin configuration and whether
+    nosec comments are honoured. A file scanned once is never parsed again
+    for the same contents and settings, whatever its name or commit.
+
+    Entries are never evicted and the directory has no size bound: it grows
+    with every distinct contents and settings scanned, until it is removed.
+    '''
+
+    def __init__(self, cache_dir, test_set, ignore_nosec=False):
+        self.fingerprint = self.get_fingerprint(test_set, ignore_nosec)
+        self.path = os.path.join(cache_dir, self.fingerprint)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_fingerprint(test_set, ignore_nosec=False):
+        '''Hash the settings that the results of a scan depend on.
+
+        :param test_set: The PantherTestSet the scan runs
+        :param ignore_nosec: Whether nosec comments are ignored
+        :return: The hex digest
+        '''
+        # test ids are shared by several tests, names are not
+        tests = dict((p.name,
+                      [p.plugin._test_id, getattr(p.plugin, '_config', None)])
+                     for p in test_set.plugins)
+        settings = {'version': panther.__version__,
+                    'tests': tests,
+                    'ignore_nosec': bool(ignore_nosec)}
+        encoded = json.dumps(settings, sort_keys=True, default=repr)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key[2:] + '.json')
+
+    def get(self, key, fname):
+        '''Return the cached results of some contents or None.
+
+        :param key: The blob SHA of the contents
+        :param fname: The file name to attribute the issues to
+        :return: Tuple of the issues, score and file metrics
+        '''
+        try:
+            with open(self._entry_path(key)) as fd:
+                entry = json.load(fd)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        issues = []
+        for data in entry['issues']:
+            data['filename'] = fname
+            issues.append(issue.issue_from_dict(data))
+        return issues, entry['score'], entry['metrics']
+
+    def put(self, key, issues, score, file_metrics):
+        '''Store the results of scanning some contents.
+
+        Failing to write the cache is not an error, the results are just
+        computed again next time.
+
+        :param key: The blob SHA of the contents
+        :param issues: The issues found in the contents
+        :param score: The score of the contents
+        :param file_metrics: The metrics block of the contents
+        '''
+        entry = {'issues': [i.as_dict(with_code=False) for i in issues],
+                 'score': score,
+                 'metrics': file_metrics}
+        path = self._entry_path(key)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            # write aside and rename, so concurrent runs never read a
+            # partially written entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'w') as tmp:
+                json.dump(entry, tmp)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            LOG.debug("Unable to write result cache entry %s: %s", path, e)
@@ -0,0 +1,194 @@
+# -*- coding:utf-8 -*-
+
+'''Declarative call rules.
+
+A rule flags calls by the name space of their callee, optionally narrowed
+by the shape of their arguments. Rules are written in the config file, under
+the callee_rules plugin:
+
+.. code-block:: yaml
+
+    callee_rules:
+      rules:
+        - name: child_process_exec
+          callee: [child_process.exec, cp.exec]
+          arguments: [expression]
+          severity: HIGH
+          confidence: MEDIUM
+          message: Command built from an expression run through a shell.
+        - name: vm_script
+          node: new
+          callee: [vm.Script]
+          message: Code compiled from a string.
+
+The callee patterns are dotted name spaces, with a bare ``*`` matching any
+resolved name and ``?`` or ``?Type`` names that can not be resolved, as in
+match_name_space. A RuleSet compiles the patterns of all its rules into one
+NameSpaceTrie per expression type, so a call is matched against all rules
+with a single lookup whatever their number.
+'''
+
+from panther.core import constants
+from panther.core import issue
+from panther.core import utils
+from panther.core.visitor import ArrayExpression
+from panther.core.visitor import ArrowFunctionExpression
+from panther.core.visitor import FunctionExpression
+from panther.core.visitor import Literal
+from panther.core.visitor import ObjectExpression
+from panther.core.visitor import TemplateLiteral
+
+
+NODE_TYPES = {
+    'call': ('CallExpression',),
+    'new': ('NewExpression',),
+    'any': ('CallExpression', 'NewExpression'),
+}
+
+
+def _is_constant(node):
+    if isinstance(node, Literal):
+        return True
+    return isinstance(node, TemplateLiteral) and not node.expressions
+
+
+# Argument shapes, anything else is the type of the argument node
+SHAPES = {
+    '*': lambda node: True,
+    'literal': lambda node: isinstance(node, Literal),
+    'string': lambda node: utils.try_extract_string_value(node) is not None,
+    'expression': lambda node: not _is_constant(node),
+    'function': lambda node: isinstance(
+        node, (FunctionExpression, ArrowFunctionExpression)),
+    'object': lambda node: isinstance(node, ObjectExpression),
+    'array': lambda node: isinstance(node, ArrayExpression),
+}
+
+
+def parse_callee(callee):
+    '''Converts a dotted callee pattern to a name space pattern list.
+
+    Example: 'db.*.find' => ['*db', '*', '*find']
+
+    :param callee: The dotted pattern
+    :returns: (List) The pattern list
+    '''
+    pattern_list = []
+    for name in callee.split('.'):
+        if not name:
+            raise ValueError('Empty name in callee pattern %r.' % callee)
+        if name in ('*', '?') or name.startswith('?'):
+            pattern_list.append(name)
+        else:
+            pattern_list.append('*' + name)
+    return pattern_list
+
+
+class Rule(object):
+    '''A call rule, see the module documentation for its fields.'''
+
+    def __init__(self, name, callee, message, test_id='P600',
+                 severity='MEDIUM', confidence='MEDIUM',
+                 node='call', arguments=None, object_key=None):
+        if not callee:
+            raise ValueError('Rule %s has no callee pattern.' % name)
+        if isinstance(callee, str):
+            callee = [callee]
+        if node not in NODE_TYPES:
+            raise ValueError('Rule %s: node must be one of %s.' %
+                             (name, ', '.join(sorted(NODE_TYPES))))
+        for level in (severity, confidence):
+            if level not in constants.RANKING:
+                raise ValueError('Rule %s: unknown level %r.' % (name, level))
+
+        self.name = name
+        self.test_id = test_id
+        self.message = message
+        self.severity = severity
+        self.confidence = confidence
+        self.node_types = NODE_TYPES[node]
+        self.callee = [parse_callee(pattern) for pattern in callee]
+        self.arguments = [self._get_shape(shape)
+                          for shape in (arguments or [])]
+        self.object_key = (object_key if object_key is None or
+                           object_key[:1] in ('*', '?')
+                           else '*' + object_key)
+
+    @classmethod
+    def from_dict(cls, data):
+        '''Builds a rule from its config entry.
+
+        :param data: (Dict) The rule, as written in the config
+        :returns: The Rule
+        :raises ValueError: if the rule is invalid
+        '''
+        if not isinstance(data, dict) or 'name' not in data:
+            raise ValueError('Rule %r has no name.' % (data,))
+        data = dict(data)
+        if 'id' in data:
+            data['test_id'] = data.pop('id')
+        for level in ('severity', 'confidence'):
+            if level in data:
+                data[level] = str(data[level]).upper()
+        data.setdefault('message', 'Call matching rule %s.' % data['name'])
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError('Rule %s: %s' % (data['name'], e))
+
+    def _get_shape(self, shape):
+        if shape in SHAPES:
+            return SHAPES[shape]
+        return lambda node: getattr(node, 'type', None) == shape
+
+    def matches_arguments(self, node):
+        '''Checks the arguments of a call whose callee the rule matches.'''
+        arguments = node.arguments or []
+        if len(arguments) < len(self.arguments):
+            return False
+        for shape, argument in zip(self.arguments, arguments):
+            if not shape(argument):
+                return False
+        if self.object_key is not None:
+            return utils.match_argument_with_object_key(node, self.object_key)
+        return True
+
+    def issue(self):
+        '''Builds the issue reported for a call matching the rule.
+
+        The issue carries the id of the rule, which labels it in reports;
+        rules are only selected together, by the id of the P600 test.
+        '''
+        result = issue.Issue(severity=self.severity,
+                             confidence=self.confidence,
+                             text=self.message,
+                             test_id=self.test_id)
+        result.test = self.name
+        return result
+
+
+class RuleSet(object):
+    '''A set of rules compiled into one matcher per expression type.'''
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self._tries = {}
+        for index, rule in enumerate(self.rules):
+            for node_type in rule.node_types:
+                trie = self._tries.setdefault(node_type,
+                                              utils.NameSpaceTrie())
+                for pattern_list in rule.callee:
+                    trie.add(pattern_list, index)
+
+    def match(self, node):
+        '''Gets the rules a call or new expression matches.
+
+        :param node: A CallExpression or a NewExpression
+        :returns: (List) The matching rules, in the order they were given
+        '''
+        trie = self._tries.get(node.type)
+        if trie is None:
+            return []
+        return [self.rules[index]
+                for index in sorted(trie.match_node(node))
+                if self.rules[index].matches_arguments(node)]
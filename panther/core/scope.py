@@ -0,0 +1,313 @@
+# -*- coding:utf-8 -*-
+
+'''Scopes and bindings of the variables of a file.'''
+
+from panther.core import utils
+from panther.core.visitor import Identifier
+from panther.core.visitor import Literal
+from panther.core.visitor import TemplateLiteral
+
+
+class Binding(object):
+    '''A name declared in a scope.
+
+    :param name: The declared name
+    :param kind: var, let, const, function, class, param, catch or import
+    :param node: The Identifier node of the declaration
+    :param init: The expression the declaration initializes the name to
+    '''
+
+    def __init__(self, name, kind, node, init=None):
+        self.name = name
+        self.kind = kind
+        self.node = node
+        self.init = init
+        self.references = []
+        self.writes = 0
+
+    @property
+    def is_constant(self):
+        '''Whether the name always holds the value it is initialized to
+
+        That is when it is declared with var, let or const, with a value,
+        and it is never assigned again.
+        '''
+        return (self.kind in ('var', 'let', 'const') and
+                self.init is not None and not self.writes)
+
+    @property
+    def constant_string(self):
+        '''The string the name always holds, or None
+
+        A name holds a constant string when it is constant and initialized
+        to a string literal, or a template literal without expressions.
+        '''
+        if not self.is_constant:
+            return None
+        init = self.init
+        if isinstance(init, Literal):
+            if init.raw[:1] in ('"', "'"):
+                return init.value
+        elif isinstance(init, TemplateLiteral) and not init.expressions:
+            return init.quasis[0].value['cooked']
+        return None
+
+    def __repr__(self):
+        return '<Binding %s %s>' % (self.kind, self.name)
+
+
+class Scope(object):
+    '''A function or block scope.'''
+
+    def __init__(self, parent, is_function=False):
+        self.parent = parent
+        self.function_scope = (self if is_function or parent is None
+                               else parent.function_scope)
+        self.bindings = {}
+
+    def lookup(self, name):
+        scope = self
+        while scope is not None:
+            binding = scope.bindings.get(name)
+            if binding is not None:
+                return binding
+            scope = scope.parent
+        return None
+
+
+class ScopeAnalysis(object):
+    '''The declarations and references of the names of a file.
+
+    The tree is walked once, the first time the analysis is queried, and
+    every identifier that declares or references a name is then mapped to
+    its binding, so looking one up is a dictionary access. Names that are
+    not declared in the tree, like globals, have no binding.
+    '''
+
+    def __init__(self, root):
+        self.root = root
+        self._bindings = None
+        self._references = None
+
+    def binding(self, identifier):
+        '''Get the binding an identifier declares or references
+
+        :param identifier: An Identifier node of the analysed tree
+        :return: The Binding, or None if the name is not declared
+        '''
+        if self._bindings is None:
+            self._build()
+        return self._bindings.get(id(identifier))
+
+    def constant_string(self, node):
+        '''Get the constant string an expression evaluates to, if it is a
+        name that always holds one
+
+        :param node: A node of the analysed tree
+        :return: The string, or None
+        '''
+        if not isinstance(node, Identifier):
+            return None
+        binding = self.binding(node)
+        if binding is None:
+            return None
+        return binding.constant_string
+
+    def _build(self):
+        self._bindings = {}
+        self._references = []
+        stack = [(self.root, Scope(None))]
+        while stack:
+            node, scope = stack.pop()
+            handler = getattr(self, '_visit_' + node.type, None)
+            if handler is None:
+                children = [(child, scope)
+                            for child in utils.iter_child_nodes(node)]
+            else:
+                children = handler(node, scope)
+            stack.extend(children)
+
+        # names are resolved once the whole tree is walked, as functions
+        # and var declarations are hoisted to the top of their scope
+        for identifier, scope, is_write in self._references:
+            binding = scope.lookup(identifier.name)
+            if binding is not None:
+                binding.references.append(identifier)
+                if is_write:
+                    binding.writes += 1
+                self._bindings[id(identifier)] = binding
+        self._references = None
+
+    def _declare(self, scope, identifier, kind, init=None):
+        binding = scope.bindings.get(identifier.name)
+        if binding is None or kind != 'var':
+            binding = scope.bindings[identifier.name] = Binding(
+                identifier.name, kind, identifier, init)
+        elif init is not None:
+            # var redeclared with a value assigns it again
+            binding.writes += 1
+        self._bindings[id(identifier)] = binding
+
+    def _bind_pattern(self, pattern, scope, bind):
+        '''Calls bind on each identifier a pattern binds, and returns the
+        expressions of the pattern, such as default values, to walk.'''
+        expressions = []
+        stack = [pattern]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Identifier):
+                bind(node)
+            elif node.type == 'AssignmentPattern':
+                stack.append(node.left)
+                expressions.append((node.right, scope))
+            elif node.type == 'ArrayPattern':
+                stack.extend(e for e in node.elements if e is not None)
+            elif node.type == 'ObjectPattern':
+                for prop in node.properties:
+                    if prop.type == 'RestElement':
+                        stack.append(prop.argument)
+                        continue
+                    if prop.computed:
+                        expressions.append((prop.key, scope))
+                    stack.append(prop.value)
+            elif node.type == 'RestElement':
+                stack.append(node.argument)
+            else:
+                # member expressions assigned to, like a.b = c
+                expressions.append((node, scope))
+        return expressions
+
+    def _declare_pattern(self, pattern, scope, kind, init=None):
+        return self._bind_pattern(
+            pattern, scope,
+            lambda identifier: self._declare(
+                scope, identifier, kind,
+                init if identifier is pattern else None))
+
+    def _write_pattern(self, pattern, scope):
+        return self._bind_pattern(
+            pattern, scope,
+            lambda identifier: self._references.append(
+                (identifier, scope, True)))
+
+    def _visit_function(self, node, scope):
+        function_scope = Scope(scope, is_function=True)
+        children = []
+        for param in node.params:
+            children.extend(self._declare_pattern(
+                param, function_scope, 'param'))
+        body = node.body
+        if body.type == 'BlockStatement':
+            # the body shares the scope of the parameters
+            children.extend((statement, function_scope)
+                            for statement in body.body)
+        else:
+            children.append((body, function_scope))
+        return children, function_scope
+
+    def _visit_FunctionDeclaration(self, node, scope):
+        if node.id is not None:
+            self._declare(scope.function_scope, node.id, 'function')
+        return self._visit_function(node, scope)[0]
+
+    def _visit_FunctionExpression(self, node, scope):
+        children, function_scope = self._visit_function(node, scope)
+        if node.id is not None:
+            self._declare(function_scope, node.id, 'function')
+        return children
+
+    def _visit_ArrowFunctionExpression(self, node, scope):
+        return self._visit_function(node, scope)[0]
+
+    def _visit_ClassDeclaration(self, node, scope):
+        if node.id is not None:
+            self._declare(scope, node.id, 'class')
+        return [(child, scope) for child in (node.superClass, node.body)
+                if child is not None]
+
+    def _visit_ClassExpression(self, node, scope):
+        return [(child, scope) for child in (node.superClass, node.body)
+                if child is not None]
+
+    def _visit_VariableDeclaration(self, node, scope):
+        target = scope.function_scope if node.kind == 'var' else scope
+        children = []
+        for declarator in node.declarations:
+            children.extend(self._declare_pattern(
+                declarator.id, target, node.kind, declarator.init))
+            if declarator.init is not None:
+                children.append((declarator.init, scope))
+        return children
+
+    def _visit_block(self, node, scope):
+        block_scope = Scope(scope)
+        return [(child, block_scope) for child in utils.iter_child_nodes(node)]
+
+    _visit_BlockStatement = _visit_block
+    _visit_ForStatement = _visit_block
+    _visit_SwitchStatement = _visit_block
+
+    def _visit_ForInStatement(self, node, scope):
+        block_scope = Scope(scope)
+        children = [(node.right, block_scope), (node.body, block_scope)]
+        if node.left.type == 'VariableDeclaration':
+            children.append((node.left, block_scope))
+        else:
+            children.extend(self._write_pattern(node.left, block_scope))
+        return children
+
+    _visit_ForOfStatement = _visit_ForInStatement
+
+    def _visit_CatchClause(self, node, scope):
+        block_scope = Scope(scope)
+        children = []
+        if node.param is not None:
+            children.extend(self._declare_pattern(
+                node.param, block_scope, 'catch'))
+        children.extend((statement, block_scope)
+                        for statement in node.body.body)
+        return children
+
+    def _visit_ImportSpecifier(self, node, scope):
+        self._declare(scope, node.local, 'import')
+        return []
+
+    def _visit_ExportSpecifier(self, node, scope):
+        return [(node.local, scope)]
+
+    def _visit_Identifier(self, node, scope):
+        self._references.append((node, scope, False))
+        return []
+
+    def _visit_AssignmentExpression(self, node, scope):
+        children = self._write_pattern(node.left, scope)
+        children.append((node.right, scope))
+        return children
+
+    def _visit_UpdateExpression(self, node, scope):
+        if isinstance(node.argument, Identifier):
+            self._references.append((node.argument, scope, True))
+            return []
+        return [(node.argument, scope)]
+
+    def _visit_MemberExpression(self, node, scope):
+        if node.computed:
+            return [(node.object, scope), (node.property, scope)]
+        return [(node.object, scope)]
+
+    def _visit_Property(self, node, scope):
+        if node.computed:
+            return [(node.key, scope), (node.value, scope)]
+        return [(node.value, scope)]
+
+    def _visit_MethodDefinition(self, node, scope):
+        return [(node.value, scope)]
+
+    def _visit_LabeledStatement(self, node, scope):
+        return [(node.body, scope)]
+
+    def _visit_BreakStatement(self, node, scope):
+        return []
+
+    _visit_ContinueStatement = _visit_BreakStatement
+    _visit_MetaProperty = _visit_BreakStatement
@@ -0,0 +1,234 @@
+# -*- coding:utf-8 -*-
+
+'''Semantic versions and npm style version ranges.
+
+Only what matching dependencies against advisories needs is supported:
+versions are ordered as semver 2.0.0 orders them, and ranges accept the
+syntax of npm's node-semver (comparators, hyphen ranges, x-ranges, tilde and
+caret ranges, joined by spaces and ``||``).
+'''
+
+import re
+
+
+_VERSION = re.compile(
+    r'^\s*[v=]?\s*(\d+)\.(\d+)\.(\d+)'
+    r'(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?\s*$')
+_PARTIAL = re.compile(
+    r'^[v=]?(\d+|[xX*])?(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?'
+    r'(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+_OPERATOR = re.compile(r'^(<=|>=|<|>|=|~>|~|\^)?(.*)$')
+_HYPHEN = re.compile(r'^\s*(\S+)\s+-\s+(\S+)\s*$')
+
+
+class Version(object):
+    '''A semantic version, ordered by precedence.'''
+
+    # whether the version is a bound made up by a range, rather than one
+    # written in it
+    synthetic = False
+
+    def __init__(self, major, minor, patch, prerelease=()):
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.prerelease = tuple(prerelease)
+        # releases sort after all of their prereleases, and numeric
+        # identifiers sort before alphanumeric ones
+        self._key = (major, minor, patch,
+                     (0, tuple((0, int(p), '') if p.isdigit() else (1, 0, p)
+                               for p in prerelease))
+                     if prerelease else (1,))
+
+    @classmethod
+    def parse(cls, text):
+        '''Parse a full version such as 1.2.3 or 1.2.3-beta.1
+
+        :param text: The version string
+        :return: The Version
+        :raises ValueError: if text is not a version
+        '''
+        match = _VERSION.match(text)
+        if not match:
+            raise ValueError("Invalid version: %r" % text)
+        major, minor, patch, prerelease = match.groups()
+        return cls(int(major), int(minor), int(patch),
+                   prerelease.split('.') if prerelease else ())
+
+    @property
+    def release(self):
+        return (self.major, self.minor, self.patch)
+
+    def __eq__(self, other):
+        return self._key == other._key
+
+    def __ne__(self, other):
+        return self._key != other._key
+
+    def __lt__(self, other):
+        return self._key < other._key
+
+    def __le__(self, other):
+        return self._key <= other._key
+
+    def __gt__(self, other):
+        return self._key > other._key
+
+    def __ge__(self, other):
+        return self._key >= other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        version = '%d.%d.%d' % self.release
+        if self.prerelease:
+            version += '-' + '.'.join(self.prerelease)
+        return version
+
+
+_COMPARE = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '=': lambda a, b: a == b,
+}
+
+
+class Range(object):
+    '''A set of versions, as written in package.json or an advisory.
+
+    The range is parsed once into alternatives of comparator lists, so
+    matching a version is a handful of tuple comparisons.
+    '''
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._alternatives = [_parse_comparators(alternative)
+                              for alternative in spec.split('||')]
+
+    def __contains__(self, version):
+        return self.match(version)
+
+    def match(self, version):
+        '''Return True if version is in the range
+
+        A prerelease only matches an alternative that names a prerelease of
+        the same major.minor.patch, as npm does.
+
+        :param version: A Version or a version string
+        :return: True or False
+        '''
+        if not isinstance(version, Version):
+            version = Version.parse(version)
+
+        for comparators in self._alternatives:
+            if not all(_COMPARE[op](version, bound)
+                       for op, bound in comparators):
+                continue
+            if not version.prerelease or any(
+                    bound.prerelease and not bound.synthetic and
+                    bound.release == version.release
+                    for _, bound in comparators):
+                return True
+        return False
+
+    def __repr__(self):
+        return 'Range(%r)' % self.spec
+
+
+def _parse_partial(text):
+    match = _PARTIAL.match(text)
+    if not match:
+        raise ValueError("Invalid version range: %r" % text)
+    major, minor, patch, prerelease = match.groups()
+    parts = [None if p is None or p in 'xX*' else int(p)
+             for p in (major, minor, patch)]
+    # anything after a wildcard is a wildcard too
+    for i in range(1, 3):
+        if parts[i - 1] is None:
+            parts[i] = None
+    return parts, prerelease.split('.') if prerelease else ()
+
+
+def _lowest(major, minor, patch):
+    '''The lowest version of a release, before all of its prereleases'''
+    version = Version(major, minor, patch, ('0',))
+    version.synthetic = True
+    return version
+
+
+def _bump(parts):
+    '''The first version after all the versions a partial version covers'''
+    if parts[1] is None:
+        return _lowest(parts[0] + 1, 0, 0)
+    return _lowest(parts[0], parts[1] + 1, 0)
+
+
+def _floor(parts, prerelease=()):
+    return Version(*[p or 0 for p in parts], prerelease=prerelease)
+
+
+def _parse_comparators(text):
+    text = text.strip()
+    # "1.2.3 - 2.3.4" is the inclusive set between the two versions
+    hyphen = _HYPHEN.match(text)
+    if hyphen:
+        low, low_pre = _parse_partial(hyphen.group(1))
+        high, high_pre = _parse_partial(hyphen.group(2))
+        comparators = []
+        if low[0] is not None:
+            comparators.append(('>=', _floor(low, low_pre)))
+        if high[2] is not None:
+            comparators.append(('<=', _floor(high, high_pre)))
+        elif high[0] is not None:
+            comparators.append(('<', _bump(high)))
+        return comparators
+
+    # operators may be separated from their version by spaces
+    text = re.sub(r'(<=|>=|<|>|=|~>|~|\^)\s+', r'\1', text)
+    comparators = []
+    for token in text.split():
+        comparators.extend(_desugar(token))
+    return comparators
+
+
+def _desugar(token):
+    operator, version = _OPERATOR.match(token).groups()
+    parts, prerelease = _parse_partial(version)
+    major, minor, patch = parts
+
+    if major is None:
+        # "*", "x" or "" match any release, "<*" and ">*" nothing
+        if operator in ('<', '>'):
+            return [('<', _lowest(0, 0, 0))]
+        return []
+
+    if operator in (None, '='):
+        if patch is not None:
+            return [('=', _floor(parts, prerelease))]
+        return [('>=', _floor(parts)), ('<', _bump(parts))]
+
+    if operator in ('~', '~>'):
+        upper = [major, minor, None] if minor is not None else parts
+        return [('>=', _floor(parts, prerelease)), ('<', _bump(upper))]
+
+    if operator == '^':
+        if major > 0 or minor is None:
+            upper = _lowest(major + 1, 0, 0)
+        elif minor > 0 or patch is None:
+            upper = _lowest(0, minor + 1, 0)
+        else:
+            upper = _lowest(0, 0, patch + 1)
+        return [('>=', _floor(parts, prerelease)), ('<', upper)]
+
+    if patch is not None:
+        return [(operator, _floor(parts, prerelease))]
+
+    # comparisons to partial versions compare to the whole block they cover
+    if operator == '>':
+        return [('>=', _bump(parts))]
+    if operator == '<=':
+        return [('<', _bump(parts))]
+    return [(operator, _floor(parts))]
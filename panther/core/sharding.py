@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+
+'''Deterministic partitioning of the files of a scan across machines.'''
+
+import hashlib
+import heapq
+import os
+
+
+def _stable_hash(fname):
+    # unlike hash(), the same on every machine and in every process
+    return hashlib.sha1(fname.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def _size(fname):
+    try:
+        return os.path.getsize(fname)
+    except OSError:
+        return 0
+
+
+def shard_files(files_list, index, count):
+    '''Get the files of one shard of a scan
+
+    Files are dealt out largest first, each to the shard with the fewest
+    bytes so far, so the shards scan about as many bytes each and finish at
+    about the same time. Files of the same size are dealt in the order of a
+    stable hash of their names and ties between shards go to the lowest
+    shard, so every machine given the same files computes the same shards.
+    The file names must therefore be the same on every machine, such as
+    paths relative to the root of the checkout.
+
+    :param files_list: The names of all the files of the scan
+    :param index: The shard to get, from 1 to count
+    :param count: The number of shards
+    :return: The names of the files of the shard, sorted
+    '''
+    if not 1 <= index <= count:
+        raise ValueError('shard %d is not between 1 and %d' % (index, count))
+
+    # every file costs a little, even when empty
+    weighted = sorted(((_size(fname) + 1, _stable_hash(fname), fname)
+                       for fname in set(files_list)),
+                      key=lambda item: (-item[0], item[1]))
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    selected = []
+    for weight, _, fname in weighted:
+        load, shard = heapq.heappop(loads)
+        if shard == index:
+            selected.append(fname)
+        heapq.heappush(loads, (load + weight, shard))
+    return sorted(selected)
+
+
+def parse_shard(value):
+    '''Parse a shard given as I/N, such as 2/4 for the second of four
+
+    :param value: The shard, as text
+    :return: A tuple of the shard index, from 1, and the number of shards
+    '''
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError('shard must be given as I/N, not %r' % value)
+    if not 1 <= index <= count:
+        raise ValueError('shard %s is not between 1/N and N/N' % value)
+    return index, count
@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+
+'''Index of the names referenced by every subtree of a file.'''
+
+from panther.core import utils
+from panther.core.visitor import Identifier
+from panther.core.visitor import Literal
+from panther.core.visitor import MemberExpression
+from panther.core.visitor import Property
+
+
+class SymbolIndex(object):
+    '''The identifier and property names referenced below each node.
+
+    Every distinct name is interned to a number, and the set of the numbers
+    of the names in the subtree of a node is computed, in a single
+    post-order pass over the subtree, the first time the node is queried.
+    The sets of the nodes queried are kept, and reused by the queries of
+    the nodes above them, while those of the other nodes are dropped once
+    computed. A node adding no name to a single child shares its set. A
+    query then checks the set against the numbers of the names matching a
+    pattern, which are only computed once for each name.
+
+    Names are the names of identifiers, and string literals used as
+    property names, as in obj['name'] or {'name': value}.
+    '''
+
+    def __init__(self, root):
+        self.root = root
+        self._symbols = {}
+        self._names = []
+        # the nodes are kept with their sets, so that their ids are not
+        # reused by other nodes
+        self._subtrees = {}
+        self._masks = {}
+
+    def _subtree(self, node):
+        known = self._subtrees.get(id(node))
+        if known is not None:
+            return known[1]
+
+        computed = {}
+        # children are pushed after their parent and popped before it, so
+        # each node is reached again once its whole subtree is indexed
+        stack = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if not children_done:
+                stack.append((current, True))
+                stack.extend((child, False)
+                             for child in utils.iter_child_nodes(current)
+                             if id(child) not in self._subtrees)
+                continue
+
+            own = set(self._intern(name) for name in _names(current))
+            subtrees = []
+            for child in utils.iter_child_nodes(current):
+                known = self._subtrees.get(id(child))
+                subtree = (known[1] if known is not None
+                           else computed.pop(id(child)))
+                if subtree:
+                    subtrees.append(subtree)
+            if not own and len(subtrees) == 1:
+                computed[id(current)] = subtrees[0]
+            else:
+                computed[id(current)] = own.union(*subtrees)
+
+        symbols = frozenset(computed[id(node)])
+        self._subtrees[id(node)] = (node, symbols)
+        return symbols
+
+    def _intern(self, name):
+        number = self._symbols.get(name)
+        if number is None:
+            number = self._symbols[name] = len(self._names)
+            self._names.append(name)
+        return number
+
+    def _mask(self, pattern):
+        # the numbers of the matching names, and how many names were checked
+        numbers, checked = self._masks.get(pattern, (frozenset(), 0))
+        if checked < len(self._names):
+            if hasattr(pattern, 'search'):
+                matches = pattern.search
+            else:
+                def matches(name):
+                    return pattern in name
+            numbers = numbers.union(
+                number for number in range(checked, len(self._names))
+                if matches(self._names[number]))
+            self._masks[pattern] = (numbers, len(self._names))
+        return numbers
+
+    def symbols(self, node):
+        '''Get the names referenced in the subtree of a node
+
+        :param node: A node
+        :return: A set of names
+        '''
+        return set(self._names[number] for number in self._subtree(node))
+
+    def references(self, node, pattern):
+        '''Check whether the subtree of a node references a matching name
+
+        :param node: A node
+        :param pattern: A substring of the name, or a compiled regular
+                        expression the name is searched with
+        :return: True or False
+        '''
+        symbols = self._subtree(node)
+        return not self._mask(pattern).isdisjoint(symbols)
+
+
+def _names(node):
+    if isinstance(node, Identifier):
+        return (node.name,)
+    if isinstance(node, MemberExpression) and node.computed:
+        key = node.property
+    elif isinstance(node, Property):
+        key = node.key
+    else:
+        return ()
+    if isinstance(key, Literal) and isinstance(key.value, str):
+        return (key.value,)
+    return ()
@@ -13,12 +13,13 @@ LOG = logging.getLogger(__name__)
 
 
 class PantherTester(object):
-    def __init__(self, testset, debug, nosec_lines):
+    def __init__(self, testset, debug, nosec_lines, timings=None):
         self.results = []
         self.testset = testset
         self.last_result = None
         self.debug = debug
         self.nosec_lines = nosec_lines
+        self.timings = timings
 
     def run_tests(self, raw_context, checktype):
         '''Runs all tests for a certain type of check, for example
@@ -44,15 +45,24 @@ class PantherTester(object):
             temp_context = copy.copy(raw_context)
             context = p_context.Context(temp_context)
             try:
-                if hasattr(test, '_config'):
-                    result = test(context, test._config)
+                if self.timings is None:
+                    result = self._run_test(test, context)
                 else:
-                    result = test(context)
+                    with self.timings.time('tests', name):
+                        result = self._run_test(test, context)
 
-                # if we have a result, record it and update scores
-                if (result is not None and
-                        result.lineno not in self.nosec_lines and
-                        temp_context['lineno'] not in self.nosec_lines):
+                # a test may report several issues for the same node
+                if isinstance(result, list):
+                    results = result
+                else:
+                    results = [result]
+
+                for result in results:
+                    # if we have a result, record it and update scores
+                    if (result is None or
+                            result.lineno in self.nosec_lines or
+                            temp_context['lineno'] in self.nosec_lines):
+                        continue
 
                     if isinstance(temp_context['filename'], bytes):
                         result.fname = temp_context['filename'].decode('utf-8')
@@ -62,7 +72,8 @@ class PantherTester(object):
                     if result.lineno is None:
                         result.lineno = temp_context['lineno']
                     result.linerange = temp_context['linerange']
-                    result.test = name
+                    if not result.test:
+                        result.test = name
                     if result.test_id == "":
                         result.test_id = test._test_id
 
@@ -83,6 +94,12 @@ class PantherTester(object):
         LOG.debug("Returning scores: %s", scores)
         return scores
 
+    @staticmethod
+    def _run_test(test, context):
+        if hasattr(test, '_config'):
+            return test(context, test._config)
+        return test(context)
+
     @staticmethod
     def report_error(test, context, error):
         what = "Panther internal error running: "
@@ -1,9 +1,12 @@
 import logging
+import operator
+
 from panther.core import config
+from panther.core import constants
+from panther.core import manager
 from panther.core import meta_ast
 from panther.core import metrics
 from panther.core import node_visitor
-from panther.core import test_set
 from panther.core.tracer.file_extractor import FileExtractor
 from panther.core import utils
 from panther.core.visitor import CallExpression
@@ -11,23 +14,17 @@ from panther.core.visitor import CallExpression
 LOG = logging.getLogger(__name__)
 
 
-class colors(object):
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKGREEN = '\033[92m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-
-
 class Diver(object):
-    def __init__(self, routes, debug=False):
+    def __init__(self, routes, debug=False, extractor=None, agg_type='file'):
         self.routes = routes
-        self.extractor = FileExtractor()
+        self.extractor = extractor or FileExtractor()
         self.vulnerability_count = 0
         self.debug = debug
+        # Findings are collected into a regular manager so that they can be
+        # reported through any of the output formatters.
+        self.manager = manager.PantherManager(config.PantherConfig(),
+                                              agg_type, debug)
+        self.file_scores = {}
 
     def find(self, function):
         '''Find and return functions that are called in a given function.
@@ -51,13 +48,13 @@ class Diver(object):
                     # So we get the first element of the list which
                     # contains *function_name. Then we remove the star
                     # character to get the actual name.
-                    identifier = utils.extract_name_space(
+                    identifier = utils.get_name_space(
                         call_expression)[0][1:]
                     callee = self.extractor.try_match_function(
                         file_path, identifier)
                 # Check whether we have a call like module.fn()
                 elif utils.match_name_space(call_expression, ['*', '*']):
-                    name_space = utils.extract_name_space(call_expression)
+                    name_space = utils.get_name_space(call_expression)
                     # Since we get an array of the form ['*module_name','*fn_name']
                     # we use below indexing to extract module_name and identifier.
                     module_name = name_space[0][1:]
@@ -69,25 +66,26 @@ class Diver(object):
 
         return function_list
 
-    def test(self, file_path, node):
-        '''Test a given function node with plugins
-        and returns test results.
+    def visit(self, file_path, node):
+        '''Run the plugins against a given function node and
+        return the node visitor holding the results and scores.
         '''
         nv = node_visitor.PantherNodeVisitor(
             file_path,
             meta_ast.PantherMetaAst(),
-            test_set.PantherTestSet(config, profile=None),
+            self.manager.p_ts,
             True,
             set(),
             metrics.Metrics()
         )
         nv.generic_visit(node)
-        # TODO(izel): Do something with results.
-        # if nv.tester.results:
-        #     print(nv.tester.results[0].__dict__)
+        return nv
 
-        # print(nv.scores)
-        return nv.tester.results
+    def test(self, file_path, node):
+        '''Test a given function node with plugins
+        and returns test results.
+        '''
+        return self.visit(file_path, node).tester.results
 
     def dive_all(self, file_path, depth=1):
         '''Each route has an array of entry functions to start diving process.
@@ -95,23 +93,44 @@ class Diver(object):
         the vulnerabilities.
         '''
         self.vulnerability_count = 0
+        self.manager.results = []
+        self.manager.scores = []
+        self.manager.metrics = metrics.Metrics()
+        self.file_scores = {}
         for route in self.routes:
             for function in route.entry_point_functions:
                 self.dive(function, [route], depth)
 
+        self.update_metrics()
         return self.vulnerability_count
 
-    def format_stack_trace(self, stack_trace):
-        '''Format an array of functions with a splitter.'''
-        return '\n----------------\n'.join(map(repr, stack_trace))
+    def record(self, function, nv, stack_trace):
+        '''Add the issues found in a function to the result store.
 
-    def format_issues(self, results):
-        '''Format an array of issues'''
-        msgs = [
-            "\nLine: %s - %s\n%s" % (issue.lineno, issue.text, issue.get_code())
-            for issue in results
-        ]
-        return '----------------\n'.join(msgs)
+        The call path is attached as the traced objects themselves; it is
+        only formatted when an issue is actually output.
+        '''
+        call_path = tuple(stack_trace)
+        for result in nv.tester.results:
+            result.call_path = call_path
+        self.manager.results.extend(nv.tester.results)
+
+        scores = self.file_scores.setdefault(function.file_path, {
+            'SEVERITY': [0] * len(constants.RANKING),
+            'CONFIDENCE': [0] * len(constants.RANKING)
+        })
+        for score_type in scores:
+            scores[score_type] = list(map(
+                operator.add, scores[score_type], nv.scores[score_type]))
+
+    def update_metrics(self):
+        '''Fill the result store metrics with the traced files.'''
+        self.manager.files_list = sorted(self.file_scores)
+        for fname in self.manager.files_list:
+            self.manager.metrics.begin(fname)
+            self.manager.metrics.count_issues([self.file_scores[fname]])
+            self.manager.scores.append(self.file_scores[fname])
+        self.manager.metrics.aggregate()
 
     def dive(self, function, stack_trace, depth):
         '''Search recursively for vulnerabilities. Stop when either
@@ -119,24 +138,14 @@ class Diver(object):
         '''
         depth -= 1
         stack_trace.append(function)
-        test_result = self.test(function.file_path, function.node)
-        if test_result:
-            formatted_stack_trace = self.format_stack_trace(stack_trace)
-            formatted_report = self.format_issues(test_result)
-            header_text = colors.HEADER + '\n============================\n' + colors.ENDC
-            print(
-                header_text + colors.OKBLUE + formatted_stack_trace + colors.ENDC,
-                colors.WARNING + formatted_report + colors.ENDC
-            )
+        nv = self.visit(function.file_path, function.node)
+        if nv.tester.results:
+            self.record(function, nv, stack_trace)
             self.vulnerability_count += 1
+        elif not depth:
+            LOG.debug("Path search finished but nothing found: %s",
+                      stack_trace)
         else:
-            if not depth:
-                if self.debug:
-                    formatted_stack_trace = self.format_stack_trace(stack_trace)
-                    header_text = '\n\nPath search finished but nothing found. See stack trace below.\n\n'
-                    print(header_text, formatted_stack_trace)
-            else:
-                other_functions = self.find(function)
-                if other_functions:
-                    for function in other_functions:
-                        self.dive(function, stack_trace, depth)
+            for other_function in self.find(function):
+                self.dive(other_function, stack_trace, depth)
+        stack_trace.pop()
@@ -10,6 +10,23 @@ class Function(object):
         ls = []
         ls.append("File Path: '%s'" % self.file_path)
         ls.append("Identifier: '%s'" % (
-            '[Anonymous]' if self.identifier is None else self.identifier))
+            '[Anonymous]' if self.name is None else self.name))
         ls.append("Caller: '%s'" % self.caller)
         return '\n'.join(ls)
+
+    @property
+    def name(self):
+        '''Name of the function, None for anonymous functions.'''
+        # Anonymous callbacks found by the route finder carry the (possibly
+        # empty) id node of their function expression as identifier.
+        return getattr(self.identifier, 'name', self.identifier)
+
+    def as_dict(self):
+        '''Convert the function to a dict of values for outputting.'''
+        loc = getattr(self.node, 'loc', None) or {}
+        return {
+            'file_path': self.file_path,
+            'identifier': self.name,
+            'caller': self.caller,
+            'line_number': loc.get('start', {}).get('line'),
+        }
@@ -10,3 +10,10 @@ class Route(object):
         ls.append("Method: '%s'" % self.method)
 
         return '\n'.join(ls)
+
+    def as_dict(self):
+        '''Convert the route to a dict of values for outputting.'''
+        return {
+            'method': self.method,
+            'pattern': self.pattern,
+        }
@@ -1,4 +1,11 @@
+import collections
+import hashlib
+import logging
 import os
+import pickle
+import zlib
+
+from panther.core import constants
 from panther.core.pyesprima import esprima
 from panther.core.tracer.entities.function import Function
 from panther.core import utils
@@ -11,12 +18,129 @@ from panther.core.visitor import Identifier
 from panther.core.visitor import VariableDeclaration
 from panther.core.visitor import VariableDeclarator
 
+LOG = logging.getLogger(__name__)
+
+
+class ProgramCache(object):
+    '''Size bounded LRU cache of parsed programs.
+
+    The size of the cache is measured in AST nodes. When the programs held
+    exceed max_nodes the least recently used ones are evicted. The most
+    recently added program is always kept, even if it is larger than the
+    bound on its own. If spill_dir is given, evicted programs are written
+    there as compressed pickles and loaded back on the next access instead
+    of being parsed again.
+    '''
+
+    def __init__(self, max_nodes=constants.TRACER_CACHE_MAX_NODES,
+                 spill_dir=None):
+        self.max_nodes = max_nodes
+        self.spill_dir = spill_dir
+        self.node_count = 0
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+        self._programs = collections.OrderedDict()
+        self._spilled = {}
+
+        if spill_dir and not os.path.isdir(spill_dir):
+            os.makedirs(spill_dir)
+
+    def __contains__(self, file_path):
+        return file_path in self._programs or file_path in self._spilled
+
+    def __len__(self):
+        return len(self._programs)
+
+    def get(self, file_path):
+        '''Return the cached program of file_path or None.
+
+        Hits and misses are counted, a program loaded back from the spill
+        directory counts as a hit.
+        '''
+        entry = self._programs.get(file_path)
+        if entry is not None:
+            self._programs.move_to_end(file_path)
+            self.hits += 1
+            return entry[0]
+
+        program = self._load_spilled(file_path)
+        if program is not None:
+            self.hits += 1
+            self.spill_hits += 1
+            self.put(file_path, program)
+            return program
+
+        self.misses += 1
+        return None
+
+    def put(self, file_path, program):
+        '''Add a program to the cache and evict programs over the bound.'''
+        if file_path in self._programs:
+            self.node_count -= self._programs.pop(file_path)[1]
+
+        size = sum(1 for _ in program.traverse())
+        self._programs[file_path] = (program, size)
+        self.node_count += size
+
+        while self.node_count > self.max_nodes and len(self._programs) > 1:
+            evicted_path, (evicted, evicted_size) = self._programs.popitem(
+                last=False)
+            self.node_count -= evicted_size
+            self.evictions += 1
+            self._spill(evicted_path, evicted)
+
+    def stats(self):
+        '''Return the cache counters as a dictionary.'''
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'spill_hits': self.spill_hits,
+            'evictions': self.evictions,
+            'programs': len(self._programs),
+            'nodes': self.node_count,
+        }
+
+    def _spill_path(self, file_path):
+        digest = hashlib.sha1(file_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, digest + '.ast')
+
+    def _spill(self, file_path, program):
+        if not self.spill_dir or file_path in self._spilled:
+            return
+        spill_path = self._spill_path(file_path)
+        try:
+            data = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+            with open(spill_path, 'wb') as f:
+                f.write(zlib.compress(data))
+        except (IOError, OSError, RecursionError, pickle.PicklingError) as e:
+            LOG.debug("Unable to spill AST of %s: %s", file_path, e)
+            return
+        self._spilled[file_path] = spill_path
+
+    def _load_spilled(self, file_path):
+        spill_path = self._spilled.get(file_path)
+        if spill_path is None:
+            return None
+        try:
+            with open(spill_path, 'rb') as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except (IOError, OSError, zlib.error, pickle.UnpicklingError) as e:
+            LOG.debug("Unable to load spilled AST of %s: %s", file_path, e)
+            del self._spilled[file_path]
+            return None
+
 
 class FileExtractor(object):
 
-    def __init__(self):
+    def __init__(self, max_cache_nodes=constants.TRACER_CACHE_MAX_NODES,
+                 spill_dir=None):
+        # Imports and the names and locations of function definitions are
+        # small, so they stay resident. Only the full programs are kept in
+        # the bounded cache, and function nodes are found in them on use.
         self.import_cache = {}
-        self.program_cache = {}
+        self.program_cache = ProgramCache(max_cache_nodes, spill_dir)
         self.function_definition_cache = {}
 
     def create_program_cache(self, file_path):
@@ -27,7 +151,8 @@ class FileExtractor(object):
             code = f.read()
         json_program = esprima.parse(code, {'loc': True})
         ast_program = visitor.objectify(json_program.to_dict())
-        self.program_cache[file_path] = ast_program
+        self.program_cache.put(file_path, ast_program)
+        return ast_program
 
     def create_import_cache(self, file_path):
         '''Extract all imports using the AST of a program and
@@ -55,8 +180,10 @@ class FileExtractor(object):
 
     def create_function_definition_cache(self, file_path):
         '''Extract all function definitions using the AST of a program and
-        builds a dictionary of the form <variable_name, (FunctionDeclaration | FunctionExpression)>
-        and saves to cache file_path as key.
+        builds a dictionary of the form <variable_name, location> and saves
+        to cache file_path as key. The location is the line and column of
+        the FunctionDeclaration or FunctionExpression, so the cache holds
+        no node of the program.
         Supported Patterns:
             1) var x = fn(...):
             2) var x = fn(...), y = fn2(...)
@@ -78,14 +205,14 @@ class FileExtractor(object):
                 # Check whether it is resolved.
                 if last_name.startswith('*'):
                     resolved_name = last_name[1:]
-                    return (resolved_name, function_expression)
+                    return (resolved_name, _location(function_expression))
 
             return None
 
         for node in program.traverse():
             # Check for function x(){}
             if isinstance(node, FunctionDeclaration):
-                function_definitions[node.id.name] = node
+                function_definitions[node.id.name] = _location(node)
             # Check for var x = function(){}
             elif isinstance(node, AssignmentExpression) and node.operator == '=':
                 resolved_assignment = check_variable_assignment_function(
@@ -114,10 +241,11 @@ class FileExtractor(object):
         '''Serve the AST of the program. If the AST is present in the cache
         it returns the cached entry else it builds the cache and returns.
         '''
-        if file_path not in self.program_cache:
-            self.create_program_cache(file_path)
+        program = self.program_cache.get(file_path)
+        if program is None:
+            program = self.create_program_cache(file_path)
 
-        return self.program_cache[file_path]
+        return program
 
     def get_function_definitions(self, file_path):
         '''Serve the function definitions of a program. If function declarations are
@@ -140,7 +268,18 @@ class FileExtractor(object):
         identifier and returns if a match is found.
         '''
         function_definitions = self.get_function_definitions(file_path)
-        function_node = function_definitions.get(identifier, None)
+        location = function_definitions.get(identifier, None)
+        if location is None:
+            return None
+
+        # the node is looked up in the program as it is now, which may have
+        # been parsed again or loaded back since the definitions were found
+        function_node = None
+        for node in self.get_program(file_path).traverse():
+            if (isinstance(node, (FunctionDeclaration, FunctionExpression)) and
+                    _location(node) == location):
+                function_node = node
+                break
         if function_node is None:
             return None
 
@@ -165,3 +304,8 @@ class FileExtractor(object):
 
         function.caller = '%s.%s' % (module_name, identifier)
         return function
+
+
+def _location(node):
+    start = node.loc['start']
+    return (start['line'], start['column'])
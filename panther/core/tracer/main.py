@@ -1,7 +1,11 @@
 import argparse
 import logging
+import sys
 
+from panther.core import constants
+from panther.core import extension_loader
 from panther.core.tracer.diver import Diver
+from panther.core.tracer.file_extractor import FileExtractor
 from panther.core.tracer.route_finder import RouteFinder
 
 
@@ -27,15 +31,49 @@ def main():
         action='store', default=1, type=int,
         help='maximum analysis depth to backtrace vulnerabilities'
     )
+    parser.add_argument(
+        '--cache-nodes', dest='cache_nodes',
+        action='store', default=constants.TRACER_CACHE_MAX_NODES, type=int,
+        help='maximum number of AST nodes to keep in memory'
+    )
+    parser.add_argument(
+        '--cache-dir', dest='cache_dir',
+        action='store', default=None, type=str,
+        help='directory to spill evicted ASTs to instead of parsing again'
+    )
+    parser.add_argument(
+        '-n', '--number', dest='context_lines',
+        action='store', default=3, type=int,
+        help='maximum number of code lines to output for each issue'
+    )
+    output_format = 'screen' if sys.stdout.isatty() else 'txt'
+    parser.add_argument(
+        '-f', '--format', dest='output_format', action='store',
+        default=output_format, help='specify output format',
+        choices=sorted(extension_loader.MANAGER.formatter_names)
+    )
+    parser.add_argument(
+        '-o', '--output', dest='output_file', action='store', nargs='?',
+        type=argparse.FileType('w'), default=sys.stdout,
+        help='write report to filename'
+    )
 
     args = parser.parse_args()
 
-    route_finder = RouteFinder()
+    extractor = FileExtractor(args.cache_nodes, args.cache_dir)
+    route_finder = RouteFinder(extractor)
     routes = []
     for entry_point in args.entry_points:
         routes.extend(route_finder.fetch_routes(entry_point))
-    diver = Diver(routes, args.debug)
+    diver = Diver(routes, args.debug, extractor)
     diver.dive_all(entry_point, depth=args.depth)
+    LOG.debug("AST cache: %s", extractor.program_cache.stats())
+
+    diver.manager.output_results(args.context_lines,
+                                 constants.LOW,
+                                 constants.LOW,
+                                 args.output_file,
+                                 args.output_format)
 
 
 if __name__ == '__main__':
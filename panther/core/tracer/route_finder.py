@@ -10,9 +10,11 @@ from panther.core.visitor import MemberExpression
 
 class RouteFinder(object):
 
-    def __init__(self):
+    def __init__(self, extractor=None):
         self.methods = ['get', 'post', 'put', 'delete', 'patch']
-        self.extractor = FileExtractor()
+        self.method_calls = utils.NameSpaceTrie(
+            (['*', '*' + method], method) for method in self.methods)
+        self.extractor = extractor or FileExtractor()
 
     def fetch_routes(self, file_path):
         '''Tries to find routes of a file.
@@ -24,7 +26,7 @@ class RouteFinder(object):
         for node in program.traverse():
             if isinstance(node, CallExpression):
                 for method in self.methods:
-                    if utils.match_name_space(node, ['*', '*' + method]):
+                    if method in self.method_calls.match_node(node):
                         # Check whether we have any arguments
                         if node.arguments:
                             # Check whether first argument is a route pattern.
@@ -7,11 +7,13 @@ import os.path
 import re
 import sys
 
-from panther.core import visitor
+from panther.core.visitor import BinaryExpression
 from panther.core.visitor import CallExpression
 from panther.core.visitor import Identifier
 from panther.core.visitor import Literal
 from panther.core.visitor import MemberExpression
+from panther.core.visitor import NewExpression
+from panther.core.visitor import Node
 from panther.core.visitor import ObjectExpression
 
 try:
@@ -200,28 +202,28 @@ def escaped_bytes_representation(b):
     return b.decode('unicode_escape').encode('unicode_escape')
 
 
+def iter_child_nodes(node):
+    '''Yields the child nodes of a node, in the order of its fields.'''
+    for field in node.fields:
+        value = getattr(node, field)
+        if isinstance(value, Node):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    yield item
+
+
 def linerange(node):
-    """Get line number range from a node."""
-    strip = {"body": None, "orelse": None,
-             "handlers": None, "finalbody": None}
-    for key in strip.keys():
-        if hasattr(node, key):
-            strip[key] = getattr(node, key)
-            setattr(node, key, [])
-
-    lines_min = 9999999999
-    lines_max = -1
-    for n in visitor.objectify(node).traverse():
-        if hasattr(n, 'lineno'):
-            lines_min = min(lines_min, n.lineno)
-            lines_max = max(lines_max, n.lineno)
-
-    for key in strip.keys():
-        if strip[key] is not None:
-            setattr(node, key, strip[key])
-
-    if lines_max > -1:
-        return list(range(lines_min, lines_max + 1))
+    """Get line number range from a node.
+
+    This is the range of lines the node spans in the source, read from the
+    location esprima attaches to every node, so it costs the same whatever
+    the size of the subtree.
+    """
+    loc = getattr(node, 'loc', None)
+    if loc:
+        return list(range(loc['start']['line'], loc['end']['line'] + 1))
     return [0, 1]
 
 
@@ -237,6 +239,48 @@ def linerange_fix(node):
     return lines
 
 
+def get_concat_operands(node):
+    '''Flatten a chain of (+) expressions into its operands.
+
+    'a' + b + 'c' is parsed into nested BinaryExpressions, one per (+). The
+    chain is walked once from its outermost expression, whose operands are
+    cached on the node, and every nested (+) expression of the chain is
+    marked with that root so get_concat_root can tell it is already covered.
+
+    :param node: (BinaryExpression) The outermost (+) expression of a chain
+    :returns: (List) The operands of the chain, from left to right
+    '''
+    operands = getattr(node, '_concat_operands', None)
+    if operands is None:
+        operands = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if _is_plus(current):
+                if current is not node:
+                    current._concat_root = node
+                stack.append(current.right)
+                stack.append(current.left)
+            else:
+                operands.append(current)
+        node._concat_operands = operands
+    return operands
+
+
+def get_concat_root(node):
+    '''Get the outermost (+) expression of a flattened chain node is part of
+
+    :param node: (BinaryExpression) A (+) expression
+    :returns: The root expression, or None if node is not nested in a chain
+              that get_concat_operands has flattened
+    '''
+    return getattr(node, '_concat_root', None)
+
+
+def _is_plus(node):
+    return isinstance(node, BinaryExpression) and node.operator == '+'
+
+
 def concat_string(node, stop=None):
     '''Builds a string from a ast.BinOp chain.
 
@@ -441,6 +485,33 @@ def extract_name_space(call_expression):
     return extract_name_space_from_expression(expression)
 
 
+def get_name_space(expression):
+    '''Gets the name space of a call or new expression, or of an expression.
+
+    The name space is extracted once per node and kept on it, so checking
+    a call against several patterns does not walk its callee again.
+
+    :param expression: A CallExpression or NewExpression, or the
+                       expression to extract from
+    :returns: (Tuple) The names, see extract_name_space_from_expression
+    '''
+    name_space = getattr(expression, '_name_space', None)
+    if name_space is None:
+        if isinstance(expression, CallExpression):
+            name_space = extract_name_space(expression)
+        elif isinstance(expression, NewExpression):
+            name_space = extract_name_space_from_expression(
+                expression.callee)
+        else:
+            name_space = extract_name_space_from_expression(expression)
+        name_space = tuple(name_space)
+        try:
+            expression._name_space = name_space
+        except AttributeError:
+            pass
+    return name_space
+
+
 def match_pattern(name, pattern):
     '''This is a helper function for matching
     patterns in a name space search. So if a '*' is
@@ -484,10 +555,7 @@ def match_name_space(expression, pattern_list):
 
     '''
 
-    if isinstance(expression, CallExpression):
-        name_space_list = extract_name_space(expression)
-    else:
-        name_space_list = extract_name_space_from_expression(expression)
+    name_space_list = get_name_space(expression)
 
     # If pattern_list contains no element or there is
     # length mismatch return False.
@@ -503,6 +571,76 @@ def match_name_space(expression, pattern_list):
     return True
 
 
+class NameSpaceTrie(object):
+    '''A set of name space patterns, matched all at once.
+
+    Patterns are the pattern lists match_name_space takes, each stored with
+    a value. They share a trie keyed by pattern element, so a name space is
+    checked against every pattern in a single walk that follows, at each
+    name, the exact name and the bare '*' or '?' it also matches.
+
+    Example:
+
+        CALLS = NameSpaceTrie([(['*db', '*', '*find'], 'find'),
+                               (['*db', '*runCommand'], 'runCommand')])
+        CALLS.match_node(node)  # => frozenset(['find']) for db.users.find()
+    '''
+
+    def __init__(self, patterns=()):
+        self._root = ({}, [])
+        for pattern_list, value in patterns:
+            self.add(pattern_list, value)
+
+    def add(self, pattern_list, value):
+        '''Adds a pattern list, matched as in match_name_space.
+
+        :param pattern_list: (List) The patterns of each name
+        :param value: The value a match of the pattern list returns
+        '''
+        if not pattern_list:
+            raise ValueError('Please supply a non empty pattern list.')
+        children, values = self._root
+        for pattern in pattern_list:
+            children, values = children.setdefault(pattern, ({}, []))
+        values.append(value)
+
+    def match(self, name_space):
+        '''Gets the values of all the pattern lists a name space matches.
+
+        :param name_space: The names, as returned by get_name_space
+        :returns: (Frozenset) The matched values
+        '''
+        frontier = [self._root]
+        for name in name_space:
+            keys = (name, name[0]) if len(name) > 1 else (name,)
+            frontier = [children[key]
+                        for children, _ in frontier
+                        for key in keys if key in children]
+            if not frontier:
+                return frozenset()
+        return frozenset(value for _, values in frontier for value in values)
+
+    def match_node(self, expression):
+        '''Like match, for the name space of a call or an expression.
+
+        The result is kept on the node, so every plugin asking about the
+        same node and trie shares a single lookup.
+
+        :param expression: A CallExpression, or an expression
+        :returns: (Frozenset) The matched values
+        '''
+        matches = getattr(expression, '_name_space_matches', None)
+        if matches is None:
+            matches = {}
+            try:
+                expression._name_space_matches = matches
+            except AttributeError:
+                pass
+        if self not in matches:
+            matches[self] = self.match(get_name_space(expression))
+        return matches[self]
+
+
 def match_argument_with_object_key(call_expression, pattern_key):
     ''''It checks whether a call expression has one argument and
         this argument is an object and has a specific pattern of
@@ -516,29 +654,39 @@ def match_argument_with_object_key(call_expression, pattern_key):
 
     # Check whether there is only one argument and it is an object.
     if len(node.arguments) == 1 and isinstance(node.arguments[0], ObjectExpression):
-        object_expression = node.arguments[0]
-
-        # Loop over each property if there is match in the name return True.
-        for prop in object_expression.properties:
-            # If the property is computed and the type is identifier
-            # we cannot know the name. So in that case disable conversion.
-            #
-            # Example:
-            #   var o = {[prop]: 'hey'};
-            #
-            # *prop should not match the above statement but ?Identifier
-            # should match.
-
-            disable_conversion = prop.computed and isinstance(
-                prop.key, Identifier)
-
-            name = extract_name(prop.key, disable_conversion)
+        # If there is match in the name of any key return True.
+        for name in get_object_keys(node.arguments[0]):
             if match_pattern(name, pattern_key):
                 return True
 
     return False
 
 
+def get_object_keys(object_expression):
+    '''Gets the names of the keys of an object expression, in the form
+    extract_name gives them.
+
+    :param object_expression: (ObjectExpression) The object literal
+    :returns: (List) The names of the keys, in order
+    '''
+    names = []
+    for prop in object_expression.properties:
+        # If the property is computed and the type is identifier
+        # we cannot know the name. So in that case disable conversion.
+        #
+        # Example:
+        #   var o = {[prop]: 'hey'};
+        #
+        # *prop should not match the above statement but ?Identifier
+        # should match.
+
+        disable_conversion = prop.computed and isinstance(
+            prop.key, Identifier)
+
+        names.append(extract_name(prop.key, disable_conversion))
+    return names
+
+
 def try_extract_string_value(node):
     '''Tries to extract a string from a node.'''
 
@@ -117,7 +117,7 @@ def report(manager, fileobj, sev_level, conf_level, lines=-1):
         machine_output['results'] = sorted(collector,
                                            key=itemgetter('filename'))
 
-    machine_output['metrics'] = manager.metrics.data
+    machine_output['metrics'] = manager.metrics.as_dict()
 
     # timezone agnostic format
     TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
@@ -0,0 +1,63 @@
+# -*- coding:utf-8 -*-
+
+r"""
+================================
+Newline delimited JSON formatter
+================================
+
+This formatter outputs one JSON document per issue, one issue per line. It
+suits log shippers and dashboards that consume a stream of findings. Each
+line has the same keys as an entry of the ``results`` list of the JSON
+formatter; skipped files and metrics are not part of the stream.
+
+:Example:
+
+.. code-block:: javascript
+
+    {"code": "1 eval('2*2')\n", "filename": "examples/eval.js", ...}
+    {"code": "3 exec(cmd)\n", "filename": "examples/exec.js", ...}
+
+"""
+# Necessary so we can import the standard library json module while continuing
+# to name this file ndjson.py. (Python 2 only)
+from __future__ import absolute_import
+
+import json
+import logging
+import operator
+import sys
+
+from panther.core import test_properties
+
+LOG = logging.getLogger(__name__)
+
+
+@test_properties.accepts_baseline
+def report(manager, fileobj, sev_level, conf_level, lines=-1):
+    '''Prints issues in newline delimited JSON format
+
+    :param manager: the panther manager object
+    :param fileobj: The output file object, which may be sys.stdout
+    :param sev_level: Filtering severity level
+    :param conf_level: Filtering confidence level
+    :param lines: Number of lines to report, -1 for all
+    '''
+
+    results = manager.get_issue_list(sev_level=sev_level,
+                                     conf_level=conf_level)
+
+    baseline = not isinstance(results, list)
+
+    keyfunc = operator.attrgetter(
+        'test' if manager.agg_type == 'vuln' else 'fname')
+
+    with fileobj:
+        for r in sorted(results, key=keyfunc):
+            d = r.as_dict()
+            if baseline and len(results[r]) > 1:
+                d['candidates'] = [c.as_dict() for c in results[r]]
+            fileobj.write(json.dumps(d, sort_keys=True))
+            fileobj.write('\n')
+
+    if fileobj.name != sys.stdout.name:
+        LOG.info("NDJSON output written to file: %s", fileobj.name)
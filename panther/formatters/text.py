@@ -61,6 +61,20 @@ def get_metrics(manager):
     return '\n'.join([bit for bit in bits])
 
 
+def get_timings(manager):
+    bits = []
+    bits.append("\nRun timings:")
+    bits.extend(utils.format_timings(manager.metrics.data['_timings']))
+    return '\n'.join([bit for bit in bits])
+
+
+def get_slowest(manager):
+    bits = []
+    bits.append("\nRun costs:")
+    bits.extend(utils.format_slowest(manager.metrics.data['_slowest']))
+    return '\n'.join([bit for bit in bits])
+
+
 def _output_issue_str(issue, indent, show_lineno=True, show_code=True,
                       lines=-1):
     # returns a list of lines that should be added to the existing lines list
@@ -74,6 +88,13 @@ def _output_issue_str(issue, indent, show_lineno=True, show_code=True,
     bits.append("%s   Location: %s:%s" % (
         indent, issue.fname, issue.lineno if show_lineno else ""))
 
+    if issue.call_path:
+        bits.append("%s   Call path: %s" % (
+            indent, utils.format_call_path(issue)))
+
+    if issue.introduced_by:
+        bits.append("%s   Introduced by: %s" % (indent, issue.introduced_by))
+
     if show_code:
         bits.extend([indent + l for l in
                      issue.get_code(lines, True).split('\n')])
@@ -136,9 +157,20 @@ def report(manager, fileobj, sev_level, conf_level, lines=-1):
 
     bits.append('\tTotal lines skipped (//nosec): %i' %
                 (manager.metrics.data['_totals']['nosec']))
+    if '_deduplicated' in manager.metrics.data:
+        bits.append('\tFiles with the same contents as another file: %i' %
+                    (manager.metrics.data['_deduplicated']['files']))
+    if '_minified' in manager.metrics.data:
+        bits.extend(utils.format_minified(manager.metrics.data['_minified']))
+    if '_stopped' in manager.metrics.data:
+        bits.extend(utils.format_stopped(manager.metrics.data['_stopped']))
 
     skipped = manager.get_skipped()
     bits.append(get_metrics(manager))
+    if '_timings' in manager.metrics.data:
+        bits.append(get_timings(manager))
+    if '_slowest' in manager.metrics.data:
+        bits.append(get_slowest(manager))
     bits.append("Files skipped (%i):" % len(skipped))
     bits.extend(["\t%s (%s)" % skip for skip in skipped])
     result = '\n'.join([bit for bit in bits]) + '\n'
@@ -1,6 +1,7 @@
 """Utility functions for formatting plugins for Panther."""
 
 import io
+import math
 
 import six
 
@@ -28,3 +29,100 @@ def convert_file_contents(text):
     if not six.PY2:
         return text
     return str(text.encode('utf-8'))
+
+
+def format_call_path(issue):
+    """Format the call path of a traced issue on a single line."""
+    steps = []
+    for step in issue.get_call_path():
+        # a path starts at the route whose handler led to the issue
+        if 'pattern' in step:
+            steps.append("%s %s" % (step['method'], step['pattern']))
+        else:
+            steps.append("%s:%s" % (step['file_path'],
+                                    step['identifier'] or '[Anonymous]'))
+    return ' -> '.join(steps)
+
+
+def format_timings(timings, limit=10):
+    """Format the timings of a scan as lines of a summary.
+
+    Phases are listed in the order of their total wall time, and so are the
+    slowest tests, up to limit of them.
+
+    :param timings: the '_timings' block of the metrics
+    :param limit: the number of tests to list
+    :return: the lines, indented with a tab
+    """
+    def _line(name, summary):
+        wall = summary['wall']
+        return ("\t\t%s: %.1f ms wall, %.1f ms cpu, %i calls "
+                "(per file p50 %.2f ms, p90 %.2f ms, p99 %.2f ms)" % (
+                    name, wall['total'] * 1000, summary['cpu']['total'] * 1000,
+                    summary['calls'], wall['p50'] * 1000, wall['p90'] * 1000,
+                    wall['p99'] * 1000))
+
+    def _by_wall(entries):
+        return sorted(entries.items(),
+                      key=lambda item: item[1]['wall']['total'], reverse=True)
+
+    bits = ["\tPhases:"]
+    bits.extend(_line(name, summary)
+                for name, summary in _by_wall(timings['phases']))
+    tests = _by_wall(timings['tests'])
+    bits.append("\tSlowest tests (%i of %i):" % (min(limit, len(tests)),
+                                                 len(tests)))
+    bits.extend(_line(name, summary) for name, summary in tests[:limit])
+    return bits
+
+
+def format_slowest(slowest, width=40):
+    """Format the slowest files of a scan and the histogram of file costs.
+
+    :param slowest: the '_slowest' block of the metrics
+    :param width: the width of the longest bar of the histogram
+    :return: the lines, indented with a tab
+    """
+    bits = ["\tSlowest files (%i):" % len(slowest['files'])]
+    for entry in slowest['files']:
+        bits.append("\t\t%s: %.1f ms (parse %.1f ms, analysis %.1f ms), "
+                    "%i nodes, %i bytes" % (
+                        entry['filename'], entry['cost'] * 1000,
+                        entry['parse'] * 1000, entry['analysis'] * 1000,
+                        entry['nodes'], entry['bytes']))
+
+    bits.append("\tFiles by cost:")
+    most = max([count for _, count in slowest['histogram']] or [0]) or 1
+    for bound, count in slowest['histogram']:
+        bar = '#' * int(math.ceil(width * count / most))
+        bits.append(("\t\t<= %8.0f ms: %6i %s" % (
+            bound * 1000, count, bar)).rstrip())
+    return bits
+
+
+def format_minified(minified):
+    """Format the minified and generated files of a scan.
+
+    :param minified: the '_minified' block of the metrics
+    :return: the lines, indented with a tab
+    """
+    bits = ["\tMinified or generated files (%i):" % len(minified['files'])]
+    bits.extend("\t\t%s (%s, %s)" % (entry['filename'], entry['reason'],
+                                     entry['mode'])
+                for entry in minified['files'])
+    return bits
+
+
+def format_stopped(stopped):
+    """Format the note of a scan that stopped before scanning all files.
+
+    :param stopped: the '_stopped' block of the metrics
+    :return: the lines, indented with a tab
+    """
+    at = ''
+    if stopped['filename'] is not None:
+        at = ' at %s' % stopped['filename']
+    bits = ["\tScan stopped early (%s)%s: %i files scanned, %i not scanned" % (
+        stopped['reason'], at, stopped['scanned'], stopped['unscanned'])]
+    bits.extend("\t\t%s" % fname for fname in stopped['unscanned_files'])
+    return bits
@@ -93,7 +93,7 @@ def report(manager, fileobj, sev_level, conf_level, lines=-1):
         machine_output['results'] = sorted(collector,
                                            key=itemgetter('filename'))
 
-    machine_output['metrics'] = manager.metrics.data
+    machine_output['metrics'] = manager.metrics.as_dict()
 
     for result in machine_output['results']:
         if 'code' in result:
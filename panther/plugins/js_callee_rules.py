@@ -0,0 +1,97 @@
+# -*- coding:utf-8 -*-
+
+r"""
+==========================================================================
+P600: Declarative call rules
+==========================================================================
+
+Checks every call and new expression against the rules given in the config
+file, so simple detections do not need a plugin of their own. A rule names
+the callees it applies to, as dotted name spaces, and may narrow them down by
+the shape of the leading arguments or by a key of a single object argument.
+
+Every rule reports its own issues under its name and id, P600 unless the
+rule gives one. All rules are compiled into one matcher, so a call is checked
+against any number of rules with a single lookup.
+
+The rules are selected together, as the P600 test: including or excluding
+P600 with -t, -s or a profile turns all of them on or off. The id of a rule
+only labels its issues, it is not a test id the profile options know, so a
+single rule is turned off by removing it from the config.
+
+:Example:
+
+.. code-block:: yaml
+
+    callee_rules:
+      rules:
+        - name: child_process_exec
+          id: P604
+          callee: [child_process.exec, cp.exec]
+          arguments: [expression]
+          severity: HIGH
+          confidence: MEDIUM
+          message: Command built from an expression run through a shell.
+        - name: mongo_where
+          callee: db.*.find
+          object_key: $where
+          severity: HIGH
+          message: $where condition detected while querying.
+
+The fields of a rule are:
+
+    name        the test name issues are reported under (required)
+    callee      a dotted pattern or a list of them, ``*`` matching any
+                resolved name and ``?`` or ``?Type`` an unresolved one
+                (required)
+    id          the test id issues are reported under, P600 by default; it
+                does not select the rule, see above
+    node        call, new or any, the expressions checked, call by default
+    arguments   shapes of the leading arguments, each of ``*``, literal,
+                string, expression, function, object, array or the type of
+                the argument node such as Identifier
+    object_key  a key that the single object argument must have
+    severity    LOW, MEDIUM or HIGH, MEDIUM by default
+    confidence  LOW, MEDIUM or HIGH, MEDIUM by default
+    message     the issue text
+
+"""
+
+import logging
+
+from panther.core import rules
+from panther.core import test_properties as test
+
+LOG = logging.getLogger(__name__)
+
+# Compiled rule sets, by the config they were compiled from
+_RULE_SETS = {}
+
+
+def gen_config(name):
+    if name == 'callee_rules':
+        return {'rules': []}
+
+
+def _get_rule_set(config):
+    '''Compiles the rules of a config, once.'''
+    compiled = _RULE_SETS.get(id(config))
+    if compiled is None or compiled[0] is not config:
+        rule_list = []
+        for entry in (config or {}).get('rules') or []:
+            try:
+                rule_list.append(rules.Rule.from_dict(entry))
+            except ValueError as e:
+                LOG.error('Skipping invalid call rule: %s', e)
+        # keep the config alive so its id is not reused
+        compiled = _RULE_SETS[id(config)] = (config, rules.RuleSet(rule_list))
+    return compiled[1]
+
+
+@test.takes_config
+@test.checks('CallExpression', 'NewExpression')
+@test.test_id('P600')
+def callee_rules(context, config):
+    '''Reports an issue for each rule of the config a call matches.'''
+
+    return [rule.issue() for rule in _get_rule_set(config).match(context.node)]
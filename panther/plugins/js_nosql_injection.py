@@ -98,6 +98,14 @@ from panther.core import utils
 
 LOG = logging.getLogger(__name__)
 
+# Callee patterns of all the checks, matched once per call expression
+CALLS = utils.NameSpaceTrie([
+    (['*db', '*', '*find'], 'find'),
+    (['*db', '*', '*group'], 'group'),
+    (['*db', '*', '*mapReduce'], 'mapReduce'),
+    (['*db', '*runCommand'], 'runCommand'),
+])
+
 
 def _report(value, severity, confidence):
     issue_text = "Possible NoSQL script injection vector: '%s'"
@@ -128,16 +136,8 @@ def dollar_where_used(context):
     '''
 
     try:
-        node = context.node
-
-        is_name_space_matched = utils.match_name_space(
-            node, ['*db', '*', '*find'])
-
-        if is_name_space_matched:
-            is_argument_key_matched = utils.match_argument_with_object_key(
-                node, '*$where')
-
-            if is_argument_key_matched:
+        if 'find' in context.callee_matches(CALLS):
+            if '*$where' in context.object_arg_keys:
                 return _report('$where condition detected while querying. Please use $expr instead.',
                                severity=panther.HIGH, confidence=panther.MEDIUM)
 
@@ -199,23 +199,14 @@ def group_used(context):
         deprecation_text = 'Mongodb 3.4 deprecates the group command. Please use db.collection.aggregate()\
         with the $group stage or db.collection.mapReduce() instead.'
 
-        node = context.node
-
-        is_name_space_matched = utils.match_name_space(
-            node, ['*db', '*', '*group'])
+        calls = context.callee_matches(CALLS)
 
-        if is_name_space_matched:
+        if 'group' in calls:
             return _report('Group command detected while querying a collection. ' + deprecation_text,
                            severity=panther.HIGH, confidence=panther.MEDIUM)
 
-        is_name_space_matched = utils.match_name_space(
-            node, ['*db', '*runCommand'])
-
-        if is_name_space_matched:
-            is_argument_key_matched = utils.match_argument_with_object_key(
-                node, '*group')
-
-            if is_argument_key_matched:
+        if 'runCommand' in calls:
+            if '*group' in context.object_arg_keys:
                 return _report('Grouping detected using run command. ' + deprecation_text,
                                severity=panther.HIGH, confidence=panther.MEDIUM)
 
@@ -272,23 +263,14 @@ def map_reduce_used(context):
     try:
         warning_text = 'Please be aware of the security risks of using "mapReduce".'
 
-        node = context.node
-
-        is_name_space_matched = utils.match_name_space(
-            node, ['*db', '*', '*mapReduce'])
+        calls = context.callee_matches(CALLS)
 
-        if is_name_space_matched:
+        if 'mapReduce' in calls:
             return _report('Map reduce command detected while querying a collection. ' + warning_text,
                            severity=panther.MEDIUM, confidence=panther.LOW)
 
-        is_name_space_matched = utils.match_name_space(
-            node, ['*db', '*runCommand'])
-
-        if is_name_space_matched:
-            is_argument_key_matched = utils.match_argument_with_object_key(
-                node, '*mapReduce')
-
-            if is_argument_key_matched:
+        if 'runCommand' in calls:
+            if '*mapReduce' in context.object_arg_keys:
                 return _report('Map reduce detected using run command. ' + warning_text,
                                severity=panther.MEDIUM, confidence=panther.LOW)
 
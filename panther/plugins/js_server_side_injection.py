@@ -55,17 +55,16 @@ def _check_global_call(context, function_name):
     '''
     callee = context.node.callee
 
-    try:
-        if isinstance(callee, Identifier):
-            if callee.name == function_name:
-                return _report("Use of %s(...)" % function_name)
-        elif isinstance(callee, MemberExpression):
-            if callee.property.name == function_name:
-                if isinstance(callee.object, Identifier):
-                    if callee.object.name == 'global':
-                        return _report("Use of global.%s(...)" % function_name)
-    except Exception as e:
-        LOG.debug(e)
+    if isinstance(callee, Identifier):
+        if callee.name == function_name:
+            return _report("Use of %s(...)" % function_name)
+    elif isinstance(callee, MemberExpression):
+        # global[eval] is matched like global.eval, global['eval'] is not
+        if (isinstance(callee.property, Identifier) and
+                callee.property.name == function_name and
+                isinstance(callee.object, Identifier) and
+                callee.object.name == 'global'):
+            return _report("Use of global.%s(...)" % function_name)
 
 
 @test.test_id('P601')
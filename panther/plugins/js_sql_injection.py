@@ -69,15 +69,16 @@ nature are discovered, an issue is reported.
     46	dangerous_with_plus_equal_identifier += '232'
 
 """
-import json
 import logging
 import panther
 from panther.core import test_properties as test
+from panther.core.folding import StringFolder
+from panther.core.folding import TAINTED
+from panther.core import utils
+from panther.core.scope import ScopeAnalysis
+from panther.core.symbol_index import SymbolIndex
 from panther.core.visitor import ArrayExpression
-from panther.core.visitor import Identifier
-from panther.core.visitor import Literal
 from panther.core.visitor import MemberExpression
-from panther.core.visitor import TemplateElement
 import re
 
 LOG = logging.getLogger(__name__)
@@ -93,15 +94,34 @@ def _report(value):
     )
 
 
-# Regex to match SQL expressions
-SQL_RE = re.compile(
-    r'(select\s.*from\s|'
-    r'delete\s+from\s|'
-    r'insert\s+into\s.*values\s|'
-    r'update\s.*set\s)',
-    re.IGNORECASE | re.DOTALL,
+# Regex to match the keywords of SQL expressions. A statement is found by
+# scanning the keywords in order, so that a string is matched in linear time
+# where a single expression like select\s.*from\s backtracks over the rest
+# of the string for every "select" it holds.
+SQL_KEYWORD_RE = re.compile(
+    r'(select|update)\s|'
+    r'(delete\s+from|insert\s+into)\s|'
+    r'(from|values|set)\s',
+    re.IGNORECASE,
 )
 
+# First letter of the keyword that completes a statement, by the first
+# letter of the keyword that opens it: select ... from, update ... set and
+# insert into ... values. Letters are casefolded, as the keywords may be
+# matched with letters like U+017F (long s) that only casefold to ASCII.
+SQL_STATEMENTS = {
+    's': 'f',
+    'u': 's',
+    'i': 'v',
+}
+
+# Classified strings, kept for the whole run as the same literals are
+# concatenated over and over. Long strings are rarely repeated and are not
+# kept, and the memo is emptied when it is full.
+SQL_MEMO = {}
+SQL_MEMO_SIZE = 10000
+SQL_MEMO_MAX_LENGTH = 1000
+
 # Regex to match concatenation calls
 CALL_RE = re.compile(
     r'join|append|concat',
@@ -109,32 +129,32 @@ CALL_RE = re.compile(
 )
 
 
-def _extract_string_value(node):
-    '''Tries to extract a string from a node. Supported types
-    are TemplateElement and Literal.
+def _contains_escape(node, index):
+    '''Checks whether an expression is escaped, that is whether it
+    references a name containing 'escape', like mysql.escape(id).
     '''
 
-    found_string = None
-
-    # If it is a TemplateElement get cooked value.
-    # If it is a Literal, check whether raw node starts
-    # with either (') or ("").
-
-    if isinstance(node, TemplateElement):
-        found_string = node.value['cooked']
-    elif isinstance(node, Literal):
-        raw_literal = node.raw
-        is_string = raw_literal.startswith('"') or raw_literal.startswith("'")
-        if is_string:
-            found_string = node.value
-
-    return found_string
+    return index.references(node, 'escape')
 
 
-def _contains_escape(node):
-    '''Checks whether an expression is escaped.'''
+def _contains_sql(data):
+    '''Check whether a string contains an SQL statement, that is one of
+    "select ... from", "delete from", "insert into ... values" or
+    "update ... set", keywords followed by whitespace.
+    '''
 
-    return ('escape' in json.dumps(node.dict()))
+    expected = set()
+    for match in SQL_KEYWORD_RE.finditer(data):
+        opening, statement, closing = match.groups()
+        if statement is not None:
+            if statement[0] in 'dD':
+                return True
+            expected.add(SQL_STATEMENTS['i'])
+        elif opening is not None:
+            expected.add(SQL_STATEMENTS[opening[0].casefold()])
+        elif closing[0].casefold() in expected:
+            return True
+    return False
 
 
 def _is_dangerous_sql(data):
@@ -143,27 +163,31 @@ def _is_dangerous_sql(data):
     as dangerous.
     '''
 
-    is_sql = SQL_RE.search(data) is not None
-
-    if is_sql:
-        return False if ('?' in data) else True
-    else:
-        return False
+    is_dangerous = SQL_MEMO.get(data)
+    if is_dangerous is None:
+        is_dangerous = '?' not in data and _contains_sql(data)
+        if len(data) <= SQL_MEMO_MAX_LENGTH:
+            if len(SQL_MEMO) >= SQL_MEMO_SIZE:
+                SQL_MEMO.clear()
+            SQL_MEMO[data] = is_dangerous
+    return is_dangerous
 
 
-def _is_dangerous_concatenation(node_list):
+def _is_dangerous_concatenation(node_list, context):
     '''Checks whether a node list contains both SQL strings and expressions.'''
 
     string_list = []
     expression_node_list = []
+    folder = context.folder or StringFolder(ScopeAnalysis(context.node))
 
-    # Loop over node list and extract all strings from list of nodes.
-    # If it is not a string then put it into expression list.
+    # Loop over node list and fold each node into the string it evaluates
+    # to, like a literal, a template or a name bound to a constant string.
+    # If it can not be folded then put it into expression list.
     for node in node_list:
 
-        found_string = _extract_string_value(node)
+        found_string = folder.fold(node)
 
-        if found_string is None:
+        if found_string is TAINTED:
             expression_node_list.append(node)
         else:
             string_list.append(found_string)
@@ -171,10 +195,6 @@ def _is_dangerous_concatenation(node_list):
     if not string_list:
         # If it only contains expressions we cannot judge whether
         # we are mixing a string and a variable.
-
-        # TODO(Izel): Implement expression parsers: Backtrace variable assignments
-        # to detect whether an expression is actually a string.
-
         return False
 
     if not expression_node_list:
@@ -191,7 +211,9 @@ def _is_dangerous_concatenation(node_list):
     # It is valid to mix strings with escaped variables. So if all
     # our expressions are escaped then do not create an issue.
 
-    all_contains_escape = all(map(_contains_escape, expression_node_list))
+    index = context.symbol_index or SymbolIndex(context.node)
+    all_contains_escape = all(_contains_escape(node, index)
+                              for node in expression_node_list)
     if all_contains_escape:
         return False
 
@@ -226,18 +248,15 @@ def hardcoded_sql_expressions_merge_function(context):
         arguments = context.node.arguments
         issue_text = 'Concatenation of an SQL statement using a function.'
 
-        # Test for calls to a function registered in global context,
-        # e.g: concatString('...', str)
-
-        if isinstance(callee, Identifier):
-            contains_dangerous_calls = _is_dangerous_call(callee.name)
-
-        # Test for member expression based calls like:
+        # Test the last name of the callee, for calls to a function
+        # registered in global context, e.g: concatString('...', str) and
+        # for member expression based calls like:
         # str.concat(str2, '...') or ['...', str, str2].join('')
-        elif isinstance(callee, MemberExpression):
-
-            contains_dangerous_calls = _is_dangerous_call(callee.property.name)
+        name = context.call_name_space[-1]
+        if name.startswith('*'):
+            contains_dangerous_calls = _is_dangerous_call(name[1:])
 
+        if isinstance(callee, MemberExpression):
             # If the callee object is an array expression then all elements
             # of it should be investigated.
             if isinstance(callee.object, ArrayExpression):
@@ -248,7 +267,7 @@ def hardcoded_sql_expressions_merge_function(context):
         # In any case add function arguments to node list for checking
         if contains_dangerous_calls:
             node_list = node_list + arguments
-            if _is_dangerous_concatenation(node_list):
+            if _is_dangerous_concatenation(node_list, context):
                 return _report(issue_text)
 
     except Exception as e:
@@ -264,6 +283,10 @@ def hardcoded_sql_expressions_with_plus(context):
     of a dangerous SQL string with an expression an issue is
     created.
 
+    A chain of (+) operators is checked once, as a whole, from
+    its outermost expression; the nested expressions of the
+    chain are skipped.
+
     See example below:
 
     var dangerous_with_plus_mixed_identifier_literal = 'SELECT Id FROM ' + query + 'WHERE Id = 6';
@@ -274,10 +297,10 @@ def hardcoded_sql_expressions_with_plus(context):
     and an expression using (+).'
 
     try:
-        if context.node.operator == '+':
-            left_node = context.node.left
-            right_node = context.node.right
-            if _is_dangerous_concatenation([left_node, right_node]):
+        if (context.node.operator == '+' and
+                utils.get_concat_root(context.node) is None):
+            operands = utils.get_concat_operands(context.node)
+            if _is_dangerous_concatenation(operands, context):
                 return _report(issue_text)
 
     except Exception as e:
@@ -308,7 +331,7 @@ def hardcoded_sql_expressions_with_template_literal(context):
     node_list = context.node.quasis + context.node.expressions
 
     try:
-        if _is_dangerous_concatenation(node_list):
+        if _is_dangerous_concatenation(node_list, context):
             return _report(issue_text)
 
     except Exception as e:
@@ -338,7 +361,7 @@ def hardcoded_sql_expressions_with_plus_equal(context):
         if context.node.operator == '+=':
             left_node = context.node.left
             right_node = context.node.right
-            if _is_dangerous_concatenation([left_node, right_node]):
+            if _is_dangerous_concatenation([left_node, right_node], context):
                 return _report(issue_text)
 
     except Exception as e:
@@ -15,6 +15,8 @@
 # under the License.
 
 import os
+import shutil
+import tempfile
 
 import testtools
 
@@ -160,3 +162,103 @@ class FunctionalTests(testtools.TestCase):
             'CONFIDENCE': {'UNDEFINED': 0, 'LOW': 0, 'MEDIUM': 0, 'HIGH': 0}
         }
         self.check_example('nosec.js', expect)
+
+    def test_sql_concatenation_chain(self):
+        '''Test a long (+) chain is reported once, over all of its lines.'''
+        terms = ["'SELECT id FROM t%d WHERE a = ' +\n    a%d" % (i, i)
+                 for i in range(100)]
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'chain.js')
+        with open(path, 'w') as fd:
+            fd.write('var query =\n    ' + ' +\n    '.join(terms) + ';\n')
+
+        self.p_mgr.discover_files([path], True)
+        self.p_mgr.run_tests()
+
+        issues = [i for i in self.p_mgr.get_issue_list()
+                  if i.test == 'hardcoded_sql_expressions_with_plus']
+        self.assertEqual(1, len(issues))
+        self.assertEqual(list(range(2, 202)), issues[0].linerange)
+
+    def test_sql_constant_bindings(self):
+        '''Test names bound to constant strings are resolved.'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'bindings.js')
+        with open(path, 'w') as fd:
+            fd.write("const base = 'SELECT * FROM users WHERE id = ';\n"
+                     "var dangerous = base + req.query.id;\n"
+                     "const table = 'users';\n"
+                     "var safe = 'SELECT * FROM ' + table;\n")
+
+        self.p_mgr.discover_files([path], True)
+        self.p_mgr.run_tests()
+
+        issues = self.p_mgr.get_issue_list()
+        self.assertEqual([2], [i.lineno for i in issues])
+
+    def test_sql_folded_expressions(self):
+        '''Test string expressions are folded before they are classified.'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'folded.js')
+        with open(path, 'w') as fd:
+            fd.write("const select = ['SELECT', '*', 'FROM'].join(' ');\n"
+                     "const query = select + ' users WHERE id = ';\n"
+                     "var dangerous = query + req.query.id;\n"
+                     "var safe = `${select} users`;\n"
+                     "var also_safe = query.concat('1');\n")
+
+        self.p_mgr.discover_files([path], True)
+        self.p_mgr.run_tests()
+
+        issues = self.p_mgr.get_issue_list()
+        self.assertEqual([3], [i.lineno for i in issues])
+
+    def test_timings(self):
+        '''Test the phases and tests of a scan are timed on request.'''
+        self.p_mgr.metrics = metrics.Metrics(timings=True)
+        self.run_example('sql_injection.js')
+
+        timings = self.p_mgr.metrics.data['_timings']
+        for phase in ('locs', 'parse', 'to_dict', 'objectify', 'visit',
+                      'linerange'):
+            self.assertEqual(1, timings['phases'][phase]['files'])
+        self.assertIn('hardcoded_sql_expressions_with_plus', timings['tests'])
+
+    def test_top_slow(self):
+        '''Test the cost of each scanned file is recorded.'''
+        self.p_mgr.metrics = metrics.Metrics(top_slow=1)
+        self.run_example('sql_injection.js')
+
+        slowest = self.p_mgr.metrics.data['_slowest']
+        self.assertEqual(1, len(slowest['files']))
+        entry = slowest['files'][0]
+        self.assertTrue(entry['filename'].endswith('sql_injection.js'))
+        self.assertTrue(entry['parse'] > 0)
+        self.assertTrue(entry['analysis'] > 0)
+        self.assertTrue(entry['nodes'] > 100)
+        path = os.path.join(os.getcwd(), 'examples', 'sql_injection.js')
+        self.assertEqual(os.path.getsize(path), entry['bytes'])
+        self.assertEqual(1, sum(count for _, count in slowest['histogram']))
+
+    def test_nosec_in_strings(self):
+        '''Test nosec markers are only honoured in comments.'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        paths = []
+        for name, code in (('a.js', "eval(a); // nosec\n"),
+                           ('b.js', "\neval('//nosec');\n")):
+            paths.append(os.path.join(tmp_dir, name))
+            with open(paths[-1], 'w') as fd:
+                fd.write(code)
+
+        self.p_mgr.discover_files(paths, True)
+        self.p_mgr.run_tests()
+
+        issues = self.p_mgr.get_issue_list()
+        self.assertEqual([(paths[1], 2)], [(i.fname, i.lineno)
+                                           for i in issues])
+        self.assertEqual(1, self.p_mgr.metrics.data[paths[0]]['nosec'])
+        self.assertEqual(0, self.p_mgr.metrics.data[paths[1]]['nosec'])
@@ -20,3 +20,22 @@ class TracerTests(testtools.TestCase):
         self.assertEqual(vulnerability_count, 2)
         vulnerability_count = diver.dive_all(file_path, depth=2)
         self.assertEqual(vulnerability_count, 1)
+
+    def test_tracer_results(self):
+        name = 'basic.js'
+        file_path = os.path.join(self.test_rel_directory, name)
+        rf = RouteFinder(Diver([]).extractor)
+        diver = Diver(rf.fetch_routes(file_path), extractor=rf.extractor)
+        diver.dive_all(file_path, depth=3)
+
+        results = diver.manager.get_issue_list()
+        self.assertEqual(2, len(results))
+        self.assertEqual(2, diver.manager.results_count())
+        self.assertEqual(
+            2, diver.manager.metrics.data['_totals']['SEVERITY.HIGH'])
+
+        call_paths = sorted(len(r.call_path) for r in results)
+        self.assertEqual([2, 4], call_paths)
+        for result in results:
+            self.assertEqual('/crazy', result.call_path[0].pattern)
+            self.assertEqual(result.fname, result.call_path[-1].file_path)
@@ -14,12 +14,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import json
 import os
 import subprocess
 
 import fixtures
 import git
 import mock
+import six
 import testtools
 
 import panther.cli.baseline as baseline
@@ -50,6 +52,9 @@ class PantherBaselineToolTests(testtools.TestCase):
         # Set up prior to run each test case
         super(PantherBaselineToolTests, self).setUp()
         self.current_directory = os.getcwd()
+        self.cache_directory = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     self.cache_directory))
 
     def tearDown(self):
         # Tear down after running each test case
@@ -155,30 +160,136 @@ class PantherBaselineToolTests(testtools.TestCase):
         # assert the system exits with code 2
         self.assertRaisesRegex(SystemExit, '2', baseline.main)
 
-    def test_main_subprocess_error(self):
-        # Test that panther handles a CalledProcessError when attempting to run
-        # panther baseline via a subprocess
+    def test_main_reads_commits_from_object_store(self):
+        # Test that panther baseline scans the tested commit and its parent
+        # without checking either of them out
         repo_directory = self.useFixture(fixtures.TempDir()).path
 
         git_repo = git.Repo.init(repo_directory)
         git_repo.index.commit('Initial Commit')
         os.chdir(repo_directory)
 
-        additional_content = 'additional_file.py'
-        with open(additional_content, 'wt') as fd:
+        with open('app.js', 'wt') as fd:
+            fd.write("var x = 1;\n")
+        git_repo.index.add(['app.js'])
+        git_repo.index.commit('Benign Content')
+
+        with open('app.js', 'wt') as fd:
             fd.write(self.temp_file_contents)
-        git_repo.index.add([additional_content])
-        git_repo.index.commit('Additional Content')
+        git_repo.index.add(['app.js'])
+        tested_commit = git_repo.index.commit('Malicious Content')
+
+        with open('app.js', 'wt') as fd:
+            fd.write("var y = 2;\n")
+        git_repo.index.add(['app.js'])
+        head_commit = git_repo.index.commit('Fixed Content')
+
+        argv = ['panther-baseline', '-r', '.', '--commit',
+                tested_commit.hexsha]
+        out = six.StringIO()
+        out.name = '<stdout>'
+        with mock.patch('sys.argv', argv):
+            with mock.patch('sys.stdout', out):
+                # assert the system exits with code 1 for the new finding
+                self.assertRaisesRegex(SystemExit, '1', baseline.main)
+
+        self.assertIn('eval(user_input)', out.getvalue())
+        self.assertEqual(head_commit.hexsha, git_repo.head.commit.hexsha)
+        with open('app.js') as fd:
+            self.assertEqual("var y = 2;\n", fd.read())
+
+        # both versions of app.js are cached, so a second run replays them
+        self.assertEqual(1, len(os.listdir(self.cache_directory)))
+        with mock.patch('sys.argv', argv):
+            with mock.patch('sys.stdout', out):
+                with mock.patch('panther.core.manager.PantherManager.'
+                                '_execute_ast_visitor') as visitor:
+                    self.assertRaisesRegex(SystemExit, '1', baseline.main)
+                    self.assertFalse(visitor.called)
+
+    def test_get_changed_blobs(self):
+        # Test that only changed, non deleted files are collected, and that
+        # renamed files are compared under their new name
+        repo_directory = self.useFixture(fixtures.TempDir()).path
+
+        git_repo = git.Repo.init(repo_directory)
+        os.chdir(repo_directory)
+
+        for name in ['same.js', 'old_name.js', 'deleted.js', 'changed.js']:
+            with open(name, 'wt') as fd:
+                fd.write(self.temp_file_contents + name)
+        git_repo.index.add(['same.js', 'old_name.js', 'deleted.js',
+                            'changed.js'])
+        parent_commit = git_repo.index.commit('Initial Commit')
+
+        git_repo.index.move(['old_name.js', 'new_name.js'])
+        git_repo.index.remove(['deleted.js'], working_tree=True)
+        with open('changed.js', 'at') as fd:
+            fd.write('\nvar x = 1;\n')
+        git_repo.index.add(['changed.js'])
+        commit = git_repo.index.commit('Changes')
+
+        current_blobs, parent_blobs, moved = baseline._get_changed_blobs(
+            parent_commit, commit)
+
+        self.assertEqual(['changed.js', 'new_name.js'],
+                         sorted(current_blobs))
+        self.assertEqual(['changed.js', 'new_name.js'], sorted(parent_blobs))
+        self.assertEqual(current_blobs['new_name.js'].hexsha,
+                         parent_blobs['new_name.js'].hexsha)
+        self.assertEqual({'old_name.js': 'new_name.js', 'deleted.js': None},
+                         moved)
+
+    def test_main_range(self):
+        # Test that a range of commits is walked in order and that each new
+        # finding is attributed to the commit that introduced it
+        repo_directory = self.useFixture(fixtures.TempDir()).path
+
+        git_repo = git.Repo.init(repo_directory)
+        os.chdir(repo_directory)
+
+        def commit(message, **files):
+            for name, contents in files.items():
+                with open(name, 'wt') as fd:
+                    fd.write(contents)
+            git_repo.index.add(list(files))
+            return git_repo.index.commit(message)
+
+        start = commit('Existing finding', **{'app.js': 'eval(a);\n'})
+        introduced = commit('New finding', **{'lib.js': 'eval(b);\n'})
+        commit('Touch existing finding',
+               **{'app.js': 'var x = 1;\neval(a);\n'})
+        git_repo.index.move(['lib.js', 'moved.js'])
+        git_repo.index.commit('Rename')
+        commit('Break syntax', **{'app.js': 'var = ;\n'})
+        end = commit('Fix syntax', **{'app.js': 'eval(a);\n'})
+
+        argv = ['panther-baseline', '-r', '.', '-f', 'json', '--range',
+                '%s..%s' % (start.hexsha, end.hexsha)]
+        with mock.patch('sys.argv', argv):
+            # assert the system exits with code 1 for the new finding
+            self.assertRaisesRegex(SystemExit, '1', baseline.main)
+
+        with open(baseline.report_basename + '.json') as fd:
+            report = json.load(fd)
+        self.assertEqual([('moved.js', introduced.hexsha)],
+                         [(r['filename'], r['introduced_by'])
+                          for r in report['results']])
+        self.assertEqual(['app.js', 'moved.js'],
+                         sorted(k for k in report['metrics']
+                                if k != '_totals'))
+
+    @mock.patch('sys.argv', ['panther-baseline', '.', '--range', 'a..b',
+                             '--diff-only'])
+    def test_initialize_range_with_diff_only(self):
+        repo_directory = self.useFixture(fixtures.TempDir()).path
+        git_repo = git.Repo.init(repo_directory)
+        git_repo.index.commit('Initial Commit')
+        os.chdir(repo_directory)
 
-        with mock.patch('subprocess.check_output') as mock_check_output:
-            mock_panther_cmd = 'panther_mock -b temp_file.txt'
-            mock_check_output.side_effect = (
-                subprocess.CalledProcessError('3', mock_panther_cmd)
-            )
+        return_value = baseline.initialize()
 
-            # assert the system exits with code 3 (returned from
-            # CalledProcessError)
-            self.assertRaisesRegex(SystemExit, '3', baseline.main)
+        self.assertEqual((None, None, None, None, None), return_value)
 
     def test_init_logger(self):
         # Test whether the logger was initialized when calling init_logger
@@ -220,9 +331,10 @@ class PantherBaselineToolTests(testtools.TestCase):
             # assert panther did not run due to git command failure
             self.assertEqual((None, None, None, None, None), return_value)
 
+    @mock.patch('sys.argv', ['panther-baseline', '.'])
     def test_initialize_dirty_repo(self):
-        # Test that panther does not run when the current git repository is
-        # 'dirty' when calling the initialize method
+        # Test that panther runs when the current git repository is 'dirty',
+        # as the revisions scanned are read from the object store
         repo_directory = self.useFixture(fixtures.TempDir()).path
         git_repo = git.Repo.init(repo_directory)
         git_repo.index.commit('Initial Commit')
@@ -235,7 +347,21 @@ class PantherBaselineToolTests(testtools.TestCase):
 
         return_value = baseline.initialize()
 
-        # assert panther did not run due to dirty repo
+        # assert panther is not stopped by the dirty repo
+        self.assertEqual(git_repo.working_dir, return_value[1].working_dir)
+
+    @mock.patch('sys.argv', ['panther-baseline', '.', '-a', 'vuln'])
+    def test_initialize_unsupported_argument(self):
+        # Test that panther does not run when given an option of panther
+        # that panther-baseline does not support
+        repo_directory = self.useFixture(fixtures.TempDir()).path
+        git_repo = git.Repo.init(repo_directory)
+        git_repo.index.commit('Initial Commit')
+        os.chdir(repo_directory)
+
+        return_value = baseline.initialize()
+
+        # assert panther did not run due to the unsupported option
         self.assertEqual((None, None, None, None, None), return_value)
 
     @mock.patch('sys.argv', ['panther', '-f', 'txt', 'test'])
@@ -272,21 +398,3 @@ class PantherBaselineToolTests(testtools.TestCase):
 
         # assert panther did not run due to provided -o (--ouput) argument
         self.assertEqual((None, None, None, None, None), return_value)
-
-    def test_initialize_existing_temp_file(self):
-        # Test that panther does not run when the temporary output file exists
-        # when calling the initialize method
-        repo_directory = self.useFixture(fixtures.TempDir()).path
-        git_repo = git.Repo.init(repo_directory)
-        git_repo.index.commit('Initial Commit')
-        os.chdir(repo_directory)
-
-        # create an existing version of temporary output file
-        existing_temp_file = baseline.baseline_tmp_file
-        with open(existing_temp_file, 'wt') as fd:
-            fd.write(self.temp_file_contents)
-
-        return_value = baseline.initialize()
-
-        # assert panther did not run due to existing temporary report file
-        self.assertEqual((None, None, None, None, None), return_value)
@@ -16,6 +16,7 @@ import logging
 import os
 
 import fixtures
+import git
 import mock
 import testtools
 
@@ -287,3 +288,36 @@ class PantherCLIMainTests(testtools.TestCase):
             mock_mgr_results_ct.return_value = 0
             # assert a SystemExit with code 0
             self.assertRaisesRegex(SystemExit, '0', panther.main)
+
+    def test_get_changed_files(self):
+        # Test that committed, modified and untracked files are reported but
+        # unchanged files are not
+        temp_directory = self.useFixture(fixtures.TempDir()).path
+        git_repo = git.Repo.init(temp_directory)
+        os.chdir(temp_directory)
+        for fname in ['same.js', 'committed.js', 'modified.js']:
+            with open(fname, 'wt') as fd:
+                fd.write('var a = 1;')
+        git_repo.index.add(['same.js', 'modified.js'])
+        git_repo.index.commit('Initial commit')
+        git_repo.index.add(['committed.js'])
+        git_repo.index.commit('Second commit')
+        with open('modified.js', 'wt') as fd:
+            fd.write('var a = 2;')
+        with open('untracked.js', 'wt') as fd:
+            fd.write('var a = 3;')
+
+        changed = panther._get_changed_files('HEAD~1')
+
+        self.assertEqual(
+            set(os.path.realpath(f) for f in
+                ['committed.js', 'modified.js', 'untracked.js']),
+            changed)
+
+    def test_get_changed_files_bad_revision(self):
+        temp_directory = self.useFixture(fixtures.TempDir()).path
+        git_repo = git.Repo.init(temp_directory)
+        git_repo.index.commit('Initial commit')
+        os.chdir(temp_directory)
+        self.assertRaisesRegex(SystemExit, '2', panther._get_changed_files,
+                               'no_such_ref')
@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+
+import json
+import os
+
+import fixtures
+import mock
+import six
+import testtools
+
+from panther.cli import merge
+from panther.core import config
+from panther.core import constants
+from panther.core import manager
+from panther.core import sharding
+
+
+class PantherMergeTests(testtools.TestCase):
+
+    def setUp(self):
+        super(PantherMergeTests, self).setUp()
+        self.sources = {'a.js': "eval(a);\n", 'b.js': "var b = 1;\n",
+                        'c.js': "eval(c);\neval(c2);\n", 'd.js': "var (\n"}
+        temp_directory = self.useFixture(fixtures.TempDir()).path
+        self.paths = []
+        for name, source in sorted(self.sources.items()):
+            self.paths.append(os.path.join(temp_directory, name))
+            with open(self.paths[-1], 'w') as fd:
+                fd.write(source)
+
+    def _report(self, files_list):
+        p_mgr = manager.PantherManager(config.PantherConfig(), 'file')
+        p_mgr.files_list = files_list
+        p_mgr.run_tests()
+        output = six.StringIO()
+        output.name = 'report.json'
+        with mock.patch.object(output, 'close'):
+            p_mgr.output_results(3, constants.LOW, constants.LOW, output,
+                                 'json')
+        return p_mgr, json.loads(output.getvalue())
+
+    def test_merge_reports(self):
+        whole, whole_report = self._report(list(self.paths))
+        shards = [self._report(sharding.shard_files(self.paths, index, 2))[1]
+                  for index in (1, 2)]
+
+        merged = manager.PantherManager(config.PantherConfig(), 'file')
+        merge.merge_reports(merged, shards)
+
+        self.assertEqual(whole.files_list, merged.files_list)
+        self.assertEqual(whole.scores, merged.scores)
+        self.assertEqual(sorted(whole.get_skipped()),
+                         sorted(merged.get_skipped()))
+        self.assertEqual(sorted((i.fname, i.lineno) for i in whole.results),
+                         sorted((i.fname, i.lineno) for i in merged.results))
+        self.assertEqual(whole_report['metrics'], merged.metrics.data)
+
+    def test_merge_underscore_names(self):
+        report = {'results': [], 'errors': [],
+                  'metrics': {'_helpers.js': {'loc': 1, 'nosec': 0},
+                              '_totals': {'loc': 1, 'nosec': 0}}}
+        merged = manager.PantherManager(config.PantherConfig(), 'file')
+        merge.merge_reports(merged, [report])
+
+        self.assertEqual(['_helpers.js'], merged.files_list)
+        self.assertEqual(1, merged.metrics.data['_totals']['loc'])
@@ -18,6 +18,9 @@ import mock
 import testtools
 
 from panther.core import context
+from panther.core.pyesprima import esprima
+from panther.core import utils
+from panther.core import visitor
 
 
 class ContextTests(testtools.TestCase):
@@ -44,3 +47,86 @@ class ContextTests(testtools.TestCase):
 
         new_context = context.Context()
         self.assertIsNone(new_context.node)
+
+    def test_symbol_index(self):
+        ref_context = dict(symbol_index='index')
+        new_context = context.Context(context_object=ref_context)
+        self.assertEqual('index', new_context.symbol_index)
+
+        new_context = context.Context()
+        self.assertIsNone(new_context.symbol_index)
+
+    def test_call_name_space(self):
+        call_expression = visitor.objectify(
+            esprima.parse('db.users.find()').to_dict()).body[0].expression
+        new_context = context.Context(context_object=dict(
+            node=call_expression))
+        self.assertEqual(('*db', '*users', '*find'),
+                         new_context.call_name_space)
+
+        trie = utils.NameSpaceTrie([(['*db', '*', '*find'], 'find')])
+        self.assertEqual(set(['find']), new_context.callee_matches(trie))
+
+        new_context = context.Context(context_object=dict(
+            node=call_expression.callee))
+        self.assertIsNone(new_context.call_name_space)
+        self.assertEqual(set(), new_context.callee_matches(trie))
+
+    def test_memoized_properties(self):
+        call_expression = visitor.objectify(esprima.parse(
+            "db.runCommand({group: 1, [key]: 2, 'x': 3})").to_dict()
+        ).body[0].expression
+        raw_context = dict(node=call_expression, memo={})
+        new_context = context.Context(context_object=raw_context)
+
+        keys = new_context.object_arg_keys
+        self.assertEqual(set(['*group', '?Identifier', '*x']), keys)
+        self.assertEqual(('*db', '*runCommand'), new_context.call_name_space)
+
+        # tests run on the same node share the memo of its raw context
+        other_context = context.Context(context_object=dict(raw_context))
+        self.assertIs(keys, other_context.object_arg_keys)
+        self.assertIn('object_arg_keys', raw_context['memo'])
+
+    def test_object_arg_keys(self):
+        call_expression = visitor.objectify(esprima.parse(
+            "f('a', {c: 1})").to_dict()).body[0].expression
+        new_context = context.Context(context_object=dict(
+            node=call_expression))
+        self.assertEqual(frozenset(), new_context.object_arg_keys)
+
+        new_context = context.Context(context_object=dict(
+            node=call_expression.arguments[0]))
+        self.assertEqual(frozenset(), new_context.object_arg_keys)
+        self.assertIsNone(new_context.call_name_space)
+
+    def test_scope(self):
+        ref_context = dict(scope='scope')
+        new_context = context.Context(context_object=ref_context)
+        self.assertEqual('scope', new_context.scope)
+
+        new_context = context.Context()
+        self.assertIsNone(new_context.scope)
+
+    def test_folder(self):
+        ref_context = dict(folder='folder')
+        new_context = context.Context(context_object=ref_context)
+        self.assertEqual('folder', new_context.folder)
+
+        new_context = context.Context()
+        self.assertIsNone(new_context.folder)
+
+    def test_file_analyses(self):
+        program = visitor.objectify(esprima.parse(
+            "var a = 'x'; f(a + 'y');").to_dict())
+        analyses = {'root': program}
+        first = context.Context(context_object=dict(analyses=analyses))
+        second = context.Context(context_object=dict(analyses=analyses))
+
+        # analyses are made on first use, once for all the nodes of a file
+        self.assertEqual(['root'], list(analyses))
+        self.assertIs(first.folder, second.folder)
+        self.assertIs(first.scope, second.scope)
+        self.assertEqual(set(['folder', 'root', 'scope']), set(analyses))
+        self.assertIs(first.symbol_index, second.symbol_index)
+        self.assertIn('a', first.symbol_index.symbols(program))
@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+
+import os
+
+import fixtures
+import testtools
+
+from panther.core.tracer import file_extractor
+
+
+class FileExtractorTests(testtools.TestCase):
+
+    def setUp(self):
+        super(FileExtractorTests, self).setUp()
+        self.tracer_directory = os.path.join(os.getcwd(), 'examples', 'tracer')
+
+    def _path(self, name):
+        return os.path.join(self.tracer_directory, name)
+
+    def test_program_cache_hits_and_misses(self):
+        extractor = file_extractor.FileExtractor()
+        path = self._path('basic.ref1.js')
+
+        first = extractor.get_program(path)
+        second = extractor.get_program(path)
+
+        self.assertIs(first, second)
+        self.assertEqual(1, extractor.program_cache.misses)
+        self.assertEqual(1, extractor.program_cache.hits)
+
+    def test_program_cache_evicts_least_recently_used(self):
+        extractor = file_extractor.FileExtractor(max_cache_nodes=1)
+        ref1 = self._path('basic.ref1.js')
+        ref3 = self._path('basic.ref3.js')
+
+        extractor.get_program(ref1)
+        extractor.get_program(ref3)
+
+        self.assertNotIn(ref1, extractor.program_cache)
+        self.assertIn(ref3, extractor.program_cache)
+        self.assertEqual(1, extractor.program_cache.evictions)
+
+        # derived caches stay resident after their program was evicted
+        extractor.get_imports(ref3)
+        extractor.get_function_definitions(ref1)
+        extractor.get_program(ref3)
+        self.assertIn(ref3, extractor.import_cache)
+        self.assertIn(ref1, extractor.function_definition_cache)
+
+    def test_function_definitions_hold_no_nodes(self):
+        extractor = file_extractor.FileExtractor(max_cache_nodes=1)
+        ref1 = self._path('basic.ref1.js')
+        ref3 = self._path('basic.ref3.js')
+
+        definitions = extractor.get_function_definitions(ref1)
+        self.assertTrue(definitions)
+        for location in definitions.values():
+            self.assertIsInstance(location, tuple)
+
+        # the function is found in the program parsed again after eviction
+        identifier = sorted(definitions)[0]
+        extractor.get_program(ref3)
+        self.assertNotIn(ref1, extractor.program_cache)
+        function = extractor.try_match_function(ref1, identifier)
+        program = extractor.get_program(ref1)
+        self.assertIn(function.node, list(program.traverse()))
+
+    def test_program_cache_spill(self):
+        spill_dir = self.useFixture(fixtures.TempDir()).path
+        extractor = file_extractor.FileExtractor(max_cache_nodes=1,
+                                                 spill_dir=spill_dir)
+        ref1 = self._path('basic.ref1.js')
+        ref3 = self._path('basic.ref3.js')
+
+        extractor.get_program(ref1)
+        extractor.get_program(ref3)
+        self.assertEqual(1, len(os.listdir(spill_dir)))
+
+        program = extractor.get_program(ref1)
+        self.assertEqual('Program', program.type)
+        self.assertEqual(1, extractor.program_cache.spill_hits)
+        self.assertEqual(2, extractor.program_cache.misses)
@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import folding
+from panther.core.pyesprima import esprima
+from panther.core import scope
+from panther.core import visitor
+
+
+class StringFolderTests(testtools.TestCase):
+
+    def _fold_all(self, code):
+        '''Folds the value of each variable declared in code.'''
+        program = visitor.objectify(esprima.parse(code).to_dict())
+        folder = folding.StringFolder(scope.ScopeAnalysis(program))
+        values = {}
+        for node in program.traverse():
+            if node.type == 'VariableDeclarator':
+                values[node.id.name] = folder.fold(node.init)
+        return folder, values
+
+    def test_fold(self):
+        _, values = self._fold_all(
+            "var a = 'SELECT ';\n"
+            "var b = `FROM ${'users'}`;\n"
+            "var c = a + b + ' WHERE id = ';\n"
+            "var d = a.concat('* ', b);\n"
+            "var e = ['a', 'b'].join();\n"
+            "var f = ['a', 'b'].join(' ' + 'or ');\n"
+            "var g = `${c}?`;\n"
+            "var h = 'x' + ('y' + 'z');\n")
+        self.assertEqual({
+            'a': 'SELECT ',
+            'b': 'FROM users',
+            'c': 'SELECT FROM users WHERE id = ',
+            'd': 'SELECT * FROM users',
+            'e': 'a,b',
+            'f': 'a or b',
+            'g': 'SELECT FROM users WHERE id = ?',
+            'h': 'xyz',
+        }, values)
+
+    def test_tainted(self):
+        _, values = self._fold_all(
+            "var a = req.query.id;\n"
+            "var b = 'SELECT ' + a;\n"
+            "var c = `FROM ${a}`;\n"
+            "var d = 'x' + 1;\n"
+            "var e = [a].join('');\n"
+            "var f = a.concat('x');\n"
+            "var g = 'x'.concat(a);\n"
+            "var h = 'x'; h = a;\n"
+            "var i = h;\n"
+            "var j = 'x'.toUpperCase();\n"
+            "var k = undeclared;\n")
+        self.assertEqual(
+            ['b', 'c', 'd', 'e', 'f', 'g', 'i', 'j', 'k'],
+            sorted(name for name, value in values.items()
+                   if value is folding.TAINTED and name != 'a'))
+
+    def test_cycle(self):
+        _, values = self._fold_all(
+            "var a = b + 'x';\n"
+            "var b = a + 'y';\n")
+        self.assertIs(folding.TAINTED, values['a'])
+        self.assertIs(folding.TAINTED, values['b'])
+
+    def test_memo(self):
+        folder, values = self._fold_all("var a = 'x' + 'y';")
+        node = next(n for n in folder.scope.root.traverse()
+                    if n.type == 'BinaryExpression')
+        self.assertIn(id(node), folder._memo)
+        self.assertIs(values['a'], folder.fold(node))
@@ -0,0 +1,49 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import line_scan
+
+
+class LineScanTests(testtools.TestCase):
+
+    def test_lines(self):
+        source = line_scan.scan(
+            "var a = 1;\n"
+            "\n"
+            "// comment\n"
+            "/* block\n"
+            "   comment */\n"
+            "b(); /* trailing */\n"
+            "/* leading */ c();\n"
+            "/* one */ // two\n"
+            "   \n")
+        self.assertEqual(3, source.loc)
+        self.assertEqual(set(), source.nosec_lines)
+
+    def test_nosec(self):
+        source = line_scan.scan(
+            "eval(a); //nosec\n"
+            "eval(b); // nosec\n"
+            "var s = '//nosec';\n"
+            "var t = \"// nosec\" + `//nosec`;\n"
+            "/* //nosec */\n"
+            "eval(c); // nosec because\n"
+            "var u = 'it\\'s' + 1 / 2; // nosec\n"
+            "var v = 'open //nosec\n")
+        self.assertEqual({1, 2, 5, 6, 7}, source.nosec_lines)
+
+    def test_nosec_in_block_comment(self):
+        source = line_scan.scan(
+            "/*\n"
+            " * don't // nosec\n"
+            " */ eval(a);\n")
+        self.assertEqual({2}, source.nosec_lines)
+        self.assertEqual(1, source.loc)
+
+    def test_line_terminators(self):
+        source = line_scan.scan("a();\r\nb(); //nosec\rc();\u2028//nosec")
+        self.assertEqual(3, source.loc)
+        self.assertEqual({2, 4}, source.nosec_lines)
+        self.assertEqual(['a', 'b', 'c', 'd', 'e'],
+                         line_scan.split_lines('a\u2029b\r\nc\nd\re'))
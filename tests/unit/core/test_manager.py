@@ -18,6 +18,7 @@ import os
 
 import fixtures
 import mock
+import six
 import testtools
 
 from panther.core import config
@@ -205,6 +206,190 @@ class ManagerTests(testtools.TestCase):
             self.assertEqual(['thing'], self.manager.files_list)
             self.assertEqual([], self.manager.excluded_files)
 
+    def test_select_files(self):
+        paths = ['app.js', 'README.md', 'lib/a.js', 'node_modules/b.js',
+                 'other/c.js']
+        self.manager.select_files(paths, ['./lib', 'README.md'], True)
+        self.assertEqual(['README.md', 'lib/a.js'], self.manager.files_list)
+        self.assertEqual([], self.manager.excluded_files)
+
+        self.manager.select_files(paths, ['.'], True, excluded_paths='other')
+        self.assertEqual(['app.js', 'lib/a.js'], self.manager.files_list)
+        self.assertEqual(['README.md', 'node_modules/b.js', 'other/c.js'],
+                         self.manager.excluded_files)
+
+    def test_select_files_recurse_skip(self):
+        self.manager.select_files(['lib/a.js'], ['lib'], False)
+        self.assertEqual([], self.manager.files_list)
+        self.assertEqual([], self.manager.excluded_files)
+
+    def test_run_tests_reader(self):
+        self.manager.files_list = ['in_memory.js']
+        self.manager.run_tests(
+            reader=lambda fname: six.StringIO("eval(input);\n"))
+        self.assertEqual([], self.manager.skipped)
+        self.assertEqual(['in_memory.js'],
+                         [r.fname for r in self.manager.results])
+
+    def test_run_tests_fail_fast(self):
+        sources = {'a.js': "var a = 1;\n", 'b.js': "eval(input);\n",
+                   'c.js': "eval(input);\n", 'd.js': "eval(input);\n"}
+        self.manager.files_list = sorted(sources)
+        self.manager.fail_fast = (constants.LOW, constants.LOW)
+        self.manager.run_tests(
+            reader=lambda fname: six.StringIO(sources[fname]))
+        self.assertEqual(['a.js', 'b.js'], self.manager.files_list)
+        self.assertEqual(['b.js'], [r.fname for r in self.manager.results])
+        self.assertEqual({'reason': 'fail fast', 'filename': 'b.js',
+                          'scanned': 2, 'unscanned': 2,
+                          'unscanned_files': ['c.js', 'd.js']},
+                         self.manager.metrics.data['_stopped'])
+        self.assertNotIn('c.js', self.manager.metrics.data)
+
+    def test_run_tests_fail_fast_baseline(self):
+        sources = {'a.js': "eval(input);\n", 'b.js': "eval(input);\n",
+                   'c.js': "var c = 1;\n"}
+        reader = lambda fname: six.StringIO(sources[fname])  # noqa: E731
+        self.manager.files_list = ['a.js']
+        self.manager.run_tests(reader=reader)
+
+        m = manager.PantherManager(config=self.config, agg_type='file',
+                                   fail_fast=(constants.LOW, constants.LOW))
+        m.baseline = self.manager.results
+        m.files_list = sorted(sources)
+        m.run_tests(reader=reader)
+        # a.js only has baselined issues, so the scan stops at b.js
+        self.assertEqual(['c.js'], m.metrics.data['_stopped']['unscanned_files'])
+
+    def test_run_tests_fail_fast_thresholds(self):
+        sources = {'a.js': "eval(input);\n", 'b.js': "eval(input);\n"}
+        self.manager.files_list = sorted(sources)
+        self.manager.fail_fast = (constants.HIGH, constants.HIGH)
+        self.manager.run_tests(
+            reader=lambda fname: six.StringIO(sources[fname]))
+        self.assertEqual(['a.js', 'b.js'], self.manager.files_list)
+        self.assertNotIn('_stopped', self.manager.metrics.data)
+
+    def test_run_tests_time_budget(self):
+        self.manager.files_list = ['a.js', 'b.js']
+        self.manager.time_budget = 0
+        self.manager.run_tests(reader=lambda fname: six.StringIO(''))
+        self.assertEqual([], self.manager.files_list)
+        self.assertEqual({'reason': 'time budget', 'filename': None,
+                          'scanned': 0, 'unscanned': 2,
+                          'unscanned_files': ['a.js', 'b.js']},
+                         self.manager.metrics.data['_stopped'])
+
+        self.manager.time_budget = 60
+        self.manager.files_list = ['a.js', 'b.js']
+        self.manager.run_tests(reader=lambda fname: six.StringIO(''))
+        self.assertEqual(['a.js', 'b.js'], self.manager.files_list)
+
+    def test_prioritize_files(self):
+        temp_directory = self.useFixture(fixtures.TempDir()).path
+        now = 1000000000
+        sizes = {'old_big.js': 30, 'old_small.js': 10, 'finding.js': 20,
+                 'new.js': 40, 'newer.js': 50}
+        paths = {}
+        for name, size in sizes.items():
+            paths[name] = os.path.join(temp_directory, name)
+            with open(paths[name], 'w') as fd:
+                fd.write('x' * size)
+            os.utime(paths[name], (now - 10 ** 6, now - 10 ** 6))
+        os.utime(paths['new.js'], (now - 20, now - 20))
+        os.utime(paths['newer.js'], (now - 10, now - 10))
+        missing = os.path.join(temp_directory, 'missing.js')
+
+        with mock.patch('time.time', return_value=now):
+            ordered = manager._prioritize_files(
+                sorted(paths.values()) + [missing], {paths['finding.js']})
+        self.assertEqual([paths['newer.js'], paths['new.js'],
+                          paths['finding.js'], paths['old_small.js'],
+                          paths['old_big.js'], missing], ordered)
+
+    def test_run_tests_duplicates(self):
+        sources = {'a.js': "eval(input);\n", 'copy/a.js': "eval(input);\n",
+                   'b.js': "var (\n", 'copy/b.js': "var (\n",
+                   'c.js': "var c = 1;\n"}
+        self.manager.files_list = sorted(sources)
+        with mock.patch('panther.core.node_visitor.PantherNodeVisitor'
+                        '.process', autospec=True,
+                        side_effect=manager.p_node_visitor.PantherNodeVisitor
+                        .process) as process:
+            self.manager.run_tests(
+                reader=lambda fname: six.StringIO(sources[fname]))
+        self.assertEqual(3, process.call_count)
+
+        self.assertEqual(['a.js', 'c.js', 'copy/a.js'],
+                         self.manager.files_list)
+        self.assertEqual(['a.js', 'copy/a.js'],
+                         [r.fname for r in self.manager.results])
+        self.assertEqual(self.manager.scores[0], self.manager.scores[2])
+        self.assertEqual(['b.js', 'copy/b.js'],
+                         [fname for fname, _ in self.manager.skipped])
+        data = self.manager.metrics.data
+        self.assertEqual(data['a.js'], data['copy/a.js'])
+        self.assertEqual(data['b.js'], data['copy/b.js'])
+        self.assertEqual({'files': 2}, data['_deduplicated'])
+
+    def test_run_tests_minified(self):
+        sources = {'a.js': "eval(input);\n",
+                   'lib.min.js': "!function(){eval(input)}();\n"}
+        reader = lambda fname: six.StringIO(sources[fname])  # noqa: E731
+        results = {}
+        for mode in ('scan', 'skip', 'keywords'):
+            m = manager.PantherManager(config=self.config, agg_type='file',
+                                       minified=mode)
+            m.files_list = sorted(sources)
+            m.run_tests(reader=reader)
+            self.assertEqual([{'filename': 'lib.min.js',
+                               'reason': 'minified file name',
+                               'mode': mode}],
+                             m.metrics.data['_minified']['files'])
+            results[mode] = m
+        self.assertEqual(['a.js', 'lib.min.js'],
+                         [r.fname for r in results['scan'].results])
+        self.assertEqual(constants.MEDIUM,
+                         results['scan'].results[1].confidence)
+
+        self.assertEqual(['a.js'], results['skip'].files_list)
+        self.assertEqual([('lib.min.js',
+                           'minified or generated file (minified file name)')],
+                         results['skip'].skipped)
+
+        keywords = results['keywords']
+        self.assertEqual(['a.js', 'lib.min.js'], keywords.files_list)
+        self.assertEqual(constants.LOW, keywords.results[1].confidence)
+        self.assertEqual(1, keywords.metrics.data['lib.min.js']['loc'])
+        self.assertEqual(1, keywords.metrics.data['_totals']['CONFIDENCE.LOW'])
+
+    def test_run_tests_minified_duplicates(self):
+        sources = {'lib.min.js': "!function(){eval(input)}();\n",
+                   'vendor/lib.min.js': "!function(){eval(input)}();\n"}
+        reader = lambda fname: six.StringIO(sources[fname])  # noqa: E731
+        for mode in ('scan', 'keywords'):
+            m = manager.PantherManager(config=self.config, agg_type='file',
+                                       minified=mode)
+            m.files_list = sorted(sources)
+            m.run_tests(reader=reader)
+            self.assertEqual(1, m.metrics.duplicates)
+            self.assertEqual([{'filename': fname,
+                               'reason': 'minified file name',
+                               'mode': mode} for fname in sorted(sources)],
+                             m.metrics.data['_minified']['files'])
+
+    def test_minified_mode(self):
+        self.assertEqual('scan', self.manager.minified)
+        self.config.config['minified'] = 'skip'
+        m = manager.PantherManager(config=self.config, agg_type='file')
+        self.assertEqual('skip', m.minified)
+        m = manager.PantherManager(config=self.config, agg_type='file',
+                                   minified='keywords')
+        self.assertEqual('keywords', m.minified)
+        self.config.config['minified'] = 'chunks'
+        m = manager.PantherManager(config=self.config, agg_type='file')
+        self.assertEqual('scan', m.minified)
+
     def test_run_tests_keyboardinterrupt(self):
         # Test that panther manager exits when there is a keyboard interrupt
         temp_directory = self.useFixture(fixtures.TempDir()).path
@@ -0,0 +1,192 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import metrics
+
+
+class MetricsTests(testtools.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, metrics.percentile(values, 50))
+        self.assertEqual(99, metrics.percentile(values, 99))
+        self.assertEqual(1, metrics.percentile(values, 0))
+        self.assertEqual(7, metrics.percentile([7], 90))
+        self.assertEqual(0, metrics.percentile([], 50))
+
+    def test_columns(self):
+        m = metrics.Metrics()
+        m.begin('a.js')
+        m.count_locs(['var a = 1;', '', '// comment', 'a();'])
+        m.note_nosec(3)
+        m.count_issues([{'SEVERITY': [0, 3, 0, 10],
+                         'CONFIDENCE': [0, 0, 5, 10]}])
+        # a file that failed to parse has no issue counts
+        m.begin('b.js')
+        m.count_locs(['b();'])
+        m.aggregate()
+
+        self.assertEqual({'loc': 2, 'nosec': 1,
+                          'SEVERITY.UNDEFINED': 0, 'SEVERITY.LOW': 1,
+                          'SEVERITY.MEDIUM': 0, 'SEVERITY.HIGH': 1,
+                          'CONFIDENCE.UNDEFINED': 0, 'CONFIDENCE.LOW': 0,
+                          'CONFIDENCE.MEDIUM': 1, 'CONFIDENCE.HIGH': 1},
+                         m.data['a.js'])
+        self.assertEqual({'loc': 1, 'nosec': 0}, m.data['b.js'])
+        totals = m.data['_totals']
+        self.assertEqual(3, totals['loc'])
+        self.assertEqual(1, totals['SEVERITY.HIGH'])
+        self.assertEqual(['_totals', 'a.js', 'b.js'], sorted(m.data))
+
+        # totals are sums of the columns, aggregating again changes nothing
+        m.aggregate()
+        self.assertEqual(totals, m.data['_totals'])
+
+    def test_data_view(self):
+        m = metrics.Metrics()
+        self.assertEqual(0, m.data['_totals']['SEVERITY.HIGH'])
+
+        # the data reads from and writes to the metrics
+        m.begin('a.js')
+        m.data['x.js'] = {'loc': 4}
+        m.data['x.js']['nosec'] = 2
+        m.data['_stopped'] = {'reason': 'fail fast'}
+        self.assertEqual({'loc': 4, 'nosec': 2}, m.data['x.js'])
+        self.assertEqual('a.js', m.current_name)
+        m.current['loc'] = 7
+        self.assertEqual(7, m.data['a.js']['loc'])
+        self.assertEqual({'reason': 'fail fast'}, m.data['_stopped'])
+        m.aggregate()
+        self.assertEqual(11, m.data['_totals']['loc'])
+        self.assertEqual(['_stopped', '_totals', 'a.js', 'x.js'],
+                         sorted(m.data))
+        self.assertIn('x.js', m.data)
+        self.assertNotIn('y.js', m.data)
+        self.assertRaises(KeyError, m.current.__setitem__, 'unknown', 1)
+        self.assertRaises(TypeError, m.data.__delitem__, 'x.js')
+
+    def test_as_dict(self):
+        m = metrics.Metrics()
+        m.begin('a.js')
+        m.count_issues([{'SEVERITY': [0, 0, 0, 10],
+                         'CONFIDENCE': [0, 0, 0, 10]}])
+        m.begin('b.js')
+        m.aggregate()
+        data = m.as_dict()
+        self.assertIs(dict, type(data['a.js']))
+        self.assertEqual(dict(m.data['a.js']), data['a.js'])
+        self.assertEqual({'loc': 0, 'nosec': 0}, data['b.js'])
+        self.assertEqual(m.data['_totals'], data['_totals'])
+
+    def test_restore(self):
+        m = metrics.Metrics()
+        m.begin('a.js')
+        m.count_locs(['a();'])
+        m.count_issues([{'SEVERITY': [0, 0, 0, 10],
+                         'CONFIDENCE': [0, 0, 0, 10]}])
+        saved = dict(m.current)
+
+        other = metrics.Metrics()
+        other.restore('a.js', saved)
+        other.restore('b.js', {})
+        other.aggregate()
+        self.assertEqual(saved, other.data['a.js'])
+        self.assertEqual(1, other.data['_totals']['loc'])
+        self.assertEqual(1, other.data['_totals']['CONFIDENCE.HIGH'])
+
+    def test_merge(self):
+        first = {'a.js': {'loc': 2, 'nosec': 0, 'SEVERITY.HIGH': 1},
+                 '_totals': {'loc': 2},
+                 '_slowest': {'files': [{'filename': 'a.js', 'cost': 0.5}],
+                              'histogram': [[0.001, 0], [0.002, 1]]}}
+        second = {'b.js': {'loc': 3, 'nosec': 1},
+                  '_helpers.js': {'loc': 1, 'nosec': 0},
+                  '_slowest': {'files': [{'filename': 'b.js', 'cost': 0.7}],
+                               'histogram': [[0.001, 2]]},
+                  '_stopped': {'reason': 'time budget', 'filename': 'b.js',
+                               'scanned': 1, 'unscanned': 1,
+                               'unscanned_files': ['c.js']},
+                  '_timings': {'phases': {}, 'tests': {}}}
+        m = metrics.Metrics()
+        m.merge(first)
+        m.merge(second)
+        m.aggregate()
+
+        self.assertEqual(['_helpers.js', '_slowest', '_stopped', '_totals',
+                          'a.js', 'b.js'], sorted(m.data))
+        self.assertEqual(6, m.data['_totals']['loc'])
+        self.assertEqual(1, m.data['_totals']['nosec'])
+        self.assertEqual(1, m.data['_totals']['SEVERITY.HIGH'])
+        self.assertEqual({'files': [{'filename': 'b.js', 'cost': 0.7}],
+                          'histogram': [[0.001, 2], [0.002, 1]]},
+                         m.data['_slowest'])
+        self.assertEqual(3, m.data['_stopped']['scanned'])
+        self.assertEqual(['c.js'], m.data['_stopped']['unscanned_files'])
+
+    def test_timings_disabled(self):
+        m = metrics.Metrics()
+        self.assertIsNone(m.timings)
+        m.begin('a.js')
+        with m.time('parse'):
+            pass
+        m.aggregate()
+        self.assertNotIn('_timings', m.data)
+
+    def test_timings(self):
+        m = metrics.Metrics(timings=True)
+        for fname, wall in (('a.js', 0.1), ('b.js', 0.3), ('c.js', 0.2)):
+            m.begin(fname)
+            m.timings.add('phases', 'parse', wall, wall / 2)
+            m.timings.add('tests', 'eval_used', 0.01, 0.01)
+            m.timings.add('tests', 'eval_used', 0.01, 0.01)
+        with m.time('objectify'):
+            pass
+        m.count_locs(['var a = 1;'])
+        m.aggregate()
+
+        timings = m.data['_timings']
+        parse = timings['phases']['parse']
+        self.assertEqual(3, parse['calls'])
+        self.assertEqual(3, parse['files'])
+        self.assertAlmostEqual(0.6, parse['wall']['total'])
+        self.assertEqual(0.2, parse['wall']['p50'])
+        self.assertEqual(0.3, parse['wall']['p99'])
+        self.assertEqual(0.15, parse['cpu']['max'])
+        self.assertEqual(1, timings['phases']['objectify']['files'])
+        self.assertEqual(6, timings['tests']['eval_used']['calls'])
+        # the timings are not summed into the totals
+        self.assertEqual(1, m.data['_totals']['loc'])
+        self.assertNotIn('phases', m.data['_totals'])
+
+    def test_slowest(self):
+        m = metrics.Metrics(top_slow=2)
+        m.note_cost(parse=1.0)
+        self.assertEqual({}, m.costs)
+        for fname, parse, analysis in (('a.js', 0.0005, 0.0),
+                                       ('b.js', 0.003, 0.001),
+                                       ('c.js', 0.010, 0.005),
+                                       ('d.js', 0.002, 0.0005)):
+            m.begin(fname)
+            m.note_cost(bytes=100)
+            m.note_cost(parse=parse, analysis=analysis, nodes=10)
+        # files replayed from the cache have no costs
+        m.begin('e.js')
+        m.aggregate()
+
+        slowest = m.data['_slowest']
+        self.assertEqual(['c.js', 'b.js'],
+                         [entry['filename'] for entry in slowest['files']])
+        self.assertAlmostEqual(0.015, slowest['files'][0]['cost'])
+        self.assertEqual(100, slowest['files'][0]['bytes'])
+        self.assertEqual(10, slowest['files'][0]['nodes'])
+        self.assertEqual([[0.001, 1], [0.002, 0], [0.004, 2], [0.008, 0],
+                          [0.016, 1]], slowest['histogram'])
+        self.assertNotIn('files', m.data['_totals'])
+
+    def test_slowest_disabled(self):
+        m = metrics.Metrics()
+        m.begin('a.js')
+        m.note_cost(parse=1.0)
+        m.aggregate()
+        self.assertNotIn('_slowest', m.data)
@@ -0,0 +1,57 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import config
+from panther.core import constants
+from panther.core import minified
+from panther.core import test_set
+
+
+class MinifiedTests(testtools.TestCase):
+
+    def test_detect(self):
+        readable = ("function add(a, b) {\n"
+                    "    return a + b;\n"
+                    "}\n") * 100
+        self.assertIsNone(minified.detect('lib/add.js', readable))
+        self.assertIsNone(minified.detect('lib/empty.js', ''))
+        self.assertEqual('minified file name',
+                         minified.detect('lib/add.min.js', readable))
+        self.assertEqual('webpack bundle', minified.detect(
+            'dist/main.js', '/******/ (function(modules) { // webpackBootstrap'
+                            '\n' + readable))
+        self.assertEqual('UMD bundle', minified.detect(
+            'dist/lib.js',
+            "(function (global, factory) {\n"
+            "  typeof exports === 'object' && typeof module !== 'undefined' ?"
+            " module.exports = factory() : global.lib = factory();\n"
+            "}(this, function () {}));\n"))
+        self.assertEqual('long lines', minified.detect(
+            'dist/lib.js', 'var a = 1;' * 200))
+        self.assertEqual('little whitespace', minified.detect(
+            'dist/lib.js', 'x=function(a,b){return a+b||c&&d?e:f};\n' * 100))
+
+    def test_scan_keywords(self):
+        tests = test_set.PantherTestSet(config.PantherConfig())
+        data = ("!function(){eval(a);x.eval(b);var f=new Function(c)}();\n"
+                "global.eval(d);evaluate(e);// nosec\n"
+                "eval (f)")
+        issues, score = minified.scan_keywords('lib.min.js', data, tests,
+                                               {2})
+        self.assertEqual([('eval_used', 1), ('eval_used', 3),
+                          ('new_function_used', 1)],
+                         [(i.test, i.lineno) for i in issues])
+        for i in issues:
+            self.assertEqual('lib.min.js', i.fname)
+            self.assertEqual('P601', i.test_id)
+            self.assertEqual(constants.LOW, i.confidence)
+        self.assertEqual([0, 0, 0, 30], score['SEVERITY'])
+        self.assertEqual([0, 9, 0, 0], score['CONFIDENCE'])
+
+    def test_scan_keywords_unselected(self):
+        tests = test_set.PantherTestSet(config.PantherConfig(),
+                                        {'exclude': ['P601']})
+        issues, score = minified.scan_keywords('lib.min.js', 'eval(a)',
+                                               tests, set())
+        self.assertEqual([], issues)
@@ -0,0 +1,230 @@
+# -*- coding:utf-8 -*-
+
+import json
+import os
+import subprocess
+import threading
+
+import fixtures
+import mock
+import six
+import testtools
+
+import panther
+from panther.core import constants
+from panther.core import nsp_manager
+
+
+ADVISORIES = [
+    {'id': 577, 'title': 'Prototype Pollution', 'module_name': 'lodash',
+     'vulnerable_versions': '<4.17.5', 'patched_versions': '>=4.17.5',
+     'recommendation': 'Update to version 4.17.5 or later.',
+     'cves': ['CVE-2018-3721'], 'cvss_score': 4.2},
+    {'id': 1065, 'title': 'Regular Expression Denial of Service',
+     'module_name': '@scope/parser', 'vulnerable_versions': '>=2.0.0 <2.1.1',
+     'patched_versions': '>=2.1.1', 'recommendation': 'Upgrade',
+     'severity': 'high'},
+    {'id': 1, 'title': 'Broken', 'module_name': 'broken',
+     'vulnerable_versions': '>=one'},
+]
+
+PACKAGE_LOCK_V1 = {
+    'name': 'app',
+    'lockfileVersion': 1,
+    'dependencies': {
+        'lodash': {'version': '4.17.4'},
+        'express': {
+            'version': '4.16.0',
+            'dependencies': {'lodash': {'version': '4.17.4'},
+                             '@scope/parser': {'version': '2.1.0'}},
+        },
+    },
+}
+
+PACKAGE_LOCK_V2 = {
+    'name': 'app',
+    'lockfileVersion': 2,
+    'packages': {
+        '': {'name': 'app', 'version': '1.0.0'},
+        'node_modules/lodash': {'version': '4.17.21'},
+        'node_modules/express': {'version': '4.16.0'},
+        'node_modules/express/node_modules/@scope/parser': {
+            'version': '2.0.5'},
+        'node_modules/local': {'resolved': 'packages/local', 'link': True},
+    },
+}
+
+YARN_LOCK = '''# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@scope/parser@^2.0.0", "@scope/parser@^2.1.0":
+  version "2.1.0"
+  resolved "https://registry.yarnpkg.com/@scope/parser/-/parser-2.1.0.tgz"
+  dependencies:
+    lodash "^4.17.0"
+
+lodash@^4.17.0:
+  version "4.17.4"
+'''
+
+YARN_BERRY_LOCK = '''__metadata:
+  version: 6
+
+"lodash@npm:^4.17.0":
+  version: 4.17.4
+  resolution: "lodash@npm:4.17.4"
+
+"app@workspace:.":
+  version: 0.0.0-use.local
+'''
+
+
+class NspManagerTests(testtools.TestCase):
+
+    def setUp(self):
+        super(NspManagerTests, self).setUp()
+        self.directory = self.useFixture(fixtures.TempDir()).path
+        self.advisory_db = nsp_manager.AdvisoryDatabase(ADVISORIES)
+
+    def _write(self, name, contents):
+        with open(os.path.join(self.directory, name), 'w') as fd:
+            if isinstance(contents, dict):
+                json.dump(contents, fd)
+            else:
+                fd.write(contents)
+
+    def _update_issues(self):
+        results = []
+        nsp_mgr = nsp_manager.OfflineNspManager(
+            results=results, advisory_db=self.advisory_db,
+            directory=self.directory)
+        nsp_mgr.update_issues()
+        return results
+
+    def test_advisory_database(self):
+        self.assertEqual([577], [a['id'] for a in
+                                 self.advisory_db.match('lodash', '4.17.4')])
+        self.assertEqual([], self.advisory_db.match('lodash', '4.17.5'))
+        self.assertEqual([], self.advisory_db.match('unknown', '1.0.0'))
+        self.assertEqual([], self.advisory_db.match('lodash',
+                                                    'github:a/lodash'))
+        self.assertNotIn('broken', self.advisory_db.advisories)
+
+    def test_advisory_database_object(self):
+        advisory_db = nsp_manager.AdvisoryDatabase(
+            {'advisories': dict((str(a['id']), a) for a in ADVISORIES[:1])})
+        self.assertEqual(1, len(advisory_db.match('lodash', '4.0.0')))
+
+    def test_iter_package_lock_v1(self):
+        packages = sorted(nsp_manager.iter_package_lock(
+            six.StringIO(json.dumps(PACKAGE_LOCK_V1))))
+        self.assertEqual(
+            [('@scope/parser', '2.1.0', ['app', 'express', '@scope/parser']),
+             ('express', '4.16.0', ['app', 'express']),
+             ('lodash', '4.17.4', ['app', 'express', 'lodash']),
+             ('lodash', '4.17.4', ['app', 'lodash'])],
+            packages)
+
+    def test_iter_package_lock_v2(self):
+        packages = sorted(nsp_manager.iter_package_lock(
+            six.StringIO(json.dumps(PACKAGE_LOCK_V2))))
+        self.assertEqual(
+            [('@scope/parser', '2.0.5', ['app', 'express', '@scope/parser']),
+             ('express', '4.16.0', ['app', 'express']),
+             ('lodash', '4.17.21', ['app', 'lodash'])],
+            packages)
+
+    def test_iter_yarn_lock(self):
+        self.assertEqual(
+            [('@scope/parser', '2.1.0', ['package.json', '@scope/parser']),
+             ('lodash', '4.17.4', ['package.json', 'lodash'])],
+            list(nsp_manager.iter_yarn_lock(six.StringIO(YARN_LOCK))))
+        self.assertEqual(
+            [('lodash', '4.17.4', ['package.json', 'lodash']),
+             ('app', '0.0.0-use.local', ['package.json', 'app'])],
+            list(nsp_manager.iter_yarn_lock(six.StringIO(YARN_BERRY_LOCK))))
+
+    def test_update_issues_package_lock(self):
+        self._write('package-lock.json', PACKAGE_LOCK_V1)
+        results = self._update_issues()
+
+        self.assertEqual(2, len(results))
+        lodash, parser = sorted(results, key=lambda i: i.test)
+        self.assertEqual(constants.NSP_TEST_ID, lodash.test_id)
+        self.assertEqual('package-lock.json', lodash.fname)
+        self.assertEqual('Prototype Pollution (lodash@4.17.4)', lodash.test)
+        self.assertEqual(panther.MEDIUM, lodash.severity)
+        self.assertIn('CVE-2018-3721', lodash.code)
+        self.assertEqual(panther.HIGH, parser.severity)
+        self.assertEqual('app > express > @scope/parser', parser.text)
+
+    def test_update_issues_yarn_lock(self):
+        self._write('yarn.lock', YARN_LOCK)
+        results = self._update_issues()
+
+        self.assertEqual(
+            ['Prototype Pollution (lodash@4.17.4)',
+             'Regular Expression Denial of Service (@scope/parser@2.1.0)'],
+            sorted(i.test for i in results))
+        self.assertEqual('yarn.lock', results[0].fname)
+
+    def test_update_issues_no_lock_file(self):
+        self.assertRaises(nsp_manager.AuditError, self._update_issues)
+
+
+class DependencyAuditTests(testtools.TestCase):
+
+    def setUp(self):
+        super(DependencyAuditTests, self).setUp()
+        self.p_mgr = mock.Mock(results=['scan issue'], skipped=[])
+        self.nsp_mgr = nsp_manager.NspManager()
+
+    def test_merge(self):
+        def update_issues():
+            self.nsp_mgr.results.append('audit issue')
+
+        self.nsp_mgr.update_issues = update_issues
+        audit = nsp_manager.DependencyAudit(self.nsp_mgr, timeout=10)
+        audit.start()
+        audit.merge(self.p_mgr)
+
+        self.assertEqual(['scan issue', 'audit issue'], self.p_mgr.results)
+        self.assertEqual([], self.p_mgr.skipped)
+
+    def test_merge_failure(self):
+        with mock.patch.object(nsp_manager.NspManager, 'has_nsp',
+                               new_callable=mock.PropertyMock) as has_nsp:
+            has_nsp.return_value = False
+            audit = nsp_manager.DependencyAudit(self.nsp_mgr)
+            audit.start()
+            audit.merge(self.p_mgr)
+
+        self.assertEqual(['scan issue'], self.p_mgr.results)
+        self.assertEqual(
+            [('package.json', 'dependency audit failed: nsp is not '
+                              'installed')],
+            self.p_mgr.skipped)
+
+    def test_merge_timeout(self):
+        done = threading.Event()
+        self.nsp_mgr.update_issues = done.wait
+        audit = nsp_manager.DependencyAudit(self.nsp_mgr, timeout=0.01)
+        audit.start()
+        audit.merge(self.p_mgr)
+        done.set()
+
+        self.assertEqual(['scan issue'], self.p_mgr.results)
+        self.assertEqual(
+            [('package.json', 'dependency audit timed out after 0.01 '
+                              'seconds')],
+            self.p_mgr.skipped)
+
+    @mock.patch('panther.core.nsp_manager.check_output')
+    def test_run_check_error(self, check_output):
+        check_output.side_effect = subprocess.CalledProcessError(2, 'nsp')
+        with mock.patch.object(nsp_manager.NspManager, 'has_nsp',
+                               new_callable=mock.PropertyMock) as has_nsp:
+            has_nsp.return_value = True
+            self.assertRaisesRegex(nsp_manager.AuditError, 'code 2',
+                                   self.nsp_mgr.run_check)
@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import testtools
+
+from panther.core import profiling
+
+
+class ProfilingTests(testtools.TestCase):
+
+    def test_subsystem(self):
+        def path(*parts):
+            return os.path.join(profiling.PANTHER_DIR, *parts)
+
+        self.assertEqual('parser',
+                         profiling.subsystem(path('core', 'pyesprima.py')))
+        self.assertEqual('parser', profiling.subsystem(
+            os.path.join(os.sep, 'site-packages', 'js2py', 'base.py')))
+        self.assertEqual('visitor',
+                         profiling.subsystem(path('core', 'scope.py')))
+        self.assertEqual('tester',
+                         profiling.subsystem(path('core', 'tester.py')))
+        self.assertEqual('formatter',
+                         profiling.subsystem(path('formatters', 'json.py')))
+        self.assertEqual('plugin:js_eval',
+                         profiling.subsystem(path('plugins', 'js_eval.py')))
+        self.assertEqual('panther',
+                         profiling.subsystem(path('core', 'utils.py')))
+        self.assertEqual('other', profiling.subsystem(
+            os.path.join(os.sep, 'usr', 'lib', 'json.py')))
+        self.assertEqual('builtins', profiling.subsystem('~'))
+
+    def test_scan_profiler(self):
+        out_dir = os.path.join(tempfile.mkdtemp(), 'profile')
+        self.addCleanup(shutil.rmtree, os.path.dirname(out_dir))
+        profiler = profiling.ScanProfiler(out_dir)
+        profiler.start()
+        with open(os.path.join(out_dir, 'panther-1.pstats'), 'w') as fd:
+            fd.write('stale')
+        profiler.profile.disable()
+
+        # stats left by a previous scan are removed
+        profiler = profiling.ScanProfiler(out_dir)
+        profiler.start()
+        profiling.subsystem('~')
+        summary_path = profiler.stop()
+
+        self.assertEqual(['panther-%d.pstats' % os.getpid(), 'summary.txt'],
+                         sorted(os.listdir(out_dir)))
+        with open(summary_path) as fd:
+            summary = fd.read()
+        self.assertIn('subsystem', summary)
+        self.assertIn('panther', summary)
@@ -0,0 +1,109 @@
+# -*- coding:utf-8 -*-
+
+import os
+
+import fixtures
+import mock
+import six
+import testtools
+
+from panther.core import config
+from panther.core import constants
+from panther.core import issue
+from panther.core import manager
+from panther.core import result_cache
+from panther.core import test_set
+
+
+class ResultCacheTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ResultCacheTests, self).setUp()
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.conf = config.PantherConfig()
+        self.p_ts = test_set.PantherTestSet(self.conf)
+
+    def test_blob_sha(self):
+        # same object name as `git hash-object` gives
+        self.assertEqual('ce013625030ba8dba906f756967f9e9ca394464a',
+                         result_cache.blob_sha('hello\n'))
+        self.assertEqual(result_cache.blob_sha(b'hello\n'),
+                         result_cache.blob_sha(u'hello\n'))
+
+    def test_default_cache_dir(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     '/xdg'))
+        self.assertEqual('/xdg/panther', result_cache.default_cache_dir())
+
+    def test_fingerprint(self):
+        fingerprint = result_cache.ResultCache.get_fingerprint(self.p_ts)
+        self.assertEqual(
+            fingerprint, result_cache.ResultCache.get_fingerprint(self.p_ts))
+        self.assertNotEqual(
+            fingerprint,
+            result_cache.ResultCache.get_fingerprint(self.p_ts, True))
+
+        profile = {'include': set(['P601'])}
+        self.assertNotEqual(
+            fingerprint, result_cache.ResultCache.get_fingerprint(
+                test_set.PantherTestSet(self.conf, profile)))
+
+        # tests that share a test id are told apart
+        shared = test_set.PantherTestSet(self.conf)
+        shared.plugins = [p for p in shared.plugins
+                          if p.name != 'eval_used']
+        self.assertNotEqual(
+            fingerprint, result_cache.ResultCache.get_fingerprint(shared))
+
+    def test_put_get(self):
+        cache = result_cache.ResultCache(self.cache_dir, self.p_ts)
+        key = result_cache.blob_sha('eval(x)')
+        self.assertIsNone(cache.get(key, 'a.js'))
+
+        found = issue.Issue(constants.HIGH, constants.MEDIUM, 'Use of eval')
+        found.fname = 'a.js'
+        found.test_id = 'P601'
+        found.lineno = 1
+        found.linerange = [1]
+        cache.put(key, [found], {'SEVERITY': [0, 0, 0, 10]}, {'loc': 1})
+
+        issues, score, file_metrics = cache.get(key, 'b.js')
+        self.assertEqual('b.js', issues[0].fname)
+        self.assertEqual('Use of eval', issues[0].text)
+        self.assertEqual([1], issues[0].linerange)
+        self.assertEqual({'SEVERITY': [0, 0, 0, 10]}, score)
+        self.assertEqual({'loc': 1}, file_metrics)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_get_corrupt_entry(self):
+        cache = result_cache.ResultCache(self.cache_dir, self.p_ts)
+        key = result_cache.blob_sha('eval(x)')
+        cache.put(key, [], {}, {})
+        with open(cache._entry_path(key), 'w') as fd:
+            fd.write('{')
+        self.assertIsNone(cache.get(key, 'a.js'))
+
+    def test_manager_replays_cached_results(self):
+        def scan(fname):
+            p_mgr = manager.PantherManager(self.conf, 'file',
+                                           cache_dir=self.cache_dir)
+            p_mgr.files_list = [fname]
+            p_mgr.run_tests(
+                reader=lambda f: six.StringIO("var a = 1;\neval(input);\n"))
+            return p_mgr
+
+        first = scan('a.js')
+        with mock.patch.object(manager.PantherManager,
+                               '_execute_ast_visitor') as visitor:
+            second = scan('b.js')
+            self.assertFalse(visitor.called)
+
+        self.assertEqual((1, 0), (second.result_cache.hits,
+                                  second.result_cache.misses))
+        self.assertEqual(['b.js'], [r.fname for r in second.results])
+        self.assertEqual([r.text for r in first.results],
+                         [r.text for r in second.results])
+        self.assertEqual(first.scores, second.scores)
+        self.assertEqual(first.metrics.data['a.js'],
+                         second.metrics.data['b.js'])
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
@@ -0,0 +1,121 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import context
+from panther.core.pyesprima import esprima
+from panther.core import rules
+from panther.core import visitor
+from panther.plugins import js_callee_rules
+
+
+def _expression(code):
+    program = visitor.objectify(esprima.parse(code).to_dict())
+    return program.body[0].expression
+
+
+class RuleTests(testtools.TestCase):
+
+    def test_parse_callee(self):
+        self.assertEqual(['*db', '*', '*find'], rules.parse_callee('db.*.find'))
+        self.assertEqual(['*x', '?', '?Identifier'],
+                         rules.parse_callee('x.?.?Identifier'))
+        self.assertRaises(ValueError, rules.parse_callee, 'db..find')
+
+    def test_from_dict(self):
+        rule = rules.Rule.from_dict({'name': 'exec', 'id': 'P604',
+                                     'callee': 'cp.exec',
+                                     'severity': 'high'})
+        self.assertEqual('P604', rule.test_id)
+        self.assertEqual('HIGH', rule.severity)
+        self.assertEqual('MEDIUM', rule.confidence)
+        self.assertEqual([['*cp', '*exec']], rule.callee)
+        self.assertEqual(('CallExpression',), rule.node_types)
+
+        issue = rule.issue()
+        self.assertEqual('exec', issue.test)
+        self.assertEqual('P604', issue.test_id)
+        self.assertEqual('Call matching rule exec.', issue.text)
+
+    def test_from_dict_invalid(self):
+        invalid = [{'callee': 'eval'},
+                   {'name': 'x'},
+                   {'name': 'x', 'callee': 'eval', 'node': 'member'},
+                   {'name': 'x', 'callee': 'eval', 'severity': 'SEVERE'},
+                   {'name': 'x', 'callee': 'eval', 'unknown': 1}]
+        for data in invalid:
+            self.assertRaises(ValueError, rules.Rule.from_dict, data)
+
+    def test_arguments(self):
+        rule = rules.Rule('exec', 'cp.exec', '', arguments=['expression', '*'])
+        self.assertTrue(rule.matches_arguments(_expression('cp.exec(a, b)')))
+        self.assertTrue(rule.matches_arguments(
+            _expression('cp.exec(`ls ${dir}`, f, g)')))
+        self.assertFalse(rule.matches_arguments(
+            _expression("cp.exec('ls', f)")))
+        self.assertFalse(rule.matches_arguments(_expression('cp.exec(a)')))
+
+        rule = rules.Rule('on', 'app.on', '', arguments=['string', 'function'])
+        self.assertTrue(rule.matches_arguments(
+            _expression("app.on('x', function() {})")))
+        self.assertTrue(rule.matches_arguments(
+            _expression("app.on('x', () => 1)")))
+        self.assertFalse(rule.matches_arguments(
+            _expression("app.on(1, () => 1)")))
+
+        rule = rules.Rule('id', 'f', '', arguments=['Identifier'])
+        self.assertTrue(rule.matches_arguments(_expression('f(a)')))
+        self.assertFalse(rule.matches_arguments(_expression('f(a.b)')))
+
+    def test_object_key(self):
+        rule = rules.Rule('where', 'db.*.find', '', object_key='$where')
+        self.assertTrue(rule.matches_arguments(
+            _expression("db.users.find({$where: 'x'})")))
+        self.assertFalse(rule.matches_arguments(
+            _expression("db.users.find({active: true})")))
+
+
+class RuleSetTests(testtools.TestCase):
+
+    def test_match(self):
+        rule_set = rules.RuleSet([
+            rules.Rule('eval', ['eval', 'global.eval'], ''),
+            rules.Rule('function', 'Function', '', node='new'),
+            rules.Rule('any_eval', '*.eval', '', node='any'),
+        ])
+
+        def names(code):
+            return [r.name for r in rule_set.match(_expression(code))]
+
+        self.assertEqual(['eval'], names('eval(x)'))
+        self.assertEqual(['eval', 'any_eval'], names('global.eval(x)'))
+        self.assertEqual(['any_eval'], names('new vm.eval(x)'))
+        self.assertEqual(['function'], names("new Function('a')"))
+        self.assertEqual([], names("Function('a')"))
+
+    def test_many_rules(self):
+        rule_set = rules.RuleSet(
+            rules.Rule('rule%d' % i, 'module%d.call' % i, '')
+            for i in range(500))
+        matched = rule_set.match(_expression('module250.call()'))
+        self.assertEqual(['rule250'], [r.name for r in matched])
+        self.assertEqual([], rule_set.match(_expression('module.call()')))
+
+
+class CalleeRulesPluginTests(testtools.TestCase):
+
+    def test_callee_rules(self):
+        config = {'rules': [{'name': 'exec', 'callee': 'cp.exec'},
+                            {'name': 'any_exec', 'callee': '*.exec',
+                             'severity': 'LOW'},
+                            {'name': 'invalid'}]}
+        node_context = context.Context({'node': _expression('cp.exec(x)')})
+
+        issues = js_callee_rules.callee_rules(node_context, config)
+        self.assertEqual(['exec', 'any_exec'], [i.test for i in issues])
+        self.assertEqual(['MEDIUM', 'LOW'], [i.severity for i in issues])
+
+        self.assertEqual({'rules': []},
+                         js_callee_rules.gen_config('callee_rules'))
+        self.assertEqual([], js_callee_rules.callee_rules(
+            node_context, js_callee_rules.gen_config('callee_rules')))
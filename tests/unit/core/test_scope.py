@@ -0,0 +1,84 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core.pyesprima import esprima
+from panther.core import scope
+from panther.core import visitor
+
+
+class ScopeAnalysisTests(testtools.TestCase):
+
+    def _analyse(self, code):
+        program = visitor.objectify(esprima.parse(code).to_dict())
+        identifiers = {}
+        for node in program.traverse():
+            if node.type == 'Identifier':
+                identifiers.setdefault(node.name, []).append(node)
+        return scope.ScopeAnalysis(program), identifiers
+
+    def test_constant_strings(self):
+        analysis, names = self._analyse(
+            "const a = 'SELECT ';\n"
+            "var b = \"FROM \";\n"
+            "let c = `WHERE `;\n"
+            "let d = `x ${a}`;\n"
+            "var e = 1;\n"
+            "use(a, b, c, d, e, undeclared);")
+        constants = [analysis.constant_string(names[name][-1])
+                     for name in ('a', 'b', 'c', 'd', 'e', 'undeclared')]
+        self.assertEqual(['SELECT ', 'FROM ', 'WHERE ', None, None, None],
+                         constants)
+        self.assertIsNone(analysis.constant_string(names['use'][0]))
+
+    def test_writes(self):
+        analysis, names = self._analyse(
+            "var a = 'x'; a = 'y';\n"
+            "var b = 'x'; b += 'y';\n"
+            "var c = 'x'; c++;\n"
+            "var d = 'x'; [d] = ['y'];\n"
+            "var e = 'x'; var e = 'y';\n"
+            "var f = 'x'; for (f in o) {}\n"
+            "var g = 'x'; g.length = 0;\n"
+            "use(a, b, c, d, e, f, g);")
+        for name in 'abcdef':
+            self.assertEqual(1, analysis.binding(names[name][-1]).writes,
+                             name)
+            self.assertIsNone(analysis.constant_string(names[name][-1]))
+        self.assertEqual('x', analysis.constant_string(names['g'][-1]))
+
+    def test_hoisting(self):
+        analysis, names = self._analyse(
+            "use(a, f);\n"
+            "var a = 'x';\n"
+            "function f() {}")
+        self.assertEqual('x', analysis.constant_string(names['a'][0]))
+        binding = analysis.binding(names['f'][0])
+        self.assertEqual('function', binding.kind)
+        self.assertIs(names['f'][1], binding.node)
+
+    def test_shadowing(self):
+        analysis, names = self._analyse(
+            "const q = 'SELECT ';\n"
+            "function f(q) { return q; }\n"
+            "function g() { { let q = 1; } return q; }\n"
+            "const h = (x, {q}) => q;\n"
+            "try {} catch (q) { use(q); }")
+        outer = analysis.binding(names['q'][0])
+        self.assertEqual('const', outer.kind)
+        kinds = [getattr(analysis.binding(q), 'kind', None)
+                 for q in names['q']]
+        # the key of the shorthand {q} pattern is not a reference
+        self.assertEqual(['const', 'param', 'param', 'let', 'const', None,
+                          'param', 'param', 'catch', 'catch'], kinds)
+        # the return in g sees the outer q, not the block scoped one
+        self.assertIn(names['q'][4], outer.references)
+
+    def test_property_names(self):
+        analysis, names = self._analyse(
+            "var a = 'x';\n"
+            "o.a; o[a]; ({a: 1}); ({[a]: 1}); ({a});")
+        binding = analysis.binding(names['a'][0])
+        # o[a], {[a]: 1} and the shorthand {a}
+        self.assertEqual(3, len(binding.references))
+        self.assertIsNone(analysis.binding(names['a'][1]))
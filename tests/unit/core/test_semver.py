@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import semver
+
+
+class VersionTests(testtools.TestCase):
+
+    def test_parse(self):
+        version = semver.Version.parse('v1.2.3-beta.1+build.5')
+        self.assertEqual((1, 2, 3), version.release)
+        self.assertEqual(('beta', '1'), version.prerelease)
+        self.assertEqual('1.2.3-beta.1', repr(version))
+
+    def test_parse_invalid(self):
+        self.assertRaises(ValueError, semver.Version.parse, '1.2')
+        self.assertRaises(ValueError, semver.Version.parse,
+                          'github:user/repo#abc')
+
+    def test_ordering(self):
+        ordered = ['1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta',
+                   '1.0.0-beta', '1.0.0-beta.2', '1.0.0-beta.11',
+                   '1.0.0-rc.1', '1.0.0', '1.0.1', '1.10.0', '2.0.0']
+        versions = [semver.Version.parse(v) for v in ordered]
+        self.assertEqual(versions, sorted(reversed(versions)))
+        self.assertEqual(semver.Version.parse('1.0.0'),
+                         semver.Version.parse('1.0.0+build'))
+
+
+RANGES = [
+    # (range, versions inside, versions outside)
+    ('^1.2.3', ['1.2.3', '1.9.9'], ['1.2.2', '2.0.0', '1.5.0-beta']),
+    ('^0.2.3', ['0.2.9'], ['0.3.0']),
+    ('^0.0.3', ['0.0.3'], ['0.0.4']),
+    ('~1.2.3', ['1.2.9'], ['1.3.0']),
+    ('1.x', ['1.0.0', '1.9.0'], ['2.0.0', '0.9.0']),
+    ('*', ['0.0.1', '9.9.9'], []),
+    ('>= 1.0.0 <1.4.0 || >=2.0.0 <2.1.1', ['1.0.0', '1.3.9', '2.1.0'],
+     ['1.4.0', '2.1.1', '0.9.9']),
+    ('>1.2 <=4.17', ['1.3.0', '4.17.99'], ['1.2.9', '4.18.0']),
+    ('1.2.3 - 2.3', ['1.2.3', '2.3.9'], ['1.2.2', '2.4.0']),
+    ('>=1.2.3-beta.1 <1.3', ['1.2.3-beta.2', '1.2.4'],
+     ['1.2.3-alpha', '1.2.4-beta']),
+    ('=1.0.0', ['1.0.0'], ['1.0.1']),
+    # the bounds made up for partial versions name no prerelease
+    ('>1', ['2.0.0'], ['2.0.0-beta', '1.9.9']),
+    ('<2 || ^1.2.3', ['1.9.9'], ['2.0.0-0', '2.0.0-beta']),
+]
+
+
+class RangeTests(testtools.TestCase):
+
+    def test_match(self):
+        for spec, inside, outside in RANGES:
+            version_range = semver.Range(spec)
+            for version in inside:
+                self.assertIn(version, version_range, spec)
+            for version in outside:
+                self.assertNotIn(version, version_range, spec)
+
+    def test_synthetic_bound(self):
+        self.assertFalse(semver.Range('>1').match('2.0.0-beta'))
+        self.assertTrue(semver.Range('>=2.0.0-0').match('2.0.0-beta'))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, semver.Range, '>=one')
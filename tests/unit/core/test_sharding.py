@@ -0,0 +1,48 @@
+# -*- coding:utf-8 -*-
+
+import os
+
+import fixtures
+import testtools
+
+from panther.core import sharding
+
+
+class ShardingTests(testtools.TestCase):
+
+    def _files(self, sizes):
+        temp_directory = self.useFixture(fixtures.TempDir()).path
+        paths = []
+        for number, size in enumerate(sizes):
+            paths.append(os.path.join(temp_directory, '%02d.js' % number))
+            with open(paths[-1], 'w') as fd:
+                fd.write('x' * size)
+        return paths
+
+    def test_partition(self):
+        paths = self._files([100, 80, 60, 40, 30, 20, 10, 5, 0, 0])
+        shards = [sharding.shard_files(paths, index, 3)
+                  for index in (1, 2, 3)]
+        # every file is in exactly one shard
+        self.assertEqual(sorted(paths), sorted(sum(shards, [])))
+        loads = [sum(os.path.getsize(p) for p in shard) for shard in shards]
+        self.assertLessEqual(max(loads) - min(loads), 40)
+        for shard in shards:
+            self.assertEqual(sorted(shard), shard)
+
+    def test_deterministic(self):
+        paths = self._files([10] * 8)
+        first = sharding.shard_files(paths, 1, 2)
+        self.assertEqual(first, sharding.shard_files(list(reversed(paths)),
+                                                     1, 2))
+        self.assertEqual(4, len(first))
+
+    def test_single_shard(self):
+        paths = self._files([3, 2, 1]) + ['missing.js']
+        self.assertEqual(sorted(paths), sharding.shard_files(paths, 1, 1))
+        self.assertRaises(ValueError, sharding.shard_files, paths, 2, 1)
+
+    def test_parse_shard(self):
+        self.assertEqual((2, 4), sharding.parse_shard('2/4'))
+        for value in ('0/4', '5/4', '2', 'a/b', '1/2/3'):
+            self.assertRaises(ValueError, sharding.parse_shard, value)
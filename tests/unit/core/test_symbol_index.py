@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+
+import re
+
+import testtools
+
+from panther.core.pyesprima import esprima
+from panther.core import symbol_index
+from panther.core import visitor
+
+
+def _parse(code):
+    return visitor.objectify(esprima.parse(code).to_dict())
+
+
+class SymbolIndexTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SymbolIndexTests, self).setUp()
+        self.program = _parse(
+            "var q = 'SELECT ' + connection.escape(id) + name;\n"
+            "f(obj['escapeId'], {'key': 'escaped value'});")
+        self.index = symbol_index.SymbolIndex(self.program)
+
+    def test_symbols(self):
+        declarator = self.program.body[0].declarations[0]
+        self.assertEqual(set(['q', 'connection', 'escape', 'id', 'name']),
+                         self.index.symbols(declarator))
+
+        concat = declarator.init
+        self.assertEqual(set(['name']), self.index.symbols(concat.right))
+
+    def test_property_names(self):
+        call = self.program.body[1].expression
+        # string keys are names, string values are not
+        self.assertEqual(set(['f', 'obj', 'escapeId', 'key']),
+                         self.index.symbols(call))
+
+    def test_references(self):
+        concat = self.program.body[0].declarations[0].init
+        self.assertTrue(self.index.references(concat, 'escape'))
+        self.assertTrue(self.index.references(concat.left.right, 'escape'))
+        self.assertFalse(self.index.references(concat.right, 'escape'))
+        self.assertFalse(self.index.references(concat.left.left, 'escape'))
+
+        pattern = re.compile('^escape$')
+        call = self.program.body[1].expression
+        self.assertTrue(self.index.references(concat, pattern))
+        self.assertFalse(self.index.references(call, pattern))
+        self.assertTrue(self.index.references(call, 'escape'))
+
+    def test_references_outside_tree(self):
+        other = _parse('mysql.escape(x)').body[0]
+        self.assertTrue(self.index.references(other, 'escape'))
+        self.assertFalse(self.index.references(other, 'connection'))
+
+    def test_deep_tree(self):
+        program = _parse(' + '.join(['a%d' % i for i in range(200)]))
+        index = symbol_index.SymbolIndex(program)
+        self.assertEqual(200, len(index.symbols(program)))
+        self.assertTrue(index.references(program, 'a199'))
+
+    def test_subtrees_reused(self):
+        declarator = self.program.body[0].declarations[0]
+        concat = declarator.init
+        self.assertFalse(self.index.references(concat.right, 'escape'))
+        # names first seen by a later query are matched too
+        self.assertTrue(self.index.references(declarator, 'escape'))
+        self.assertTrue(self.index.references(concat, 'escape'))
+        self.assertEqual(set(['name']), self.index.symbols(concat.right))
@@ -369,3 +369,69 @@ class UtilTests(testtools.TestCase):
             "x[y][z.j]({[prop]: 'hey',['b' + 'ar']: 'there'})", '*prop'))
         self.assertFalse(test_argument(
             "x[y][z.j]({[prop]: 'hey',['b' + 'ar']: 'there'})", '*'))
+
+    def test_linerange(self):
+        code = "var a = 1;\nvar b = 'x' +\n    a +\n    'y';\n"
+        ast_program = visitor.objectify(
+            esprima.parse(code, {'loc': True}).to_dict())
+
+        declaration = ast_program.body[1]
+        self.assertEqual([2, 3, 4], p_utils.linerange(declaration))
+        self.assertEqual([1], p_utils.linerange(ast_program.body[0]))
+
+    def test_get_concat_operands(self):
+        json_program = esprima.parse("'a' + b + ('c' + d) + e - f + g")
+        ast_program = visitor.objectify(json_program.to_dict())
+
+        root = ast_program.body[0].expression
+        operands = p_utils.get_concat_operands(root)
+        self.assertEqual(['BinaryExpression', 'Identifier'],
+                         [o.type for o in operands])
+        self.assertEqual('-', operands[0].operator)
+        self.assertIs(operands, p_utils.get_concat_operands(root))
+        self.assertIsNone(p_utils.get_concat_root(root))
+
+        # the (-) expression starts a chain of its own
+        subtraction = operands[0]
+        self.assertIsNone(p_utils.get_concat_root(subtraction))
+        inner = p_utils.get_concat_operands(subtraction.left)
+        self.assertEqual(['a', 'b', 'c', 'd', 'e'],
+                         [getattr(o, 'value', getattr(o, 'name', None))
+                          for o in inner])
+        self.assertIs(subtraction.left,
+                      p_utils.get_concat_root(subtraction.left.left))
+
+    def test_get_name_space(self):
+        json_program = esprima.parse('db.users.find({})')
+        call_expression = visitor.objectify(
+            json_program.to_dict()).body[0].expression
+
+        name_space = p_utils.get_name_space(call_expression)
+        self.assertEqual(('*db', '*users', '*find'), name_space)
+        self.assertIs(name_space, p_utils.get_name_space(call_expression))
+        self.assertEqual(('*db', '*users'),
+                         p_utils.get_name_space(call_expression.callee.object))
+
+    def test_name_space_trie(self):
+        trie = p_utils.NameSpaceTrie([
+            (['*db', '*', '*find'], 'find'),
+            (['*db', '*runCommand'], 'run'),
+            (['*', '*runCommand'], 'any_run'),
+            (['*x', '?', '?Identifier'], 'computed'),
+        ])
+
+        def test_name_space(code):
+            json_program = esprima.parse(code)
+            ast_program = visitor.objectify(json_program.to_dict())
+            return trie.match_node(ast_program.body[0].expression)
+
+        self.assertEqual(set(['find']), test_name_space('db.users.find()'))
+        self.assertEqual(set(['run', 'any_run']),
+                         test_name_space('db.runCommand({})'))
+        self.assertEqual(set(['any_run']),
+                         test_name_space('admin.runCommand({})'))
+        self.assertEqual(set(['computed']), test_name_space('x[y][z]()'))
+        self.assertEqual(set(), test_name_space('db[users].find()'))
+        self.assertEqual(set(), test_name_space('db.users.find.all()'))
+        self.assertEqual(set(), test_name_space('find()'))
+        self.assertRaises(ValueError, trie.add, [], 'empty')
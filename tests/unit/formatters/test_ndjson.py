@@ -0,0 +1,71 @@
+# -*- coding:utf-8 -*-
+
+import collections
+import json
+import tempfile
+
+import mock
+import testtools
+
+import panther
+from panther.core import config
+from panther.core import issue
+from panther.core import manager
+from panther.core.tracer.entities.function import Function
+from panther.core.tracer.entities.route import Route
+from panther.formatters import ndjson as p_ndjson
+
+
+class NdjsonFormatterTests(testtools.TestCase):
+
+    def setUp(self):
+        super(NdjsonFormatterTests, self).setUp()
+        conf = config.PantherConfig()
+        self.manager = manager.PantherManager(conf, 'file')
+        (tmp_fd, self.tmp_fname) = tempfile.mkstemp()
+        self.issues = []
+        for fname in ['b.js', 'a.js']:
+            i = issue.Issue(panther.HIGH, panther.MEDIUM, 'Use of eval(...)')
+            i.fname = fname
+            i.lineno = 1
+            i.linerange = [1]
+            i.test = 'eval_used'
+            self.issues.append(i)
+
+    def _report(self):
+        tmp_file = open(self.tmp_fname, 'w')
+        p_ndjson.report(self.manager, tmp_file, panther.LOW, panther.LOW)
+        with open(self.tmp_fname) as f:
+            return [json.loads(line) for line in f]
+
+    def test_report(self):
+        self.manager.results = self.issues
+
+        lines = self._report()
+
+        self.assertEqual(['a.js', 'b.js'], [l['filename'] for l in lines])
+        self.assertEqual('HIGH', lines[0]['issue_severity'])
+        self.assertNotIn('call_path', lines[0])
+
+    @mock.patch('panther.core.manager.PantherManager.get_issue_list')
+    def test_report_baseline(self, get_issue_list):
+        get_issue_list.return_value = collections.OrderedDict(
+            [(self.issues[0], self.issues)])
+
+        lines = self._report()
+
+        self.assertEqual(1, len(lines))
+        self.assertEqual(2, len(lines[0]['candidates']))
+
+    def test_report_call_path(self):
+        route = Route('/login', 'POST', [])
+        function = Function('app.js', 'login', node=None, caller='auth.login')
+        self.issues[0].call_path = (route, function)
+        self.manager.results = self.issues[:1]
+
+        lines = self._report()
+
+        self.assertEqual([{'method': 'POST', 'pattern': '/login'},
+                          {'file_path': 'app.js', 'identifier': 'login',
+                           'caller': 'auth.login', 'line_number': None}],
+                         lines[0]['call_path'])
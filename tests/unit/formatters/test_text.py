@@ -151,6 +151,77 @@ class TextFormatterTests(testtools.TestCase):
                               ]
             for item in expected_items:
                 self.assertIn(item, data)
+            self.assertNotIn('Run timings', data)
+
+        # Validate that the timings are summarised when they were recorded
+        timing = {'calls': 2, 'files': 1,
+                  'wall': {'total': 0.5, 'p50': 0.5, 'p90': 0.5, 'p99': 0.5,
+                           'max': 0.5},
+                  'cpu': {'total': 0.25, 'p50': 0.25, 'p90': 0.25,
+                          'p99': 0.25, 'max': 0.25}}
+        self.manager.metrics.data['_timings'] = {
+            'phases': {'parse': timing}, 'tests': {'eval_used': timing}}
+        tmp_file = open(self.tmp_fname, 'w')
+        p_text.report(self.manager, tmp_file, panther.LOW, panther.LOW,
+                      lines=5)
+        with open(self.tmp_fname) as f:
+            data = f.read()
+            self.assertIn('Run timings', data)
+            self.assertIn('parse: 500.0 ms wall, 250.0 ms cpu, 2 calls', data)
+            self.assertIn('Slowest tests (1 of 1)', data)
+            self.assertIn('eval_used: 500.0 ms wall', data)
+            self.assertNotIn('Run costs', data)
+
+        # Validate that the slowest files are listed when requested
+        self.manager.metrics.data['_slowest'] = {
+            'files': [{'filename': 'big.js', 'cost': 0.25, 'parse': 0.2,
+                       'analysis': 0.05, 'nodes': 1000, 'bytes': 20000}],
+            'histogram': [[0.001, 2], [0.002, 0], [0.004, 1]]}
+        tmp_file = open(self.tmp_fname, 'w')
+        p_text.report(self.manager, tmp_file, panther.LOW, panther.LOW,
+                      lines=5)
+        with open(self.tmp_fname) as f:
+            data = f.read()
+            self.assertIn('Slowest files (1)', data)
+            self.assertIn('big.js: 250.0 ms (parse 200.0 ms, analysis '
+                          '50.0 ms), 1000 nodes, 20000 bytes', data)
+            self.assertIn('<=        2 ms:      0\n', data)
+            self.assertIn('<=        4 ms:      1 ' + '#' * 20 + '\n', data)
+            self.assertNotIn('Scan stopped early', data)
+            self.assertNotIn('same contents', data)
+
+        # Validate that files deduplicated by contents are counted
+        self.manager.metrics.data['_deduplicated'] = {'files': 4}
+        tmp_file = open(self.tmp_fname, 'w')
+        p_text.report(self.manager, tmp_file, panther.LOW, panther.LOW,
+                      lines=5)
+        with open(self.tmp_fname) as f:
+            self.assertIn('Files with the same contents as another file: 4',
+                          f.read())
+
+        # Validate that minified files are listed with how they were analysed
+        self.manager.metrics.data['_minified'] = {'files': [
+            {'filename': 'lib.min.js', 'reason': 'minified file name',
+             'mode': 'keywords'}]}
+        tmp_file = open(self.tmp_fname, 'w')
+        p_text.report(self.manager, tmp_file, panther.LOW, panther.LOW,
+                      lines=5)
+        with open(self.tmp_fname) as f:
+            self.assertIn('Minified or generated files (1):\n'
+                          '\t\tlib.min.js (minified file name, keywords)\n',
+                          f.read())
+
+        # Validate that a scan stopped by --fail-fast is reported as partial
+        self.manager.metrics.data['_stopped'] = {
+            'reason': 'fail fast', 'filename': 'binding.js', 'scanned': 1,
+            'unscanned': 2, 'unscanned_files': ['x.js', 'y.js']}
+        tmp_file = open(self.tmp_fname, 'w')
+        p_text.report(self.manager, tmp_file, panther.LOW, panther.LOW,
+                      lines=5)
+        with open(self.tmp_fname) as f:
+            self.assertIn('Scan stopped early (fail fast) at binding.js: '
+                          '1 files scanned, 2 not scanned\n'
+                          '\t\tx.js\n\t\ty.js\n', f.read())
 
     @mock.patch('panther.core.manager.PantherManager.get_issue_list')
     def test_report_baseline(self, get_issue_list):
@@ -0,0 +1,31 @@
+# -*- coding:utf-8 -*-
+
+import testtools
+
+from panther.core import context
+from panther.core.pyesprima import esprima
+from panther.core import visitor
+from panther.plugins import js_server_side_injection as injection
+
+
+def _context(code):
+    program = visitor.objectify(esprima.parse(code).to_dict())
+    return context.Context({'node': program.body[0].expression})
+
+
+class ServerSideInjectionTests(testtools.TestCase):
+
+    def test_eval_used(self):
+        for code in ("eval(a)", "global.eval(a)", "global[eval](a)"):
+            self.assertIsNotNone(injection.eval_used(_context(code)), code)
+        for code in ("global['eval'](a)", "dog.global.eval(a)",
+                     "evaluate(a)", "a.eval(b)"):
+            self.assertIsNone(injection.eval_used(_context(code)), code)
+
+    def test_new_function_used(self):
+        for code in ("new Function(a)", "new global.Function(a)"):
+            self.assertIsNotNone(
+                injection.new_function_used(_context(code)), code)
+        for code in ("new cat.global.Function()", "new Functions(a)"):
+            self.assertIsNone(
+                injection.new_function_used(_context(code)), code)
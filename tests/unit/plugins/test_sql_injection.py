@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+
+import random
+import re
+import timeit
+
+import testtools
+
+from panther.plugins import js_sql_injection as sql
+
+
+# The expression the keyword scan replaces, as the reference of what it
+# has to match
+BACKTRACKING_SQL_RE = re.compile(
+    r'(select\s.*from\s|'
+    r'delete\s+from\s|'
+    r'insert\s+into\s.*values\s|'
+    r'update\s.*set\s)',
+    re.IGNORECASE | re.DOTALL,
+)
+
+WORDS = ['select', 'SELECT', 'from', 'FROM', 'delete', 'insert', 'into',
+         'values', 'update', 'set', 'offset', 'where', 'id', '?', '*',
+         'ſelect', 'ſet']
+SEPARATORS = [' ', '', '\n', '\t', '  ', ',', ' ']
+
+
+class SqlClassifierTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SqlClassifierTests, self).setUp()
+        sql.SQL_MEMO.clear()
+        self.addCleanup(sql.SQL_MEMO.clear)
+
+    def test_contains_sql(self):
+        self.assertTrue(sql._contains_sql('SELECT Id FROM '))
+        self.assertTrue(sql._contains_sql('select\nfrom\n'))
+        self.assertTrue(sql._contains_sql('DELETE   FROM t'))
+        self.assertTrue(sql._contains_sql('insert into t (a) values ('))
+        self.assertTrue(sql._contains_sql('update t set a = '))
+        self.assertFalse(sql._contains_sql('from t select '))
+        self.assertFalse(sql._contains_sql('select a, b'))
+        self.assertFalse(sql._contains_sql('delete x from '))
+        self.assertFalse(sql._contains_sql('insert values '))
+
+    def test_same_as_regex(self):
+        rand = random.Random(1234)
+        for _ in range(5000):
+            data = ''.join(rand.choice(WORDS) + rand.choice(SEPARATORS)
+                           for _ in range(rand.randint(0, 8)))
+            self.assertEqual(BACKTRACKING_SQL_RE.search(data) is not None,
+                             sql._contains_sql(data), repr(data))
+
+    def test_is_dangerous_sql(self):
+        self.assertTrue(sql._is_dangerous_sql('SELECT Id FROM '))
+        self.assertFalse(sql._is_dangerous_sql('SELECT Id FROM t WHERE ?'))
+        self.assertEqual({'SELECT Id FROM ': True,
+                          'SELECT Id FROM t WHERE ?': False}, sql.SQL_MEMO)
+
+    def test_memo_bounds(self):
+        self.patch(sql, 'SQL_MEMO_SIZE', 2)
+        long_string = 'select ' * sql.SQL_MEMO_MAX_LENGTH
+        self.assertFalse(sql._is_dangerous_sql(long_string))
+        self.assertEqual({}, sql.SQL_MEMO)
+
+        for data in ('a', 'b', 'c'):
+            sql._is_dangerous_sql(data)
+        self.assertEqual({'c': False}, sql.SQL_MEMO)
+
+    def test_pathological_literals(self):
+        # 100 KB template literals that make the backtracking expression
+        # scan the rest of the string for every keyword
+        literals = [
+            'select ' * (100000 // 7),
+            'insert into ' * (100000 // 12),
+            'update ' * (100000 // 7),
+            'select' + ' ' * 100000,
+            ('update x ' + 'a' * 100) * (100000 // 109),
+        ]
+        for data in literals:
+            self.assertFalse(sql._contains_sql(data))
+            elapsed = timeit.timeit(lambda: sql._contains_sql(data),
+                                    number=1)
+            self.assertLess(elapsed, 1.0)
+        # the backtracking expression takes several seconds on the first
+        # literal alone, against a few milliseconds for the keyword scan